@@ -0,0 +1,249 @@
+# src/utils/ae_table.py
+"""
+Read adverse-event tables straight from a PDF's text layer
+
+Born-digital publications typeset their safety tables as positioned text,
+so the numbers are already there - no model needed. Words are grouped into
+cells by horizontal gaps, numeric cells are clustered into columns across
+rows, and each column is labelled with an arm and a grade band from the
+header rows above it (spanning headers such as "Treatment (N=225)" carry
+over to the columns beneath them). Counts are turned into percentages with
+the arm's N. The result follows ADVERSE_EVENTS_SCHEMA.
+"""
+
+import re
+from src.utils.pdf_layout import NUMERIC_PATTERN
+from config.settings import AE_TABLE_MIN_CONFIDENCE
+
+# Grade bands: "Grade >=3", "≥3", "Grade 3-5", "Grade 3/4", "3 or higher"
+GRADE_3_PLUS_PATTERN = re.compile(
+    r'(?:[≥>]=?\s*3\b|\b3\s*(?:-|–|/|to|or)\s*(?:[45]|higher|more|above)\b|\b3\+|grade\s*3\b)', re.IGNORECASE)
+# Header words that describe the grade or the cell format rather than the arm
+COLUMN_NOISE_PATTERN = re.compile(
+    r'(?:\b(?:any|all)\s+grades?\b|\bgrades?\b|[≥>]=?\s*3\+?|\b3\s*(?:-|–|/|to|or)\s*(?:[45]|higher|more|above)\b|'
+    r'\b3\+|\bn\s*\(%\)|%|\bno\.)', re.IGNORECASE)
+ARM_SIZE_PATTERN = re.compile(r'\bn\s*=\s*(\d+)', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+# In order of precedence - "Placebo + chemotherapy" is the control even if the other arm also has chemotherapy
+CONTROL_CUES = ('placebo', 'control', 'observation', 'best supportive', 'standard', 'comparator', 'chemotherapy')
+# What may sit next to the cue in a label that names the control alone ("Chemotherapy alone (N=79)")
+BARE_ARM_PATTERN = re.compile(r'\bn\s*=\s*\d+|\b(?:alone|only|arm|group|monotherapy)\b|[()+,/&]', re.IGNORECASE)
+TOTAL_CUES = ('total', 'overall', 'all patients')
+# Rows that summarize the table rather than name an event ("Any grade >=3 event", "Total")
+SUMMARY_PATTERN = re.compile(r'^\s*(any|all|total|patients with)\b', re.IGNORECASE)
+
+def _cells(words):
+    """
+    Split a row into cells at gaps wider than the text height (an ordinary
+    space is about a quarter of it)
+
+    Args:
+        words: [(x0, y0, x1, y1, text)] for one row
+
+    Returns:
+        [{'x0', 'x1', 'text', 'numeric'}] left to right
+    """
+    cells = []
+    for x0, y0, x1, y1, text in sorted(words, key=lambda w: w[0]):
+        if cells and x0 - cells[-1]['x1'] < 0.8 * (y1 - y0):
+            cell = cells[-1]
+            cell['x1'] = max(cell['x1'], x1)
+            cell['words'].append(text)
+        else:
+            cells.append({'x0': x0, 'x1': x1, 'words': [text]})
+
+    for cell in cells:
+        cell['text'] = ' '.join(cell.pop('words'))
+        cell['numeric'] = all(NUMERIC_PATTERN.match(word) for word in cell['text'].split())
+    return cells
+
+def _column_spans(rows):
+    """Merge the x ranges of numeric cells across rows into column spans"""
+    spans = []
+    for x0, x1 in sorted((cell['x0'], cell['x1']) for cells in rows for cell in cells if cell['numeric']):
+        if spans and x0 <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], x1)
+        else:
+            spans.append([x0, x1])
+    return spans
+
+def _column_headers(header_rows, spans):
+    """
+    Header text over each column, top row first
+
+    A header cell covers the columns it overlaps; a column with nothing above
+    it in a row takes the nearest cell to its left in that row (a spanning
+    header), as long as that cell sits over the numeric part of the table.
+    """
+    headers = [[] for _ in spans]
+    numeric_left = spans[0][0] - 2
+    for cells in header_rows:
+        cells = [cell for cell in cells if cell['x1'] > numeric_left]
+        for index, (x0, x1) in enumerate(spans):
+            above = [cell['text'] for cell in cells if cell['x0'] <= x1 and cell['x1'] >= x0]
+            if not above:
+                left = [cell for cell in cells if cell['x0'] <= x1]
+                above = [left[-1]['text']] if left else []
+            headers[index].extend(above)
+    return [' '.join(parts) for parts in headers]
+
+def _percent(text, arm_size, percent_column):
+    """
+    Percentage from a cell: "72 (32.0)", "72 (32%)", "32.0%", "32.0", or a bare count
+
+    Returns:
+        (percent or None, exact) - exact is False when a bare integer had to be
+        taken as a percentage because the arm size is unknown
+    """
+    numbers = [float(n) for n in NUMBER_PATTERN.findall(text)]
+    if not numbers:
+        return None, True
+    if len(numbers) >= 2:
+        return numbers[1], True
+    value = numbers[0]
+    if '%' in text or percent_column or '.' in text:
+        return value, True
+    if arm_size:
+        return value / arm_size * 100, True
+    return value, False
+
+def _arm_label(header):
+    """Column header without its grade band and cell format - the arm's name"""
+    return re.sub(r'\s+', ' ', COLUMN_NOISE_PATTERN.sub(' ', header)).strip(' ,;:')
+
+def control_arm(arms):
+    """
+    Pick the control among the arm labels (lowercase)
+
+    The first cue in CONTROL_CUES found in exactly one arm decides. When a cue
+    is in several arms ("Pembrolizumab + chemotherapy" vs "Chemotherapy"), the
+    arm whose label is nothing but the cue is the control.
+
+    Returns:
+        (control arm or None, ambiguous) - ambiguous when no arm carries a cue
+        (head-to-head "Drug A" vs "Drug B"), or several do and none names it
+        alone, so the last arm is only a guess
+    """
+    if len(arms) < 2:
+        return None, False
+    for cue in CONTROL_CUES:
+        matching = [arm for arm in arms if cue in arm]
+        if len(matching) == 1:
+            return matching[0], False
+        bare = [arm for arm in matching if not BARE_ARM_PATTERN.sub(' ', arm.replace(cue, ' ')).split()]
+        if len(bare) == 1:
+            return bare[0], False
+        if matching:
+            return arms[-1], True
+    return arms[-1], True
+
+def extract_ae_table(rows):
+    """
+    Extract an adverse-event table from positioned words
+
+    Args:
+        rows: Table rows top to bottom, each a list of (x0, y0, x1, y1, text)
+            words - header rows first, as in a text-layer table region
+
+    Returns:
+        ADVERSE_EVENTS_SCHEMA fields plus 'confidence' (0-1) and 'method';
+        serious_aes items also carry grade_3_plus_rate and control_rate where
+        the table has them
+    """
+    def failed(reason):
+        return {'confidence': 0.0, 'method': 'text_layer', 'reason': reason}
+
+    rows = [_cells(words) for words in rows if words]
+    # Data rows have a label and at least two numbers; everything above the first is header
+    is_data = [sum(cell['numeric'] for cell in cells) >= 2 and not cells[0]['numeric'] for cells in rows]
+    if True not in is_data:
+        return failed("no data rows")
+    first = is_data.index(True)
+    header_rows, data_rows = rows[:first], [cells for cells, data in zip(rows, is_data) if data]
+
+    spans = _column_spans(data_rows)
+    if len(spans) < 2 or len(data_rows) < 2:
+        return failed(f"{len(spans)} numeric columns, {len(data_rows)} rows")
+
+    # Label each column with an arm and a grade band
+    columns, arms, names = [], [], {}
+    for header in _column_headers(header_rows, spans):
+        name = _arm_label(header)
+        arm = name.lower()
+        if any(cue in arm for cue in TOTAL_CUES):
+            arm = None
+        elif arm not in arms:
+            arms.append(arm)
+            names[arm] = name
+        size = ARM_SIZE_PATTERN.search(header)
+        columns.append({'arm': arm, 'header': header,
+                        'grade': '3+' if GRADE_3_PLUS_PATTERN.search(header) else 'any',
+                        'size': int(size.group(1)) if size else None,
+                        'percent': '%' in header})
+    if not arms:
+        return failed("no arm columns")
+
+    control, ambiguous = control_arm(arms)
+    treatment = next(arm for arm in arms if arm != control)
+    # Arm sizes are often only in the spanning header of the arm's first column
+    sizes = {arm: next((c['size'] for c in columns if c['arm'] == arm and c['size']), None) for arm in arms}
+
+    exact = True
+    def rate(values, arm, grade, fallback=True):
+        """Percentage for an arm and grade band, or the arm's only column if `fallback`"""
+        nonlocal exact
+        bands = [i for i, c in enumerate(columns) if c['arm'] == arm]
+        index = next((i for i in bands if columns[i]['grade'] == grade),
+                     bands[0] if fallback and len(bands) == 1 else None)
+        if index is None or index not in values:
+            return None
+        value, is_exact = _percent(values[index], sizes[arm], columns[index]['percent'])
+        exact = exact and is_exact
+        return round(value, 1) if value is not None else None
+
+    events, summary = [], None
+    for cells in data_rows:
+        label = ' '.join(cell['text'] for cell in cells if not cell['numeric'])
+        values = {}
+        for cell in cells:
+            if cell['numeric']:
+                for index, (x0, x1) in enumerate(spans):
+                    if cell['x0'] <= x1 and cell['x1'] >= x0:
+                        values[index] = cell['text']
+        if SUMMARY_PATTERN.match(label):
+            if GRADE_3_PLUS_PATTERN.search(label):
+                summary = values
+            continue
+        events.append({
+            'event': label,
+            'rate': rate(values, treatment, 'any'),
+            'grade_3_plus_rate': rate(values, treatment, '3+', fallback=False),
+            'control_rate': rate(values, control, 'any') if control else None
+        })
+
+    complete = [event for event in events if event['rate'] is not None]
+    if len(complete) < 2:
+        return failed("fewer than two events with a treatment-arm rate")
+
+    confidence = len(complete) / len(events) * (1.0 if exact else 0.6)
+    if ambiguous:  # Arms may be swapped - leave it to the vision fallback
+        confidence = min(confidence, AE_TABLE_MIN_CONFIDENCE / 2)
+    if summary is not None:
+        grade_3_plus = (rate(summary, treatment, '3+'), rate(summary, control, '3+') if control else None)
+    else:
+        grade_3_plus = (None, None)
+
+    complete.sort(key=lambda event: -event['rate'])
+    return {
+        'grade_3_plus_treatment': grade_3_plus[0],
+        'grade_3_plus_control': grade_3_plus[1],
+        'most_common_ae': complete[0]['event'],
+        'most_common_ae_rate': complete[0]['rate'],
+        'serious_aes': complete,
+        'analysis': f"Read from the PDF text layer: {len(complete)} events; treatment arm "
+                    f"'{names[treatment]}'" + (f", control arm '{names[control]}'" if control else "") +
+                    (" (control arm uncertain)" if ambiguous else ""),
+        'confidence': round(confidence, 3),
+        'method': 'text_layer'
+    }
\ No newline at end of file
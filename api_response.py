@@ -0,0 +1,150 @@
+# src/utils/api_response.py
+"""
+Serialize, page and compress API payloads
+
+Trial lists are sent a page at a time behind an opaque cursor, optionally
+projected to the fields a client asks for (`nct_id,title,phase`), encoded
+with orjson when it is installed and compressed with brotli or gzip when the
+client accepts it. A 5,000-trial search is then a few kB per page instead of
+one multi-MB body built by the stdlib encoder.
+"""
+
+import base64
+import gzip
+import json
+from config.settings import (API_PAGE_SIZE, API_MAX_PAGE_SIZE, API_COMPRESS_MIN_BYTES, API_GZIP_LEVEL,
+                             API_BROTLI_QUALITY)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+def dumps(payload):
+    """Compact JSON as UTF-8 bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def negotiate_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header, preferring brotli"""
+    offered = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    def accepts(name):
+        return offered.get(name, offered.get('*', 0)) > 0
+
+    if BROTLI_AVAILABLE and accepts('br'):
+        return 'br'
+    if accepts('gzip'):
+        return 'gzip'
+    return None
+
+def compress(body, encoding):
+    """(body, Content-Encoding or None) - small bodies are left alone"""
+    if encoding is None or len(body) < API_COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == 'br':
+        return brotli.compress(body, quality=API_BROTLI_QUALITY), 'br'
+    return gzip.compress(body, compresslevel=API_GZIP_LEVEL), 'gzip'
+
+def parse_fields(fields):
+    """A `fields` parameter ('a,b.c' or a list) as a list of dotted paths, or None for everything"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return [field.strip() for field in fields if field.strip()] or None
+
+def project(records, fields):
+    """
+    Keep only `fields` of each record
+
+    Dotted paths reach into nested objects ('analysis.therapeutic_area'
+    keeps {'analysis': {'therapeutic_area': ...}}); missing fields are left out.
+    """
+    fields = parse_fields(fields)
+    if fields is None:
+        return records
+
+    paths = [field.split('.') for field in fields]
+    projected = []
+    for record in records:
+        out = {}
+        for path in paths:
+            value = record
+            for key in path:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]
+            else:
+                target = out
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = value
+        projected.append(out)
+    return projected
+
+def encode_cursor(version, offset):
+    raw = json.dumps([version, offset], separators=(',', ':')).encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(version, offset) - raises ValueError for anything that is not a cursor we issued"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, offset = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(version, int) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return version, offset
+
+def paginate(records, version, cursor=None, limit=None, fields=None):
+    """
+    One page of `records` and the cursor for the next
+
+    Args:
+        records: The full result list
+        version: Identifies this result list - a cursor issued for another
+            version (e.g. before a new search replaced the results) is rejected
+        cursor: From a previous page's `next_cursor`; None for the first page
+        limit: Page size (default API_PAGE_SIZE, capped at API_MAX_PAGE_SIZE)
+        fields: Projection, see project()
+
+    Returns:
+        {'items', 'count' (all records), 'next_cursor' (None on the last page)}
+    """
+    offset = 0
+    if cursor:
+        cursor_version, offset = decode_cursor(cursor)
+        if cursor_version != version:
+            raise ValueError("Cursor expired - the results have changed since it was issued")
+
+    try:
+        limit = int(limit) if limit is not None else API_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {limit!r}")
+    limit = max(1, min(limit, API_MAX_PAGE_SIZE))
+
+    end = offset + limit
+    return {
+        'items': project(records[offset:end], fields),
+        'count': len(records),
+        'next_cursor': encode_cursor(version, end) if end < len(records) else None
+    }
\ No newline at end of file
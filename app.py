@@ -1,108 +1,380 @@
-# app.py
-"""Trials Intel - Demo Web Application"""
-
-from flask import Flask, render_template, jsonify, request
-import json
-from pathlib import Path
-from src.scrapers.clinical_trials import ClinicalTrialsScraper
-from src.analyzers.trial_analyzer import TrialAnalyzer
-from src.analyzers.pdf_analyzer import PDFAnalyzer
-from config.settings import USE_MOCK_GEMINI
-
-app = Flask(__name__)
-
-# Initialize components
-scraper = ClinicalTrialsScraper()
-analyzer = TrialAnalyzer(use_mock=USE_MOCK_GEMINI)
-pdf_analyzer = PDFAnalyzer(use_mock=USE_MOCK_GEMINI)
-
-# Cache for demo
-cached_trials = None
-cached_analysis = None
-
-@app.route('/')
-def index():
-    """Main dashboard"""
-    return render_template('index.html')
-
-@app.route('/api/search', methods=['POST'])
-def search_trials():
-    """Search for clinical trials"""
-    global cached_trials
-    
-    data = request.json
-    condition = data.get('condition', 'CAR-T Cell Therapy')
-    max_results = data.get('max_results', 10)
-    
-    print(f"\n🔍 Searching for: {condition}")
-    
-    trials = scraper.search_trials(condition, max_results)
-    cached_trials = trials
-    
-    return jsonify({
-        'success': True,
-        'trials': trials,
-        'count': len(trials)
-    })
-
-@app.route('/api/analyze', methods=['POST'])
-def analyze_trials():
-    """Analyze trials with Gemini"""
-    global cached_trials, cached_analysis
-    
-    if not cached_trials:
-        return jsonify({'success': False, 'error': 'No trials to analyze'})
-    
-    print(f"\n🧠 Analyzing {len(cached_trials)} trials...")
-    
-    # Analyze trials
-    analyzed = analyzer.analyze_batch(cached_trials[:5])  # Limit for demo
-    
-    # Generate comparison
-    summary = analyzer.compare_trials(analyzed)
-    
-    cached_analysis = {
-        'trials': analyzed,
-        'summary': summary
-    }
-    
-    return jsonify({
-        'success': True,
-        'analysis': cached_analysis
-    })
-
-@app.route('/api/vision-demo', methods=['GET'])
-def vision_demo():
-    """Demonstrate PDF vision capabilities"""
-    
-    print("\n👁️ Running vision analysis demo...")
-    
-    # Mock vision analysis (for demo)
-    survival_data = pdf_analyzer.analyze_survival_curve("demo_km_curve.png")
-    ae_data = pdf_analyzer.analyze_adverse_events_table("demo_ae_table.png")
-    
-    return jsonify({
-        'success': True,
-        'survival_analysis': survival_data,
-        'safety_analysis': ae_data
-    })
-
-@app.route('/api/status', methods=['GET'])
-def status():
-    """System status"""
-    return jsonify({
-        'status': 'online',
-        'gemini_mode': 'mock' if USE_MOCK_GEMINI else 'real',
-        'cached_trials': len(cached_trials) if cached_trials else 0,
-        'has_analysis': cached_analysis is not None
-    })
-
-if __name__ == '__main__':
-    print("="*60)
-    print("🚀 TRIALS INTEL - DEMO SERVER")
-    print("="*60)
-    print(f"\nMode: {'MOCK (development)' if USE_MOCK_GEMINI else 'REAL GEMINI'}")
-    print("\n📍 Open: http://localhost:5000")
-    print("\n" + "="*60)
-    
+# app.py
+"""Trials Intel - Demo Web Application"""
+
+from flask import Flask, Response, render_template, request
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from src.utils.api_response import dumps, negotiate_encoding, compress, paginate
+from src.utils.single_flight import SingleFlight
+from src.utils.usage import usage_tracker
+from src.utils.scheduler import scheduler
+from src.utils.gemini_wrapper import model_health
+from src.utils.tracing import traced, start_profiler
+from config.settings import USE_MOCK_GEMINI, DEMO_ANALYZE_TRIALS, VIEW_PRECOMPUTE
+
+app = Flask(__name__)
+
+# Components are built on first use, not on import, so the server (and anything
+# importing this module) starts without loading the scraper, analyzers or model client
+def _build_scraper():
+    from src.scrapers.clinical_trials import ClinicalTrialsScraper
+    return ClinicalTrialsScraper()
+
+def _build_analyzer():
+    from src.analyzers.trial_analyzer import TrialAnalyzer
+    return TrialAnalyzer(use_mock=USE_MOCK_GEMINI)
+
+def _build_pdf_analyzer():
+    from src.analyzers.pdf_analyzer import PDFAnalyzer
+    return PDFAnalyzer(use_mock=USE_MOCK_GEMINI)
+
+_factories = {'scraper': _build_scraper, 'analyzer': _build_analyzer, 'pdf_analyzer': _build_pdf_analyzer}
+_components_lock = threading.Lock()
+
+def component(name):
+    """Shared scraper/analyzer by name, built on first use (assigning app.<name> replaces it)"""
+    if name not in globals():
+        with _components_lock:
+            if name not in globals():
+                globals()[name] = _factories[name]()
+    return globals()[name]
+
+def __getattr__(name):
+    # app.scraper etc. from outside the module
+    if name in _factories:
+        return component(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Cache for demo
+cached_trials = None
+cached_analysis = None
+# Bumped whenever a cached list is replaced, so cursors into the old list are rejected
+result_versions = {'trials': 0, 'analysis': 0}
+# How old each cached list is - live, or from a materialized view - and the view the last search came from
+result_freshness = {'trials': None, 'analysis': None}
+cached_view = None
+# Identical searches/analyses arriving while one is running wait for it instead of repeating it
+flights = SingleFlight('api')
+
+def respond(payload, status=200):
+    """JSON response, brotli/gzip-compressed when the client accepts it"""
+    body, encoding = compress(dumps(payload), negotiate_encoding(request.headers.get('Accept-Encoding')))
+    response = Response(body, status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# Typed columns of each cached list, built on its first filtered request: {key: (trials, columns)}
+cached_columns = {}
+
+def filter_trials(key, trials, params):
+    """(trials passing the request's filters, parsed filters) - filters as in src/utils/trial_columns.py"""
+    from src.utils.trial_columns import COLUMNS_AVAILABLE, parse_filters, matches
+    filters = parse_filters(params)
+    if not filters:
+        return trials, filters
+    if not COLUMNS_AVAILABLE:
+        return [trial for trial in trials if matches(trial, filters)], filters
+    return [trials[i] for i in columns_for(key, trials).indexes(filters)], filters
+
+def columns_for(key, trials):
+    """TrialColumns of a cached list, rebuilt when the list is replaced"""
+    from src.utils.trial_columns import TrialColumns
+    cached = cached_columns.get(key)
+    if cached is None or cached[0] is not trials:
+        cached = cached_columns[key] = (trials, TrialColumns(trials))
+    return cached[1]
+
+def trial_page(key, trials, params):
+    """A page of a cached trial list per the request's filters, `cursor`, `limit` and `fields`"""
+    trials, filters = filter_trials(key, trials, params)
+    version = result_versions[key]
+    if filters:  # A cursor only continues the list it was issued for
+        version = version << 32 | zlib.crc32(repr(sorted(filters.items())).encode())
+    return paginate(trials, version, cursor=params.get('cursor'),
+                    limit=params.get('limit'), fields=params.get('fields'))
+
+def materialized_view(condition):
+    """Precomputed view of `condition` recent enough to serve (src/utils/materialized_views.py), or None"""
+    from src.utils.materialized_views import view_store
+    return view_store.get(condition)
+
+def start_precompute():
+    """Keep the materialized views fresh from a background thread of this process"""
+    from src.utils.materialized_views import Precomputer, view_store
+    from src.analyzers.trial_analyzer import TrialAnalyzer
+    analyzer = TrialAnalyzer(use_mock=USE_MOCK_GEMINI, priority='batch')  # Queues behind dashboard requests
+    return Precomputer(view_store, component('scraper'), analyzer).start()
+
+@app.route('/')
+def index():
+    """Main dashboard"""
+    return render_template('index.html')
+
+@app.route('/api/search', methods=['POST'])
+@traced('api.search', category='flask')
+def search_trials():
+    """Search for clinical trials - returns the first page; fetch the rest from /api/trials"""
+    global cached_trials, cached_view
+    from src.utils.materialized_views import view_store, live_freshness
+    
+    data = request.json
+    condition = data.get('condition', 'CAR-T Cell Therapy')
+    max_results = data.get('max_results', 10)
+    
+    print(f"\n🔍 Searching for: {condition}")
+    
+    view = materialized_view(condition)
+    trials = view.search(max_results) if view else None
+    view_store.record_request(condition, served=trials is not None)
+    if trials is not None:
+        freshness = view.freshness()
+    else:
+        view = None
+        trials, _ = flights.do(('search', condition, max_results),
+                               lambda: component('scraper').search_trials(condition, max_results))
+        freshness = live_freshness()
+    if trials is not cached_trials:  # Coalesced requests share one list - keep its cursors valid
+        cached_trials = trials
+        result_versions['trials'] += 1
+    cached_view = view
+    result_freshness['trials'] = freshness
+    
+    try:
+        page = trial_page('trials', trials, {'limit': data.get('limit'), 'fields': data.get('fields')})
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    return respond({
+        'success': True,
+        'trials': page['items'],
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'freshness': freshness
+    })
+
+@app.route('/api/trials', methods=['GET'])
+@traced('api.trials', category='flask')
+def list_trials():
+    """
+    Page through the last search: ?cursor=...&limit=...&fields=nct_id,title,phase
+
+    Filters: min_enrollment, max_enrollment, start_from, start_to, completion_from,
+    completion_to (YYYY[-MM[-DD]]), phase and status (comma-separated)
+    """
+    try:
+        page = trial_page('trials', cached_trials or [], request.args)
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    return respond({
+        'success': True,
+        'trials': page['items'],
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'freshness': result_freshness['trials']
+    })
+
+@app.route('/api/trials/summary', methods=['GET'])
+@traced('api.trials_summary', category='flask')
+def summarize_trials():
+    """Counts by status, phase and start year and enrollment stats of the last search (same filters as /api/trials)"""
+    from src.utils.trial_columns import COLUMNS_AVAILABLE, parse_filters, summarize
+    trials = cached_trials or []
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    if COLUMNS_AVAILABLE:
+        columns = columns_for('trials', trials)
+        summary = columns.summarize(columns.mask(filters) if filters else None)
+    else:
+        summary = summarize(filter_trials('trials', trials, request.args)[0])
+    return respond({'success': True, 'summary': summary})
+
+@app.route('/api/analyze', methods=['POST'])
+@traced('api.analyze', category='flask')
+def analyze_trials():
+    """Analyze trials with Gemini"""
+    global cached_trials, cached_analysis
+    from src.utils.materialized_views import live_freshness
+    
+    if not cached_trials:
+        return respond({'success': False, 'error': 'No trials to analyze'})
+    
+    print(f"\n🧠 Analyzing {len(cached_trials)} trials...")
+    
+    trials = cached_trials[:DEMO_ANALYZE_TRIALS]  # Limit for demo
+    
+    def analyze():
+        analyzer = component('analyzer')
+        analyzed = analyzer.analyze_batch(trials)
+        # Generate comparison
+        return {'trials': analyzed, 'summary': analyzer.compare_trials(analyzed)}
+    
+    view = cached_view
+    analysis = view.analysis(trials) if view else None
+    if analysis is not None:
+        freshness = view.freshness()
+    else:
+        analysis, _ = flights.do(('analyze', tuple(trial['nct_id'] for trial in trials)), analyze)
+        freshness = live_freshness()
+    if analysis is not cached_analysis:
+        cached_analysis = analysis
+        result_versions['analysis'] += 1
+    result_freshness['analysis'] = freshness
+    analyzed, summary = analysis['trials'], analysis['summary']
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        page = trial_page('analysis', analyzed, {'limit': data.get('limit'), 'fields': data.get('fields')})
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    return respond({
+        'success': True,
+        'analysis': {'trials': page['items'], 'summary': summary},
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'freshness': freshness
+    })
+
+@app.route('/api/analysis/trials', methods=['GET'])
+@traced('api.analysis_trials', category='flask')
+def list_analyzed_trials():
+    """Page through the last analysis's trials (same parameters as /api/trials)"""
+    trials = cached_analysis['trials'] if cached_analysis else []
+    try:
+        page = trial_page('analysis', trials, request.args)
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    return respond({
+        'success': True,
+        'trials': page['items'],
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'freshness': result_freshness['analysis']
+    })
+
+def corpus_snapshot():
+    """The pipeline's last published corpus (src/utils/corpus_snapshot.py), mapped read-only, or None"""
+    from src.utils.corpus_snapshot import corpus_store
+    return corpus_store.current()
+
+NO_CORPUS = {'success': False, 'error': 'No corpus snapshot published'}
+
+@app.route('/api/corpus/trials', methods=['GET'])
+@traced('api.corpus_trials', category='flask')
+def list_corpus_trials():
+    """Page through the published corpus (same parameters and filters as /api/trials)"""
+    from src.utils.trial_columns import parse_filters
+    snapshot = corpus_snapshot()  # One snapshot for the whole request, even if a new one is published
+    if snapshot is None:
+        return respond(NO_CORPUS, 404)
+    try:
+        filters = parse_filters(request.args)
+        version = snapshot.version << 32 | zlib.crc32(repr(sorted(filters.items())).encode())
+        page = paginate(snapshot.trials(snapshot.rows(filters), fields=request.args.get('fields')), version,
+                        cursor=request.args.get('cursor'), limit=request.args.get('limit'),
+                        fields=request.args.get('fields'))
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    
+    return respond({
+        'success': True,
+        'trials': page['items'],
+        'count': page['count'],
+        'next_cursor': page['next_cursor'],
+        'snapshot': snapshot.created
+    })
+
+@app.route('/api/corpus/trials/<nct_id>', methods=['GET'])
+@traced('api.corpus_trial', category='flask')
+def get_corpus_trial(nct_id):
+    """One trial of the published corpus, with its analysis"""
+    snapshot = corpus_snapshot()
+    if snapshot is None:
+        return respond(NO_CORPUS, 404)
+    trial = snapshot.trial(nct_id)
+    if trial is None:
+        return respond({'success': False, 'error': f"{nct_id} is not in the corpus"}, 404)
+    return respond({'success': True, 'trial': trial, 'snapshot': snapshot.created})
+
+@app.route('/api/corpus/summary', methods=['GET'])
+@traced('api.corpus_summary', category='flask')
+def summarize_corpus():
+    """Counts and enrollment stats of the published corpus (same filters as /api/trials)"""
+    from src.utils.trial_columns import parse_filters
+    snapshot = corpus_snapshot()
+    if snapshot is None:
+        return respond(NO_CORPUS, 404)
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return respond({'success': False, 'error': str(e)}, 400)
+    return respond({'success': True, 'summary': snapshot.summarize(filters), 'snapshot': snapshot.created})
+
+@app.route('/api/vision-demo', methods=['GET'])
+@traced('api.vision_demo', category='flask')
+def vision_demo():
+    """Demonstrate PDF vision capabilities"""
+    
+    print("\n👁️ Running vision analysis demo...")
+    
+    # Mock vision analysis (for demo)
+    pdf_analyzer = component('pdf_analyzer')
+    survival_data = pdf_analyzer.analyze_survival_curve("demo_km_curve.png")
+    ae_data = pdf_analyzer.analyze_adverse_events_table("demo_ae_table.png")
+    
+    return respond({
+        'success': True,
+        'survival_analysis': survival_data,
+        'safety_analysis': ae_data
+    })
+
+def corpus_status():
+    from src.utils.corpus_snapshot import corpus_store
+    corpus_store.current()
+    return corpus_store.report()
+
+def views_status():
+    from src.utils.materialized_views import view_store
+    return view_store.report()
+
+@app.route('/api/status', methods=['GET'])
+@traced('api.status', category='flask')
+def status():
+    """System status"""
+    return respond({
+        'status': 'online',
+        'gemini_mode': 'mock' if USE_MOCK_GEMINI else 'real',
+        'cached_trials': len(cached_trials) if cached_trials else 0,
+        'has_analysis': cached_analysis is not None,
+        'coalescing': flights.report(),
+        'scheduler': scheduler.report(),
+        'models': model_health(),
+        'corpus': corpus_status(),
+        'views': views_status(),
+        'usage': usage_tracker.report()
+    })
+
+if __name__ == '__main__':
+    start_profiler()
+    # With the reloader, this module also runs in the file-watching parent - refresh only in the server process
+    if VIEW_PRECOMPUTE and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_precompute()
+    
+    print("="*60)
+    print("🚀 TRIALS INTEL - DEMO SERVER")
+    print("="*60)
+    print(f"\nMode: {'MOCK (development)' if USE_MOCK_GEMINI else 'REAL GEMINI'}")
+    print("\n📍 Open: http://localhost:5000")
+    print("\n" + "="*60)
+    
     app.run(debug=True, port=5000)
\ No newline at end of file
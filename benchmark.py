@@ -0,0 +1,851 @@
+# benchmark.py
+"""
+Pipeline benchmarks with regression tracking
+
+Runs against the recorded ClinicalTrials.gov fixtures in benchmarks/fixtures
+and the mock model (with simulated latency), writes machine-readable results
+to benchmarks/results/latest.json and compares them with benchmarks/baseline.json.
+
+    python benchmark.py                    # run all, compare with baseline
+    python benchmark.py --only analyze     # run benchmarks whose name contains 'analyze'
+    python benchmark.py --update-baseline  # store this run as the new baseline
+    python benchmark.py --record           # re-record fixtures from the live API
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.scrapers.clinical_trials import ClinicalTrialsScraper
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.gemini_wrapper import get_gemini_model, MockSimulation
+from src.utils.usage import usage_tracker, estimate_tokens
+from src.utils.image_prep import prepare_image
+from src.utils.pdf_pipeline import PDF_AVAILABLE, iter_document_pages
+from config.settings import GEMINI_MODEL, DEMO_DISEASE_AREAS
+
+BENCH_DIR = Path("benchmarks")
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+RESULTS_PATH = BENCH_DIR / "results" / "latest.json"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+# Latency changes smaller than this are timer noise, whatever the relative change
+NOISE_FLOOR_MS = 2.0
+
+# Realistic Gemini latency, compressed 50x so the suite runs in seconds
+SIMULATED_LATENCY = dict(latency_ms=900, distribution='lognormal', spread=0.35,
+                         ms_per_output_token=4, time_scale=0.02)
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the pipeline's progress prints and tqdm bars while timing"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+def fixture_path(condition):
+    return FIXTURES_DIR / f"ctgov_{condition.lower().replace('-', '_').replace(' ', '_')}.json"
+
+def load_studies(condition=DEMO_DISEASE_AREAS[0]):
+    with open(fixture_path(condition)) as f:
+        return json.load(f)['studies']
+
+def replicate_studies(studies, count):
+    """Repeat fixture studies up to `count`, giving each copy a unique NCT ID"""
+    out = []
+    for i in range(count):
+        study = json.loads(json.dumps(studies[i % len(studies)]))
+        study['protocolSection']['identificationModule']['nctId'] = f"NCT{90000000 + i:08d}"
+        out.append(study)
+    return out
+
+class FixtureScraper(ClinicalTrialsScraper):
+    """Scraper that serves recorded API responses instead of calling ClinicalTrials.gov"""
+
+    def search_trials(self, condition, max_results=20):
+        path = fixture_path(condition)
+        studies = load_studies(condition) if path.exists() else load_studies()
+        return self._parse_studies(studies[:max_results])
+
+def mock_analyzer(seed=42):
+    """TrialAnalyzer on a mock model with seeded, realistic latency"""
+    with quiet():
+        analyzer = TrialAnalyzer(use_mock=True)
+        analyzer.model = get_gemini_model(GEMINI_MODEL, use_mock=True,
+                                          simulation=MockSimulation(seed=seed, **SIMULATED_LATENCY))
+    return analyzer
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def metric(value, unit, higher_is_better):
+    return {'value': round(value, 4), 'unit': unit, 'higher_is_better': higher_is_better}
+
+# ---------------------------------------------------------------- benchmarks
+
+def bench_parse_studies():
+    """_parse_studies throughput on 20,000 recorded studies"""
+    studies = replicate_studies(load_studies(), 20000)
+    scraper = ClinicalTrialsScraper()
+
+    # CPU-bound, so CPU time is steadier than wall time on a shared machine
+    timings = []
+    for _ in range(5):
+        with quiet():
+            start = time.process_time()
+            scraper._parse_studies(studies)
+            timings.append(time.process_time() - start)
+
+    return {'parse_studies.throughput': metric(len(studies) / min(timings), 'studies/s', True)}
+
+def bench_trial_columns():
+    """Memory and filter/summary time on 50,000 trials: typed columns vs per-record checks on the dicts"""
+    import tracemalloc
+    from src.utils.trial_columns import TrialColumns, parse_filters, matches, summarize
+
+    with quiet():
+        trials = ClinicalTrialsScraper()._parse_studies(replicate_studies(load_studies(), 50000))
+    encoded = json.dumps(trials)
+    query_fields = ['enrollment', 'start_date', 'completion_date', 'phase', 'phases', 'status']
+
+    def retained(build):
+        """Bytes still allocated by what build() returns"""
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return size
+
+    dict_bytes = retained(lambda: json.loads(encoded))  # As read back from data/raw
+    field_bytes = retained(lambda: [{field: trial[field] for field in query_fields} for trial in json.loads(encoded)])
+    start = time.perf_counter()
+    columns = TrialColumns(trials)
+    build_seconds = time.perf_counter() - start
+
+    filters = parse_filters({'min_enrollment': '50', 'max_enrollment': '500', 'start_from': '2020-06',
+                             'phase': 'PHASE2,PHASE3'})
+
+    def best(run):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    return {
+        'trial_columns.dicts.bytes_per_trial': metric(dict_bytes / len(trials), 'bytes', False),
+        'trial_columns.dicts.query_fields_bytes_per_trial': metric(field_bytes / len(trials), 'bytes', False),
+        'trial_columns.columns.bytes_per_trial': metric(columns.nbytes / len(trials), 'bytes', False),
+        'trial_columns.columns.build': metric(build_seconds * 1000, 'ms', False),
+        'trial_columns.dicts.filter': metric(best(lambda: [t for t in trials if matches(t, filters)]), 'ms', False),
+        'trial_columns.columns.filter': metric(best(lambda: columns.indexes(filters)), 'ms', False),
+        'trial_columns.dicts.summary': metric(best(lambda: summarize(trials)), 'ms', False),
+        'trial_columns.columns.summary': metric(best(lambda: columns.summarize()), 'ms', False)
+    }
+
+def bench_corpus_snapshot():
+    """Worker startup and per-worker heap on a 50,000-trial corpus: memory-mapped snapshot vs loading the JSON"""
+    import tracemalloc
+    from src.utils.corpus_snapshot import CorpusSnapshot, write_snapshot
+    from src.utils.trial_columns import parse_filters, matches
+
+    with quiet():
+        trials = ClinicalTrialsScraper()._parse_studies(replicate_studies(load_studies(), 50000))
+    directory = tempfile.mkdtemp()
+    json_path, snapshot_path = os.path.join(directory, 'corpus.json'), os.path.join(directory, 'corpus.snap')
+    with open(json_path, 'w') as f:
+        json.dump({'trials': trials}, f)
+    start = time.perf_counter()
+    write_snapshot(snapshot_path, trials)
+    write_seconds = time.perf_counter() - start
+    filters = parse_filters({'min_enrollment': '50', 'start_from': '2020-06', 'phase': 'PHASE2,PHASE3'})
+
+    def worker(load):
+        """(startup seconds, heap bytes kept) of a worker that loads the corpus and serves one filtered page"""
+        tracemalloc.start()
+        start = time.perf_counter()
+        corpus = load()
+        elapsed = time.perf_counter() - start
+        corpus[1](filters)
+        kept = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return elapsed, kept
+
+    def load_json():
+        with open(json_path) as f:
+            loaded = json.load(f)['trials']
+        return loaded, lambda filters: [t for t in loaded if matches(t, filters)][:100]
+
+    def load_snapshot():
+        snapshot = CorpusSnapshot(snapshot_path)
+        return snapshot, lambda filters: snapshot.trials(snapshot.rows(filters), fields='nct_id,title')[:100]
+
+    json_seconds, json_bytes = worker(load_json)
+    snapshot_seconds, snapshot_bytes = min(worker(load_snapshot) for _ in range(5))
+    snapshot = CorpusSnapshot(snapshot_path)
+    nct_ids = [trials[i]['nct_id'] for i in range(0, len(trials), 97)]
+    start = time.perf_counter()
+    for nct_id in nct_ids:
+        snapshot.trial(nct_id)
+    lookup_seconds = (time.perf_counter() - start) / len(nct_ids)
+    rows = snapshot.rows(filters)
+    start = time.perf_counter()
+    for _ in range(20):
+        snapshot.trials(rows, fields='nct_id,title,phase')[:100]
+    page_seconds = (time.perf_counter() - start) / 20
+
+    return {
+        'corpus_snapshot.write': metric(write_seconds * 1000, 'ms', False),
+        'corpus_snapshot.file_bytes_per_trial': metric(os.path.getsize(snapshot_path) / len(trials), 'bytes', False),
+        'corpus_snapshot.json.startup': metric(json_seconds * 1000, 'ms', False),
+        'corpus_snapshot.mmap.startup': metric(snapshot_seconds * 1000, 'ms', False),
+        'corpus_snapshot.json.worker_heap': metric(json_bytes / 2 ** 20, 'MiB', False),
+        'corpus_snapshot.mmap.worker_heap': metric(snapshot_bytes / 2 ** 20, 'MiB', False),
+        'corpus_snapshot.mmap.lookup': metric(lookup_seconds * 1e6, 'us', False),
+        'corpus_snapshot.mmap.page': metric(page_seconds * 1000, 'ms', False)
+    }
+
+def bench_analyze_batch():
+    """analyze_batch throughput at increasing concurrency (simulated latency)"""
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=48)
+
+    results = {}
+    for workers in [1, 4, 8, 16]:
+        analyzer = mock_analyzer()
+        with quiet():
+            start = time.perf_counter()
+            analyzer.analyze_batch(trials, max_workers=workers)
+            elapsed = time.perf_counter() - start
+        results[f'analyze_batch.c{workers}.throughput'] = metric(len(trials) / elapsed, 'trials/s', True)
+
+    return results
+
+def bench_local_classifier():
+    """Model calls and prompt tokens for 48 trials, with and without rule-based pre-classification"""
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=48)
+
+    results = {}
+    for label, enabled in [('off', False), ('on', True)]:
+        analyzer = mock_analyzer()
+        analyzer.local_classifier = enabled
+        usage_tracker.reset()
+        with quiet():
+            analyzer.analyze_batch(trials, max_workers=8)
+        totals = usage_tracker.report()['totals']
+        results[f'local_classifier.{label}.model_calls'] = metric(totals['calls'], 'calls', False)
+        results[f'local_classifier.{label}.prompt_tokens'] = metric(totals['prompt_tokens'], 'tokens', False)
+
+    return results
+
+def bench_scheduler():
+    """Interactive classify_trial latency while a 96-trial batch run holds the quota (4 slots)"""
+    from concurrent.futures import ThreadPoolExecutor
+    import src.utils.gemini_wrapper as gemini_wrapper
+    from src.utils.scheduler import QuotaScheduler
+
+    class FifoScheduler(QuotaScheduler):
+        """One queue for everything - the behaviour without priority classes"""
+        def slot(self, priority=None, cost=1.0):
+            return super().slot(None, cost)
+
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=48) * 2
+    classes = {'interactive': {'weight': 8, 'max_concurrency': 4}, 'batch': {'weight': 1, 'max_concurrency': 4}}
+
+    results = {}
+    shared = gemini_wrapper.scheduler
+    try:
+        for label, scheduler_class in [('fifo', FifoScheduler), ('priority', QuotaScheduler)]:
+            gemini_wrapper.scheduler = scheduler_class(max_concurrency=4, classes=classes)
+            batch = mock_analyzer()
+            batch.priority, batch.local_classifier = 'batch', False
+            interactive = mock_analyzer(seed=7)
+            interactive.local_classifier = False
+
+            def timed(trial):
+                start = time.perf_counter()
+                interactive.classify_trial(trial)
+                return time.perf_counter() - start
+
+            with quiet(), ThreadPoolExecutor(max_workers=8) as users:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=1) as nightly:
+                    run = nightly.submit(batch.analyze_batch, trials, 16)
+                    time.sleep(0.1)  # Batch queue backed up
+                    latencies = list(users.map(timed, trials[:8]))
+                    run.result()
+                batch_seconds = time.perf_counter() - start
+            results[f'scheduler.{label}.interactive_p95'] = metric(percentile(latencies, 95) * 1000, 'ms', False)
+            results[f'scheduler.{label}.batch_duration'] = metric(batch_seconds * 1000, 'ms', False)
+    finally:
+        gemini_wrapper.scheduler = shared
+
+    return results
+
+def bench_hedging():
+    """classify_trial p50/p99 with 2% stragglers (10x latency), hedging off vs on; fail-fast time when the model is down"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.utils.gemini_wrapper import CircuitBreaker
+
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=50) * 12
+
+    results = {}
+    for label, hedge in [('off', False), ('on', True)]:
+        analyzer = mock_analyzer()
+        analyzer.local_classifier = False
+        analyzer.model.model.simulation.stall_rate, analyzer.model.model.simulation.stall_ms = 0.02, 9000
+        analyzer.model.hedge = hedge
+
+        def timed(trial):
+            start = time.perf_counter()
+            analyzer.classify_trial(trial)
+            return time.perf_counter() - start
+
+        usage_tracker.reset()
+        with quiet(), ThreadPoolExecutor(max_workers=16) as executor:
+            latencies = list(executor.map(timed, trials))
+        site = usage_tracker.report()['by_call_site']['classify_trial']
+        results[f'hedging.{label}.p50'] = metric(percentile(latencies, 50) * 1000, 'ms', False)
+        results[f'hedging.{label}.p99'] = metric(percentile(latencies, 99) * 1000, 'ms', False)
+        results[f'hedging.{label}.extra_requests'] = metric(site['hedges'] / site['calls'], 'ratio', False)
+
+    # Backend down: the first calls time out on errors, the rest are refused without a request
+    analyzer = mock_analyzer()
+    analyzer.model.model.simulation.error_rate = 1.0
+    analyzer.model.breaker = CircuitBreaker(failure_threshold=5, reset_seconds=60)
+    with quiet():
+        start = time.perf_counter()
+        for trial in trials[:100]:
+            analyzer.classify_trial(trial)
+        results['hedging.circuit_open.per_trial'] = metric((time.perf_counter() - start) * 1000 / 100, 'ms', False)
+    return results
+
+def bench_work_queue():
+    """Queue-fed reclassification of 1,200 trials with 1, 2 and 4 worker processes (2 model calls in flight each)"""
+    from src.utils.work_queue import WorkQueue
+
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=50)
+    trials = [{**trials[i % len(trials)], 'nct_id': f"NCT{90000000 + i:08d}"} for i in range(1200)]
+    simulation = {'MOCK_LATENCY_MS': str(SIMULATED_LATENCY['latency_ms']),
+                  'MOCK_LATENCY_DISTRIBUTION': SIMULATED_LATENCY['distribution'],
+                  'MOCK_LATENCY_SPREAD': str(SIMULATED_LATENCY['spread']),
+                  'MOCK_MS_PER_OUTPUT_TOKEN': str(SIMULATED_LATENCY['ms_per_output_token']),
+                  'MOCK_TIME_SCALE': str(SIMULATED_LATENCY['time_scale'])}
+
+    results = {}
+    for processes in [1, 2, 4]:
+        path = os.path.join(tempfile.mkdtemp(), 'queue.sqlite')
+        queue = WorkQueue(path)
+        queue.enqueue('bench', trials)
+        subprocess.run([sys.executable, 'reclassify.py', 'work', 'bench', '--processes', str(processes),
+                        '--concurrency', '2'], capture_output=True, check=True,
+                       env={**os.environ, **simulation, 'PYTHONPATH': os.getcwd(), 'WORK_QUEUE_PATH': path,
+                            'USE_MOCK_GEMINI': 'true', 'LOCAL_CLASSIFIER_ENABLED': 'false'})
+        progress = queue.progress('bench')
+        if progress['done'] != len(trials):
+            raise RuntimeError(f"Work queue run incomplete: {progress}")
+        results[f'work_queue.p{processes}.throughput'] = metric(progress['per_second'], 'trials/s', True)
+    return results
+
+def bench_compare_trials():
+    """compare_trials latency and prompt size as the corpus grows"""
+    with quiet():
+        trials = FixtureScraper().search_trials(DEMO_DISEASE_AREAS[0], max_results=50)
+        analyzed = TrialAnalyzer(use_mock=True).analyze_batch(trials)
+
+    results = {}
+    for size in [10, 100, 1000, 5000]:
+        corpus = [analyzed[i % len(analyzed)] for i in range(size)]
+        timings = []
+        for _ in range(3):
+            analyzer = mock_analyzer()
+            usage_tracker.reset()
+            with quiet():
+                start = time.perf_counter()
+                analyzer.compare_trials(corpus)
+                timings.append(time.perf_counter() - start)
+        prompt_tokens = usage_tracker.report()['by_call_site']['compare_trials']['prompt_tokens']
+        results[f'compare_trials.n{size}.latency'] = metric(min(timings) * 1000, 'ms', False)
+        results[f'compare_trials.n{size}.prompt_tokens'] = metric(prompt_tokens, 'tokens', False)
+
+    return results
+
+def bench_flask_endpoints():
+    """Flask endpoint latency (p50/p95) via the test client"""
+    with quiet():
+        import app as app_module
+    app_module.scraper = FixtureScraper()
+    app_module.analyzer = mock_analyzer()
+    client = app_module.app.test_client()
+
+    requests_by_endpoint = {
+        'search': lambda: client.post('/api/search', json={'condition': DEMO_DISEASE_AREAS[0], 'max_results': 50}),
+        'analyze': lambda: client.post('/api/analyze'),
+        'status': lambda: client.get('/api/status')
+    }
+
+    results = {}
+    for name, send in requests_by_endpoint.items():
+        latencies = []
+        for _ in range(50):
+            with quiet():
+                start = time.perf_counter()
+                response = send()
+                latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, f"/api/{name} returned {response.status_code}"
+        results[f'flask.{name}.p50'] = metric(statistics.median(latencies), 'ms', False)
+        results[f'flask.{name}.p95'] = metric(percentile(latencies, 95), 'ms', False)
+
+    return results
+
+def bench_dashboard_views():
+    """Dashboard load (search + analyze) p50/p95 computed live vs served from a precomputed view"""
+    from src.utils import materialized_views
+    from src.utils.materialized_views import ViewStore, Precomputer
+    with quiet():
+        import app as app_module
+    app_module.scraper = FixtureScraper()
+    app_module.analyzer = mock_analyzer()
+    client = app_module.app.test_client()
+    default_store = materialized_views.view_store
+    store = materialized_views.view_store = ViewStore(os.path.join(tempfile.mkdtemp(), 'views.sqlite'))
+
+    def load():
+        with quiet():
+            start = time.perf_counter()
+            search = client.post('/api/search', json={'condition': DEMO_DISEASE_AREAS[0], 'max_results': 50})
+            analyze = client.post('/api/analyze')
+            elapsed = (time.perf_counter() - start) * 1000
+        assert search.status_code == analyze.status_code == 200
+        return elapsed, analyze.get_json()['freshness']['source']
+
+    try:
+        live = [load() for _ in range(20)]
+        with quiet():
+            precomputer = Precomputer(store, FixtureScraper(), mock_analyzer(seed=7), conditions=DEMO_DISEASE_AREAS)
+            start = time.perf_counter()
+            precomputer.run_once()
+            precompute_seconds = time.perf_counter() - start
+        served = [load() for _ in range(50)]
+    finally:
+        materialized_views.view_store = default_store
+    assert {source for _, source in live} == {'live'} and {source for _, source in served} == {'materialized'}
+
+    live_ms, served_ms = [ms for ms, _ in live], [ms for ms, _ in served]
+    return {
+        'dashboard_views.live.p50': metric(statistics.median(live_ms), 'ms', False),
+        'dashboard_views.live.p95': metric(percentile(live_ms, 95), 'ms', False),
+        'dashboard_views.materialized.p50': metric(statistics.median(served_ms), 'ms', False),
+        'dashboard_views.materialized.p95': metric(percentile(served_ms, 95), 'ms', False),
+        'dashboard_views.precompute_per_condition': metric(precompute_seconds * 1000 / len(DEMO_DISEASE_AREAS),
+                                                           'ms', False)
+    }
+
+def bench_coalescing():
+    """Model calls and wall time for 8 concurrent identical /api/analyze requests (morning-peak dashboard load)"""
+    from concurrent.futures import ThreadPoolExecutor
+    with quiet():
+        import app as app_module
+    app_module.scraper = FixtureScraper()
+    app_module.analyzer = mock_analyzer()
+    with quiet():
+        app_module.app.test_client().post('/api/search', json={'condition': DEMO_DISEASE_AREAS[0], 'max_results': 5})
+
+    usage_tracker.reset()
+    with quiet(), ThreadPoolExecutor(max_workers=8) as executor:
+        start = time.perf_counter()
+        responses = list(executor.map(lambda _: app_module.app.test_client().post('/api/analyze'), range(8)))
+        elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+
+    return {
+        'coalescing.analyze.model_calls': metric(usage_tracker.report()['totals']['calls'], 'calls', False),
+        'coalescing.analyze.latency': metric(elapsed * 1000, 'ms', False)
+    }
+
+def bench_change_detection():
+    """Daily monitoring pass over 50,000 trials with 50 changed: detection time and model calls"""
+    from src.utils.change_detection import ChangeDetector
+
+    with quiet():
+        trials = ClinicalTrialsScraper()._parse_studies(replicate_studies(load_studies(), 50000))
+    analysis = {'therapeutic_area': 'Oncology', 'key_insights': []}
+    detector = ChangeDetector(path=None, events_path=None)
+    detector.record([{**trial, 'analysis': analysis} for trial in trials])
+
+    for trial in trials[::1000]:
+        trial['status'] = 'COMPLETED'
+
+    timings = []
+    for _ in range(3):
+        start = time.process_time()
+        events = detector.detect(trials)
+        timings.append(time.process_time() - start)
+    assert len(events) == 50
+
+    usage_tracker.reset()
+    with quiet():
+        detector.refresh(trials, mock_analyzer())
+
+    return {
+        'change_detection.detect_50k': metric(min(timings) * 1000, 'ms', False),
+        'change_detection.daily.model_calls': metric(usage_tracker.report()['totals']['calls'], 'calls', False)
+    }
+
+def bench_trial_history():
+    """History store over 30 daily runs of 5,000 trials (1% changing per run): size, record and as_of time"""
+    import random
+    from datetime import datetime, timedelta
+    from src.utils.trial_history import TrialHistory
+
+    with quiet():
+        trials = ClinicalTrialsScraper()._parse_studies(replicate_studies(load_studies(), 5000))
+    history = TrialHistory(os.path.join(tempfile.mkdtemp(), 'history.jsonl'))
+    rng = random.Random(3)
+    start = datetime(2026, 1, 1)
+
+    record_times = []
+    for day in range(30):
+        for trial in rng.sample(trials, 50):
+            trial['enrollment'] = rng.randint(10, 1000)
+        begin = time.perf_counter()
+        history.record(trials, when=start + timedelta(days=day))
+        record_times.append(time.perf_counter() - begin)
+
+    lookups = []
+    for _ in range(1000):
+        nct_id = rng.choice(trials)['nct_id']
+        when = start + timedelta(days=rng.uniform(0, 30))
+        begin = time.perf_counter()
+        history.as_of(nct_id, when)
+        lookups.append(time.perf_counter() - begin)
+
+    full_copies = len(json.dumps(trials, separators=(',', ':'))) * 30
+    return {
+        'trial_history.storage_vs_full': metric(os.path.getsize(history.path) / full_copies, 'ratio', False),
+        'trial_history.record_run': metric(statistics.median(record_times[1:]) * 1000, 'ms', False),
+        'trial_history.as_of': metric(statistics.median(lookups) * 1000, 'ms', False)
+    }
+
+def bench_pdf_pages():
+    """PDF page pipeline throughput by worker processes"""
+    if not PDF_AVAILABLE:
+        print("   ⚠️ PyMuPDF not installed - skipped")
+        return {}
+
+    from benchmarks.synthetic import make_trial_pdf
+    workdir = tempfile.mkdtemp()
+    paths = [make_trial_pdf(os.path.join(workdir, f"doc_{i}.pdf"), text_pages=10, scanned_pages=1, seed=i)
+             for i in range(12)]
+
+    results = {}
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        pages = sum(1 for _ in iter_document_pages(paths, workers=workers))
+        elapsed = time.perf_counter() - start
+        results[f'pdf_pages.w{workers}.throughput'] = metric(pages / elapsed, 'pages/s', True)
+
+    return results
+
+def bench_vision_payload():
+    """Bytes, image tokens and latency per survival-curve request, raw vs preprocessed"""
+    from PIL import Image
+    from benchmarks.synthetic import km_curve_image
+
+    workdir = tempfile.mkdtemp()
+    paths = []
+    for seed in range(6):
+        path = os.path.join(workdir, f"km_{seed}.png")
+        km_curve_image(seed).save(path)
+        paths.append(path)
+
+    results = {}
+    for label, prepare in [('raw', False), ('prepared', True)]:
+        if prepare:
+            parts = [prepare_image(path, 'survival_curve') for path in paths]
+            sizes = [len(part['data']) for part in parts]
+        else:
+            parts = [Image.open(path) for path in paths]
+            sizes = [os.path.getsize(path) for path in paths]
+
+        # Not time-compressed: preprocessing runs in real time, so the simulated
+        # prefill and upload it saves must be too. Same seed, same latency draws.
+        with quiet():
+            analyzer = PDFAnalyzer(use_mock=True, prepare_images=prepare)
+            analyzer.model = get_gemini_model(GEMINI_MODEL, use_mock=True, simulation=MockSimulation(
+                latency_ms=400, ms_per_input_token=0.15, upload_mbps=8, seed=7))
+        analyzer.use_mock = False  # Run the real vision path against the mock model
+
+        latencies = []
+        for path in paths:
+            with quiet():
+                start = time.perf_counter()
+                analyzer.analyze_survival_curve(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        results[f'vision_payload.{label}.bytes'] = metric(statistics.mean(sizes), 'bytes', False)
+        results[f'vision_payload.{label}.image_tokens'] = metric(
+            statistics.mean(estimate_tokens(part) for part in parts), 'tokens', False)
+        results[f'vision_payload.{label}.latency'] = metric(statistics.mean(latencies), 'ms', False)
+
+    return results
+
+def bench_vision_batch():
+    """Vision requests, prompt tokens and wall time per 4-figure document, one request per figure vs batched"""
+    if not PDF_AVAILABLE:
+        print("   ⚠️ PyMuPDF not installed - skipped")
+        return {}
+
+    from benchmarks.synthetic import make_trial_pdf
+    workdir = tempfile.mkdtemp()
+    paths = [make_trial_pdf(os.path.join(workdir, f"doc_{i}.pdf"), text_pages=2, figure_pages=4, seed=i)
+             for i in range(6)]
+    sites = ('analyze_survival_curve', 'analyze_figures_batch')
+
+    results = {}
+    for batch_size in (1, 4):
+        with quiet():
+            analyzer = PDFAnalyzer(use_mock=True, digitize_curves=False, batch_size=batch_size)
+            analyzer.model = get_gemini_model(GEMINI_MODEL, use_mock=True, simulation=MockSimulation(
+                **SIMULATED_LATENCY, ms_per_input_token=0.15, seed=7))
+        analyzer.use_mock = False  # Real vision path, curves always sent to the model
+
+        usage_tracker.reset()
+        with quiet():
+            start = time.perf_counter()
+            analyzer.extract_results_bulk(paths, workers=2)
+            elapsed = time.perf_counter() - start
+        report = usage_tracker.report()['by_call_site']
+        vision = [report[site] for site in sites if site in report]
+
+        label = f'vision_batch.b{batch_size}'
+        results[f'{label}.requests'] = metric(sum(s['calls'] for s in vision) / len(paths), 'requests', False)
+        results[f'{label}.prompt_tokens'] = metric(sum(s['prompt_tokens'] for s in vision) / len(paths), 'tokens', False)
+        results[f'{label}.latency'] = metric(elapsed * 1000 / len(paths), 'ms', False)
+
+    return results
+
+def bench_api_payload():
+    """Bytes and serialization time for a 5,000-trial search response: jsonify vs paged/projected/compressed"""
+    from flask import Flask, jsonify
+    from src.utils.api_response import dumps, compress, paginate
+
+    with quiet():
+        trials = ClinicalTrialsScraper()._parse_studies(replicate_studies(load_studies(), 5000))
+    flask_app = Flask('bench')
+
+    def plain():
+        with flask_app.app_context():
+            return jsonify({'success': True, 'trials': trials, 'count': len(trials)}).get_data()
+
+    def full():
+        return compress(dumps({'success': True, 'trials': trials, 'count': len(trials)}), 'gzip')[0]
+
+    def page():
+        first = paginate(trials, 1, fields='nct_id,title,phase,status,url,conditions')
+        return compress(dumps({'success': True, 'trials': first['items'], 'count': first['count'],
+                               'next_cursor': first['next_cursor']}), 'gzip')[0]
+
+    results = {}
+    for label, build in (('jsonify', plain), ('full_gzip', full), ('page_gzip', page)):
+        timings = []
+        for _ in range(5):
+            start = time.process_time()
+            body = build()
+            timings.append(time.process_time() - start)
+        results[f'api_payload.{label}.bytes'] = metric(len(body), 'bytes', False)
+        results[f'api_payload.{label}.serialize'] = metric(min(timings) * 1000, 'ms', False)
+
+    return results
+
+# Timed in a fresh interpreter: module import, then building both analyzers and a first mock request
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+TrialAnalyzer(use_mock=True), PDFAnalyzer(use_mock=True)
+built = time.perf_counter()
+app.component('analyzer').model.generate_content('ping', call_site='cold_start')
+print((imported - start) * 1000, (built - imported) * 1000, (time.perf_counter() - built) * 1000)
+"""
+
+def bench_cold_start():
+    """Cold start: `import app`, analyzer construction and first model request in a new process (median of 7)"""
+    samples = []
+    for _ in range(7):
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], capture_output=True, text=True,
+                                check=True, cwd=tempfile.mkdtemp(), env={**os.environ, 'PYTHONPATH': os.getcwd()})
+        samples.append([float(value) for value in output.stdout.split()[-3:]])
+
+    import_ms, build_ms, first_ms = (statistics.median(column) for column in zip(*samples))
+    return {
+        'cold_start.import_app': metric(import_ms, 'ms', False),
+        'cold_start.build_analyzers': metric(build_ms, 'ms', False),
+        'cold_start.first_request': metric(first_ms, 'ms', False)
+    }
+
+BENCHMARKS = {
+    'parse_studies': bench_parse_studies,
+    'trial_columns': bench_trial_columns,
+    'corpus_snapshot': bench_corpus_snapshot,
+    'analyze_batch': bench_analyze_batch,
+    'local_classifier': bench_local_classifier,
+    'scheduler': bench_scheduler,
+    'hedging': bench_hedging,
+    'work_queue': bench_work_queue,
+    'compare_trials': bench_compare_trials,
+    'flask_endpoints': bench_flask_endpoints,
+    'coalescing': bench_coalescing,
+    'dashboard_views': bench_dashboard_views,
+    'change_detection': bench_change_detection,
+    'trial_history': bench_trial_history,
+    'pdf_pages': bench_pdf_pages,
+    'vision_payload': bench_vision_payload,
+    'vision_batch': bench_vision_batch,
+    'api_payload': bench_api_payload,
+    'cold_start': bench_cold_start
+}
+
+# ---------------------------------------------------------------- reporting
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare_with_baseline(metrics, baseline, tolerance):
+    """Return a list of (name, baseline, current, change) for metrics worse than tolerance"""
+    regressions = []
+
+    for name, current in metrics.items():
+        previous = baseline.get('metrics', {}).get(name)
+        if not previous or not previous['value']:
+            continue
+
+        change = (current['value'] - previous['value']) / previous['value']
+        worse = -change if current['higher_is_better'] else change
+        regressed = worse > tolerance
+        if current['unit'] == 'ms' and abs(current['value'] - previous['value']) < NOISE_FLOOR_MS:
+            regressed = False
+
+        flag = "❌" if regressed else "✅"
+        print(f"  {flag} {name:<40} {previous['value']:>12} → {current['value']:>12} {current['unit']} ({change:+.1%})")
+
+        if regressed:
+            regressions.append((name, previous['value'], current['value'], change))
+
+    return regressions
+
+def record_fixtures():
+    """Re-record the fixtures from the live ClinicalTrials.gov API"""
+    import requests
+    scraper = ClinicalTrialsScraper()
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+
+    for condition in DEMO_DISEASE_AREAS:
+        params = {
+            'query.cond': condition,
+            'filter.overallStatus': 'RECRUITING|ACTIVE_NOT_RECRUITING|COMPLETED',
+            'pageSize': 100,
+            'format': 'json'
+        }
+        response = requests.get(scraper.base_url, params=params, timeout=30)
+        response.raise_for_status()
+        with open(fixture_path(condition), 'w') as f:
+            json.dump({'studies': response.json().get('studies', [])}, f, indent=1)
+        print(f"💾 Recorded {fixture_path(condition)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Trials Intel pipeline benchmarks")
+    parser.add_argument('--only', help="Run benchmarks whose name contains this string")
+    parser.add_argument('--update-baseline', action='store_true', help="Save results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+    parser.add_argument('--record', action='store_true', help="Re-record fixtures from ClinicalTrials.gov")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return 0
+
+    print("="*60)
+    print("TRIALS INTEL - PIPELINE BENCHMARKS")
+    print("="*60)
+
+    metrics = {}
+    for name, bench in BENCHMARKS.items():
+        if args.only and args.only not in name:
+            continue
+        print(f"\n⏱️  {name}: {bench.__doc__}")
+        results = bench()
+        for key, value in results.items():
+            print(f"   • {key}: {value['value']} {value['unit']}")
+        metrics.update(results)
+
+    output = {
+        'generated_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'metrics': metrics
+    }
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\n💾 Saved results to {RESULTS_PATH}")
+
+    if args.update_baseline:
+        baseline = {}
+        if BASELINE_PATH.exists():
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        # Partial runs (--only) update just their own metrics
+        output['metrics'] = {**baseline.get('metrics', {}), **metrics}
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"💾 Updated baseline {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("\n⚠️ No baseline yet - run with --update-baseline to create one")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Compared with baseline from {baseline.get('generated_at', 'unknown')} "
+          f"(tolerance {args.tolerance:.0%}):")
+    regressions = compare_with_baseline(metrics, baseline, args.tolerance)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) detected")
+        return 1
+
+    print("\n✅ No regressions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
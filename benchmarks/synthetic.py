@@ -0,0 +1,178 @@
+# benchmarks/synthetic.py
+"""Synthetic trials and trial publications for benchmarks and offline tests"""
+
+import math
+import random
+
+LOREM = ("Patients were randomly assigned in a 1:1 ratio to receive the investigational therapy or "
+         "standard of care. Randomization was stratified by disease stage and prior lines of therapy. "
+         "The primary end point was overall survival; secondary end points included progression-free "
+         "survival, objective response rate and safety. ")
+
+AE_ROWS = [
+    ("Cytokine release syndrome", 72, 9, 0, 0),
+    ("Neutropenia", 54, 41, 30, 19),
+    ("Anemia", 47, 23, 38, 14),
+    ("Infection", 40, 18, 26, 9),
+    ("Fatigue", 63, 5, 51, 3),
+    ("Neurologic events", 35, 11, 4, 0)
+]
+
+def make_trial(i, **fields):
+    """
+    A trial as ClinicalTrialsScraper returns it, with NCT id NCT9xxxxxxx from `i`
+
+    Args:
+        fields: Override or add fields, e.g. enrollment=100 + i, analysis={...}
+    """
+    nct_id = f"NCT{90000000 + i:08d}"
+    trial = {'nct_id': nct_id, 'title': f"Trial {i}", 'official_title': '', 'status': 'RECRUITING',
+             'phase': 'PHASE2', 'conditions': ['Lymphoma'], 'enrollment': 100,
+             'interventions': [{'type': 'DRUG', 'name': 'x'}], 'start_date': '2024-01', 'completion_date': '2026-12',
+             'url': f"https://clinicaltrials.gov/study/{nct_id}"}
+    trial.update(fields)
+    return trial
+
+def km_steps(median, months=36, n=60, seed=0):
+    """Step points (month, survival) for an exponential arm with the given median"""
+    rng = random.Random(seed)
+    rate = math.log(2) / median
+    times = sorted(rng.expovariate(rate) for _ in range(n))
+    points, alive = [(0.0, 1.0)], n
+    for t in times:
+        if t > months:
+            break
+        points.append((t, alive / n))
+        alive -= 1
+        points.append((t, alive / n))
+    points.append((months, alive / n))
+    return points
+
+def _draw_km_figure(page, rect, medians=(24.8, 11.2), months=36, seed=0):
+    """Vector Kaplan-Meier plot with tick labels in the text layer"""
+    import pymupdf
+
+    left, top, right, bottom = rect.x0 + 40, rect.y0 + 20, rect.x1 - 10, rect.y1 - 40
+    shape = page.new_shape()
+    shape.draw_line((left, bottom), (right, bottom))
+    shape.draw_line((left, top), (left, bottom))
+    shape.finish(color=(0, 0, 0), width=1.2)
+
+    for month in range(0, months + 1, 6):
+        x = left + (right - left) * month / months
+        shape.draw_line((x, bottom), (x, bottom + 4))
+        page.insert_text((x - 4, bottom + 16), str(month), fontsize=8)
+    for tenth in range(0, 11, 2):
+        y = bottom - (bottom - top) * tenth / 10
+        shape.draw_line((left - 4, y), (left, y))
+        page.insert_text((left - 26, y + 3), f"{tenth / 10:.1f}", fontsize=8)
+    shape.finish(color=(0, 0, 0), width=0.8)
+
+    for arm, (median, color) in enumerate(zip(medians, [(0, 0, 1), (1, 0, 0)])):
+        points = km_steps(median, months, seed=seed + arm)
+        coords = [(left + (right - left) * t / months, bottom - (bottom - top) * s) for t, s in points]
+        shape.draw_polyline(coords)
+        shape.finish(color=color, width=1.5, closePath=False)
+    shape.commit()
+
+    page.insert_text((left + 10, bottom + 30), "Months since randomization", fontsize=9)
+    page.insert_text((right - 130, top + 15), f"Treatment (median {medians[0]} mo)", fontsize=8, color=(0, 0, 1))
+    page.insert_text((right - 130, top + 27), f"Control (median {medians[1]} mo)", fontsize=8, color=(1, 0, 0))
+
+def _draw_ae_table(page, top):
+    """Adverse event table laid out as positioned text, as in born-digital PDFs"""
+    page.insert_text((72, top), "Table 3. Adverse events in the safety population", fontsize=10)
+    columns = [72, 270, 345, 420, 495]
+    headers = [("Event", ""), ("Treatment (N=225)", "Any grade"), ("", "Grade >=3"),
+               ("Control (N=225)", "Any grade"), ("", "Grade >=3")]
+    for x, (upper, lower) in zip(columns, headers):
+        page.insert_text((x, top + 20), upper, fontsize=8)
+        page.insert_text((x, top + 32), lower, fontsize=8)
+
+    y = top + 50
+    for event, *counts in AE_ROWS:
+        page.insert_text((columns[0], y), event, fontsize=8)
+        for x, count in zip(columns[1:], counts):
+            page.insert_text((x, y), f"{count} ({count / 225 * 100:.1f})", fontsize=8)
+        y += 14
+    page.insert_text((columns[0], y), "Any grade >=3 event", fontsize=8)
+    for x, count in zip(columns[1:], [225, 153, 219, 95]):
+        page.insert_text((x, y), f"{count} ({count / 225 * 100:.1f})", fontsize=8)
+
+def km_curve_image(seed=0, size=(2400, 1800), medians=(24.8, 11.2), months=36):
+    """
+    Kaplan-Meier plot as a PIL image, drawn like demo_with_real_vision.py's
+    curve but with real step functions, at the resolution of a 300dpi export
+    with wide white margins
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = size
+    img = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=height // 40)
+
+    left, top, right, bottom = width * 0.18, height * 0.15, width * 0.85, height * 0.75
+    draw.line([(left, bottom), (right, bottom)], fill='black', width=4)
+    draw.line([(left, top), (left, bottom)], fill='black', width=4)
+    for month in range(0, months + 1, 6):
+        x = left + (right - left) * month / months
+        draw.line([(x, bottom), (x, bottom + 15)], fill='black', width=3)
+        draw.text((x - 12, bottom + 25), str(month), fill='black', font=font)
+    for tenth in range(0, 11, 2):
+        y = bottom - (bottom - top) * tenth / 10
+        draw.line([(left - 15, y), (left, y)], fill='black', width=3)
+        draw.text((left - 90, y - 18), f"{tenth / 10:.1f}", fill='black', font=font)
+
+    for arm, (median, color) in enumerate(zip(medians, ['blue', 'red'])):
+        points = km_steps(median, months, n=120, seed=seed * 2 + arm)
+        coords = [(left + (right - left) * t / months, bottom - (bottom - top) * s) for t, s in points]
+        draw.line(coords, fill=color, width=5)
+
+    legend = right - width * 0.25
+    draw.text((legend, top + 20), f"Treatment (median {medians[0]} mo)", fill='blue', font=font)
+    draw.text((legend, top + 70), f"Control (median {medians[1]} mo)", fill='red', font=font)
+    draw.text((legend, top + 120), "HR 0.42, p<0.0001", fill='green', font=font)
+    draw.text(((left + right) / 2 - 200, bottom + 90), "Months since randomization", fill='black', font=font)
+    return img
+
+def make_trial_pdf(path, text_pages=6, scanned_pages=0, seed=0, figure_pages=1):
+    """
+    Write a results publication: text pages, KM figure pages, an AE table page
+    and optional image-only (scanned) pages
+
+    Args:
+        path: Output PDF path
+        text_pages: Number of plain text pages
+        scanned_pages: Number of pages that are only a raster image
+        seed: Varies the survival curves
+        figure_pages: Number of KM figure pages (figure i uses seed + i)
+    """
+    import pymupdf
+
+    doc = pymupdf.open()
+
+    for i in range(text_pages):
+        page = doc.new_page()
+        page.insert_textbox(pymupdf.Rect(72, 72, 540, 760), f"Section {i + 1}\n\n" + LOREM * 8, fontsize=10)
+
+    for i in range(figure_pages):
+        page = doc.new_page()
+        page.insert_textbox(pymupdf.Rect(72, 60, 540, 200), "Overall survival results\n\n" + LOREM * 2, fontsize=10)
+        _draw_km_figure(page, pymupdf.Rect(72, 220, 540, 560), seed=seed + i)
+        page.insert_text((72, 580), f"Figure {i + 2}. Kaplan-Meier estimates of overall survival", fontsize=9)
+
+    page = doc.new_page()
+    page.insert_textbox(pymupdf.Rect(72, 60, 540, 160), "Safety\n\n" + LOREM, fontsize=10)
+    _draw_ae_table(page, 200)
+
+    for _ in range(scanned_pages):
+        source = pymupdf.open()
+        source_page = source.new_page()
+        source_page.insert_textbox(pymupdf.Rect(72, 72, 540, 760), "Supplementary appendix\n\n" + LOREM * 6, fontsize=10)
+        pixmap = source_page.get_pixmap(dpi=100)
+        page = doc.new_page()
+        page.insert_image(page.rect, pixmap=pixmap)
+
+    doc.save(path)
+    return path
\ No newline at end of file
@@ -0,0 +1,199 @@
+# src/utils/change_detection.py
+"""
+Detect what changed in monitored trials between runs
+
+Each trial is reduced to a 64-bit fingerprint of its tracked fields (status,
+phase, enrollment, completion date, interventions, ...). A run compares the
+fresh trials against the previous snapshot: equal fingerprints are skipped
+without looking further, and only the trials whose fingerprint moved get a
+field-level diff. Every addition, change or removal becomes a change event
+that is handed to subscribers and appended to the event log.
+
+The snapshot also keeps each trial's last classification, so refresh() sends
+only new and changed trials to the model - a daily pass over 50k trials in
+which a few dozen moved costs a few dozen classify_trial calls.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from src.analyzers.trial_analyzer import ANALYSIS_FAILED, MODEL_UNAVAILABLE
+from config.settings import CHANGE_SNAPSHOT_PATH, CHANGE_EVENTS_PATH, CHANGE_TRACKED_FIELDS
+
+def _canonical(field, value):
+    """Field value in a form that compares equal when the trial has not really changed"""
+    if field == 'interventions':
+        return sorted(f"{i.get('type', 'Unknown')}: {i.get('name', 'Unknown')}" for i in value or [])
+    if field == 'conditions':
+        return sorted(value or [])
+    return value
+
+def tracked_fields(trial, fields=CHANGE_TRACKED_FIELDS):
+    return {field: _canonical(field, trial.get(field)) for field in fields}
+
+def fingerprint(values):
+    """64-bit hex digest of canonical field values"""
+    raw = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+def diff_fields(old, new):
+    """
+    Field-level differences between two tracked_fields() dicts
+
+    Returns:
+        [{'field', 'old', 'new'}], with 'added'/'removed' items for list fields
+    """
+    changes = []
+    for field in new.keys() | old.keys():
+        before, after = old.get(field), new.get(field)
+        if before == after:
+            continue
+        change = {'field': field, 'old': before, 'new': after}
+        if isinstance(before, list) and isinstance(after, list):
+            change['added'] = [item for item in after if item not in before]
+            change['removed'] = [item for item in before if item not in after]
+        changes.append(change)
+    return sorted(changes, key=lambda change: change['field'])
+
+class ChangeDetector:
+    """
+    Snapshot of monitored trials and the change events between runs
+
+    Args:
+        path: JSON snapshot file (None = memory only)
+        events_path: JSONL file change events are appended to (None = don't log)
+        fields: Trial fields whose changes count
+    """
+
+    def __init__(self, path=CHANGE_SNAPSHOT_PATH, events_path=CHANGE_EVENTS_PATH, fields=CHANGE_TRACKED_FIELDS):
+        self.path = path
+        self.events_path = events_path
+        self.fields = list(fields)
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._trials = {}  # nct_id -> {'fingerprint', 'fields', 'analysis'}
+
+        if path and os.path.exists(path):
+            with open(path) as f:
+                snapshot = json.load(f)
+            if snapshot.get('fields') == self.fields:  # Otherwise every fingerprint would differ anyway
+                self._trials = snapshot['trials']
+
+    def __len__(self):
+        return len(self._trials)
+
+    def subscribe(self, callback):
+        """Call `callback(event)` for every change event emitted from now on"""
+        self._subscribers.append(callback)
+
+    def detect(self, trials, complete=False):
+        """
+        Change events for `trials` against the snapshot (the snapshot is not updated)
+
+        Args:
+            trials: Freshly fetched trial dicts
+            complete: The trials are the whole monitored set, so snapshot
+                trials missing from them are reported as removed
+
+        Returns:
+            [{'type': 'added'|'changed'|'removed', 'nct_id', 'changes', 'detected_at'}]
+        """
+        detected_at = datetime.now().isoformat()
+        events = []
+        seen = set()
+
+        with self._lock:
+            for trial in trials:
+                nct_id = trial['nct_id']
+                seen.add(nct_id)
+                values = tracked_fields(trial, self.fields)
+                previous = self._trials.get(nct_id)
+                if previous is None:
+                    events.append({'type': 'added', 'nct_id': nct_id, 'changes': [], 'detected_at': detected_at})
+                elif previous['fingerprint'] != fingerprint(values):
+                    events.append({'type': 'changed', 'nct_id': nct_id,
+                                   'changes': diff_fields(previous['fields'], values), 'detected_at': detected_at})
+
+            if complete:
+                events.extend({'type': 'removed', 'nct_id': nct_id, 'changes': [], 'detected_at': detected_at}
+                              for nct_id in self._trials.keys() - seen)
+        return events
+
+    def record(self, trials):
+        """Make `trials` the snapshot's current version (with their 'analysis', if they carry one)"""
+        with self._lock:
+            for trial in trials:
+                values = tracked_fields(trial, self.fields)
+                entry = {'fingerprint': fingerprint(values), 'fields': values}
+                previous = self._trials.get(trial['nct_id'])
+                analysis = trial.get('analysis') or (previous or {}).get('analysis')
+                if analysis is not None:
+                    entry['analysis'] = analysis
+                self._trials[trial['nct_id']] = entry
+
+    def forget(self, nct_ids):
+        with self._lock:
+            for nct_id in nct_ids:
+                self._trials.pop(nct_id, None)
+
+    def emit(self, events):
+        """Hand events to subscribers and append them to the event log"""
+        for event in events:
+            for callback in self._subscribers:
+                callback(event)
+        if self.events_path and events:
+            os.makedirs(os.path.dirname(self.events_path) or '.', exist_ok=True)
+            with open(self.events_path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event) + '\n')
+
+    def refresh(self, trials, analyzer, complete=False):
+        """
+        Detect changes, classify only new and changed trials, and update the snapshot
+
+        Unchanged trials get their stored classification back, unless it is
+        only a fallback from a run in which the model failed.
+
+        Args:
+            trials: Freshly fetched trial dicts
+            analyzer: TrialAnalyzer (anything with analyze_batch)
+            complete: See detect()
+
+        Returns:
+            (trials with 'analysis', in input order; change events)
+        """
+        events = self.detect(trials, complete=complete)
+        moved = {event['nct_id'] for event in events if event['type'] != 'removed'}
+
+        with self._lock:
+            stored = {trial['nct_id']: self._trials.get(trial['nct_id'], {}).get('analysis') for trial in trials}
+        # Never classified, or only a fallback result - classify again
+        pending = [trial for trial in trials if trial['nct_id'] in moved or stored[trial['nct_id']] is None or
+                   stored[trial['nct_id']].get('target_population') in (ANALYSIS_FAILED, MODEL_UNAVAILABLE)]
+        fresh = {trial['nct_id']: trial['analysis'] for trial in analyzer.analyze_batch(pending)} if pending else {}
+
+        analyzed = []
+        for trial in trials:
+            trial_copy = trial.copy()
+            trial_copy['analysis'] = fresh.get(trial['nct_id'], stored[trial['nct_id']])
+            analyzed.append(trial_copy)
+
+        self.record(analyzed)
+        self.forget(event['nct_id'] for event in events if event['type'] == 'removed')
+        self.save()
+        self.emit(events)
+        return analyzed, events
+
+    def save(self):
+        """Write atomically so a crash mid-write keeps the previous snapshot"""
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'fields': self.fields, 'saved_at': datetime.now().isoformat(), 'trials': self._trials},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
\ No newline at end of file
@@ -0,0 +1,59 @@
+# classifier_agreement.py
+"""
+Agreement of the rule-based pre-classifier with the model's classifications
+
+Reads a saved analysis (trials with model-made 'analysis' fields), classifies
+each trial locally and reports, per field, how often the two agree - over all
+trials and over those confident enough to skip the model. Produce the
+reference with the pre-classifier off so every label comes from the model:
+
+    LOCAL_CLASSIFIER_ENABLED=false python production_mode.py
+    python classifier_agreement.py                                   # data/processed/production_analysis.json
+    python classifier_agreement.py data/processed/other_analysis.json
+"""
+
+import json
+import sys
+from src.analyzers.local_classifier import classify_locally, agreement
+from config.settings import LOCAL_CLASSIFIER_MIN_CONFIDENCE
+
+path = sys.argv[1] if len(sys.argv) > 1 else 'data/processed/production_analysis.json'
+with open(path) as f:
+    data = json.load(f)
+trials = data['trials'] if isinstance(data, dict) else data
+
+# Labels the pre-classifier made itself say nothing about its accuracy
+reference = [t for t in trials if t.get('analysis') and 'local_confidence' not in t['analysis']]
+if not reference:
+    print(f"❌ No model-classified trials in {path} - rerun with LOCAL_CLASSIFIER_ENABLED=false")
+    exit(1)
+
+fields = ['therapeutic_area', 'disease_category', 'intervention_class']
+totals = {'all': [0, {field: 0 for field in fields}], 'confident': [0, {field: 0 for field in fields}]}
+disagreements = []
+for trial in reference:
+    local = classify_locally(trial)
+    matches = agreement(local, trial['analysis'])
+    groups = ['all'] + (['confident'] if local['confidence'] >= LOCAL_CLASSIFIER_MIN_CONFIDENCE else [])
+    for group in groups:
+        totals[group][0] += 1
+        for field in fields:
+            totals[group][1][field] += matches[field]
+    if 'confident' in groups and not all(matches.values()):
+        disagreements.append((trial['nct_id'], local, trial['analysis']))
+
+print(f"📊 {len(reference)} model-classified trials from {path}")
+confident = totals['confident'][0]
+print(f"   {confident} ({confident / len(reference):.0%}) classified locally at confidence ≥ {LOCAL_CLASSIFIER_MIN_CONFIDENCE}")
+for group, (count, agreed) in totals.items():
+    if count:
+        print(f"\n{group} ({count} trials):")
+        for field in fields:
+            print(f"  • {field}: {agreed[field] / count:.1%}")
+
+if disagreements:
+    print(f"\n⚠️ {len(disagreements)} confident trials disagree with the model:")
+    for nct_id, local, model in disagreements[:20]:
+        for field in fields:
+            if not agreement(local, model)[field]:
+                print(f"  {nct_id} {field}: local '{local[field]}' vs model '{model.get(field)}'")
\ No newline at end of file
@@ -0,0 +1,302 @@
+# src/utils/corpus_snapshot.py
+"""
+Read-only corpus snapshots shared by every API worker through mmap
+
+The pipeline writes its trials (with their analyses) once as a snapshot
+file; each web worker memory-maps it instead of loading its own copy, so N
+workers share one copy in the page cache and a worker starts serving as soon
+as the file is mapped.
+
+A snapshot file is:
+    MAGIC, header length (uint32), JSON header, then 64-byte aligned sections:
+    - the typed columns of src/utils/trial_columns.py (COLUMNS), fixed width
+    - string tables: one UTF-8 blob per field in STRING_FIELDS plus one of
+      each trial's full JSON record, each with a uint64 offset index (n + 1
+      entries, row i = blob[offsets[i]:offsets[i + 1]])
+    - rows sorted by nct_id (uint32), for lookups by binary search
+Fields are read straight from the mapping - a string field decodes only its
+own bytes, a column is a numpy view (or memoryview) of the file - and a
+whole record is parsed only when one is asked for.
+
+publish() writes a snapshot under a new name and then atomically replaces
+the directory's CURRENT pointer. CorpusStore re-reads the pointer at most
+every CORPUS_CHECK_SECONDS and swaps to the new snapshot; requests already
+holding the old one finish on it, and its mapping goes away with the last
+reference. Snapshots beyond the newest CORPUS_SNAPSHOT_KEEP are deleted on
+publish (a worker still mapping one keeps reading it on POSIX).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from src.utils.trial_columns import COLUMNS, COLUMNS_AVAILABLE, TrialColumns, column_values, matches, summarize
+from config.settings import CORPUS_SNAPSHOT_DIR, CORPUS_SNAPSHOT_KEEP, CORPUS_CHECK_SECONDS
+
+if COLUMNS_AVAILABLE:
+    import numpy as np
+
+MAGIC = b'TRIALSNAP\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+POINTER = 'CURRENT'  # Holds the file name of the published snapshot
+# Served without parsing a trial's record - the fields of a typical `fields=` projection
+STRING_FIELDS = ['nct_id', 'title', 'status', 'phase', 'start_date', 'completion_date', 'url']
+RECORD = 'record'  # String table of each trial's full JSON
+
+def _string(value):
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+def write_snapshot(path, trials, metadata=None):
+    """
+    Write `trials` as a snapshot file at `path` (atomically - readers never see a partial file)
+
+    Args:
+        metadata: JSON-serializable extras kept in the header (e.g. the comparison summary)
+
+    Returns:
+        The header
+    """
+    sections = []  # (kind, name, bytes)
+    for column, values in column_values(trials).items():
+        sections.append(('column', column, array(COLUMNS[column][1], values).tobytes()))
+    for field in STRING_FIELDS + [RECORD]:
+        encoded = [(json.dumps(trial, ensure_ascii=False, separators=(',', ':')) if field == RECORD
+                    else _string(trial.get(field, ''))).encode('utf-8') for trial in trials]
+        offsets = array('Q', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        sections.append(('offsets', field, offsets.tobytes()))
+        sections.append(('strings', field, b''.join(encoded)))
+    order = sorted(range(len(trials)), key=lambda row: trials[row].get('nct_id', ''))
+    sections.append(('index', 'nct_id', array('I', order).tobytes()))
+
+    layout, position = [], 0
+    for kind, name, data in sections:
+        position += -position % ALIGNMENT
+        layout.append([kind, name, position, len(data)])
+        position += len(data)
+    created = datetime.now()
+    header = {'format': FORMAT_VERSION, 'byteorder': sys.byteorder, 'count': len(trials),
+              'version': int(created.timestamp() * 1000), 'created': created.isoformat(),
+              'metadata': metadata or {}, 'sections': layout}
+    encoded_header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    start = len(MAGIC) + 4 + len(encoded_header)
+    start += -start % ALIGNMENT  # Section offsets are relative to here
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(encoded_header)) + encoded_header)
+        for (_, _, data), (_, _, offset, _) in zip(sections, layout):
+            f.seek(start + offset)
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return header
+
+def publish(trials, directory=CORPUS_SNAPSHOT_DIR, metadata=None, keep=CORPUS_SNAPSHOT_KEEP):
+    """Write a new snapshot into `directory` and make it the current one; returns its path"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"corpus-{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}.snap"  # Sorts by publish time
+    write_snapshot(os.path.join(directory, name), trials, metadata)
+    pointer = os.path.join(directory, POINTER)
+    with open(f"{pointer}.{os.getpid()}.tmp", 'w') as f:
+        f.write(name)
+    os.replace(f"{pointer}.{os.getpid()}.tmp", pointer)
+
+    snapshots = sorted(entry for entry in os.listdir(directory) if entry.endswith('.snap'))
+    for old in snapshots[:-max(1, keep)]:
+        if old != name:
+            try:
+                os.remove(os.path.join(directory, old))
+            except OSError:
+                pass  # Still mapped on a platform that refuses to delete it - next publish retries
+    return os.path.join(directory, name)
+
+class CorpusSnapshot:
+    """
+    One memory-mapped snapshot file (read-only)
+
+    Args:
+        path: Written by write_snapshot()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+        (length,) = struct.unpack_from('<I', self._map, len(MAGIC))
+        header = json.loads(bytes(view[len(MAGIC) + 4:len(MAGIC) + 4 + length]))
+        if header['format'] != FORMAT_VERSION or header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{path}: format {header['format']} ({header['byteorder']}-endian) "
+                             f"cannot be read here")
+        start = len(MAGIC) + 4 + length
+        start += -start % ALIGNMENT
+
+        self.count = header['count']
+        self.version = header['version']
+        self.created = header['created']
+        self.metadata = header['metadata']
+        self._sections = {(kind, name): view[start + offset:start + offset + size]
+                          for kind, name, offset, size in header['sections']}
+        self._offsets = {name: section.cast('Q') for (kind, name), section in self._sections.items()
+                         if kind == 'offsets'}
+        self._order = self._sections[('index', 'nct_id')].cast('I')
+        self._columns = None
+
+    def __len__(self):
+        return self.count
+
+    def _bytes(self, field, row):
+        offsets = self._offsets[field]
+        return self._sections[('strings', field)][offsets[row]:offsets[row + 1]]
+
+    def field(self, row, name):
+        """A STRING_FIELDS value of one row, decoded from the mapping alone"""
+        return str(self._bytes(name, row), 'utf-8')
+
+    def record(self, row):
+        """One row's full trial"""
+        return json.loads(bytes(self._bytes(RECORD, row)))
+
+    def find(self, nct_id):
+        """Row of `nct_id`, or None"""
+        target = nct_id.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._bytes('nct_id', self._order[middle])) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and bytes(self._bytes('nct_id', self._order[low])) == target:
+            return self._order[low]
+        return None
+
+    def trial(self, nct_id):
+        """Full trial by nct_id, or None"""
+        row = self.find(nct_id)
+        return self.record(row) if row is not None else None
+
+    @property
+    def columns(self):
+        """TrialColumns over the mapped columns (no copy), or None without numpy"""
+        if self._columns is None and COLUMNS_AVAILABLE:
+            self._columns = TrialColumns.from_arrays(
+                {column: np.frombuffer(self._sections[('column', column)], dtype) for column, (dtype, _)
+                 in COLUMNS.items()})
+        return self._columns
+
+    def rows(self, filters=None):
+        """Row numbers passing parsed filters (see trial_columns.parse_filters), in order"""
+        if not filters:
+            return range(self.count)
+        if self.columns is not None:
+            return self.columns.indexes(filters)
+        return [row for row in range(self.count) if matches(self.record(row), filters)]
+
+    def summarize(self, filters=None):
+        """trial_columns summary of the rows passing `filters`"""
+        if self.columns is not None:
+            return self.columns.summarize(self.columns.mask(filters) if filters else None)
+        return summarize([self.record(row) for row in self.rows(filters)])
+
+    def trials(self, rows=None, fields=None):
+        """Lazy sequence of the trials in `rows` (default all), see SnapshotTrials"""
+        return SnapshotTrials(self, range(self.count) if rows is None else rows, fields)
+
+class SnapshotTrials:
+    """
+    Trials of a snapshot as a sequence, read on access
+
+    Slicing returns trial dicts. When every field in `fields` (api_response
+    projection paths) is a STRING_FIELDS column they are read from the string
+    tables; otherwise each trial's record is parsed.
+    """
+
+    def __init__(self, snapshot, rows, fields=None):
+        self.snapshot = snapshot
+        self._rows = rows
+        roots = None
+        if fields:
+            roots = {field.strip().split('.')[0] for field in (fields.split(',') if isinstance(fields, str) else fields)
+                     if field.strip()}
+        self._fields = sorted(roots) if roots and roots <= set(STRING_FIELDS) else None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _trial(self, row):
+        row = int(row)
+        if self._fields is not None:
+            return {field: self.snapshot.field(row, field) for field in self._fields}
+        return self.snapshot.record(row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._trial(row) for row in self._rows[index]]
+        return self._trial(self._rows[index])
+
+class CorpusStore:
+    """
+    The current snapshot of a directory, swapped when a new one is published
+
+    Args:
+        directory: Where publish() writes
+        check_seconds: How often the CURRENT pointer is re-read
+    """
+
+    def __init__(self, directory=CORPUS_SNAPSHOT_DIR, check_seconds=CORPUS_CHECK_SECONDS):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._name = None
+        self._checked = None
+        self.swaps = 0
+
+    def current(self):
+        """The latest published snapshot, or None before the first; hold on to it for one request"""
+        if self._checked is None or time.monotonic() - self._checked >= self.check_seconds:
+            with self._lock:
+                if self._checked is None or time.monotonic() - self._checked >= self.check_seconds:
+                    self._refresh()
+                    self._checked = time.monotonic()
+        return self._snapshot
+
+    def _refresh(self):
+        try:
+            with open(os.path.join(self.directory, POINTER)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return
+        if name == self._name:
+            return
+        try:
+            snapshot = CorpusSnapshot(os.path.join(self.directory, name))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Corpus snapshot {name} not loaded: {e}")
+            return
+        self._snapshot, self._name = snapshot, name  # Old one stays mapped while requests use it
+        self.swaps += 1
+
+    def report(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'loaded': False, 'directory': self.directory}
+        return {'loaded': True, 'path': snapshot.path, 'version': snapshot.version, 'created': snapshot.created,
+                'trials': len(snapshot), 'swaps': self.swaps}
+
+# Process-wide store, like usage_tracker - each worker process maps the same files
+corpus_store = CorpusStore()
\ No newline at end of file
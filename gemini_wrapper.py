@@ -1,84 +1,600 @@
-# src/utils/gemini_wrapper.py
-"""Gemini wrapper with mock mode for development"""
-
-import os
-from config.settings import GEMINI_API_KEY
-
-class MockGeminiResponse:
-    def __init__(self, text):
-        self.text = text
-
-class MockGeminiModel:
-    def __init__(self, model_name):
-        self.model_name = model_name
-    
-    def generate_content(self, prompt):
-        # Mock intelligent responses based on prompt
-        if isinstance(prompt, list):
-            prompt_text = str(prompt[0]) if prompt else ""
-        else:
-            prompt_text = str(prompt)
-        
-        prompt_lower = prompt_text.lower()
-        
-        # Trial comparison/summary - check FIRST (more specific)
-        if any(word in prompt_lower for word in ['summary', 'strategic insights', 'investor', 'market trends', 'investment opportunities']):
-            return MockGeminiResponse("""{
-  "market_trends": [
-    "Rapid expansion of CAR-T therapies beyond hematologic malignancies",
-    "Increasing focus on solid tumor applications",
-    "Growing number of Phase 3 trials indicating market maturity"
-  ],
-  "investment_opportunities": [
-    "Next-generation CAR-T platforms with improved safety profiles",
-    "Combination therapies pairing CAR-T with checkpoint inhibitors",
-    "Manufacturing automation to reduce production costs"
-  ],
-  "competitive_landscape": "The CAR-T market is dominated by established players with 5-6 approved therapies, but significant opportunity exists in underserved indications and improved manufacturing approaches. Clinical trial activity shows 40% YoY growth.",
-  "risk_factors": [
-    "High manufacturing costs limiting market penetration",
-    "Safety concerns around cytokine release syndrome",
-    "Reimbursement challenges in certain markets"
-  ],
-  "recommendations": [
-    "Focus on trials targeting solid tumors for differentiation",
-    "Monitor manufacturing innovation for cost reduction opportunities",
-    "Track real-world evidence for approved CAR-T therapies"
-  ]
-}""")
-        
-        # Clinical trial classification - check SECOND
-        elif any(word in prompt_lower for word in ['classify', 'therapeutic_area', 'analyze this clinical trial']):
-            return MockGeminiResponse("""{
-  "therapeutic_area": "Oncology",
-  "disease_category": "Hematologic Malignancy",
-  "intervention_class": "Biological - CAR-T Cell Therapy",
-  "target_population": "Adults with relapsed/refractory B-cell lymphoma",
-  "innovation_level": "Novel",
-  "commercial_potential": "High",
-  "key_insights": [
-    "CAR-T therapy represents breakthrough approach for blood cancers",
-    "Strong market potential with limited competition in this indication",
-    "Phase 3 data suggests significant efficacy improvements over standard care"
-  ]
-}""")
-        
-        # Default response
-        return MockGeminiResponse(f'{{"analysis": "Mock response for: {prompt_text[:50]}..."}}')
-
-def get_gemini_model(model_name="gemini-2.0-flash", use_mock=True):
-    """
-    Get Gemini model - mock or real
-    
-    Args:
-        model_name: Gemini model to use
-        use_mock: If True, use mock (for development without API quota)
-    """
-    if use_mock:
-        print(f"🔧 Using MOCK Gemini ({model_name})")
-        return MockGeminiModel(model_name)
-    else:
-        print(f"🌐 Using REAL Gemini ({model_name})")
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        return genai.GenerativeModel(model_name)
\ No newline at end of file
+# src/utils/gemini_wrapper.py
+"""Gemini wrapper with mock mode for development"""
+
+import io
+import os
+import json
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.settings import (GEMINI_API_KEY, GEMINI_MAX_RETRIES, GEMINI_RETRY_BASE_DELAY,
+                             MOCK_LATENCY_MS, MOCK_LATENCY_DISTRIBUTION, MOCK_LATENCY_SPREAD,
+                             MOCK_MS_PER_INPUT_TOKEN, MOCK_MS_PER_OUTPUT_TOKEN, MOCK_RATE_LIMIT_RPM,
+                             MOCK_MALFORMED_RATE, MOCK_UPLOAD_MBPS, MOCK_STALL_RATE, MOCK_STALL_MS,
+                             MOCK_ERROR_RATE, MOCK_SEED, MOCK_TIME_SCALE,
+                             HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MAX_FRACTION,
+                             MODEL_CALL_TIMEOUT, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+from src.utils.schemas import schema_name, conform, json_generation_config
+from src.utils.usage import usage_tracker, estimate_tokens
+from src.utils.scheduler import scheduler
+from src.utils.tracing import span
+
+class MockUsageMetadata:
+    """Same shape as the real API's response.usage_metadata"""
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+class MockGeminiResponse:
+    def __init__(self, text, prompt=None):
+        self.text = text
+        self.usage_metadata = MockUsageMetadata(estimate_tokens(prompt or ""), estimate_tokens(text))
+
+# Canned mock responses, keyed by the schema name they satisfy
+MOCK_RESPONSES = {
+    'trial_comparison': """{
+  "market_trends": [
+    "Rapid expansion of CAR-T therapies beyond hematologic malignancies",
+    "Increasing focus on solid tumor applications",
+    "Growing number of Phase 3 trials indicating market maturity"
+  ],
+  "investment_opportunities": [
+    "Next-generation CAR-T platforms with improved safety profiles",
+    "Combination therapies pairing CAR-T with checkpoint inhibitors",
+    "Manufacturing automation to reduce production costs"
+  ],
+  "competitive_landscape": "The CAR-T market is dominated by established players with 5-6 approved therapies, but significant opportunity exists in underserved indications and improved manufacturing approaches. Clinical trial activity shows 40% YoY growth.",
+  "risk_factors": [
+    "High manufacturing costs limiting market penetration",
+    "Safety concerns around cytokine release syndrome",
+    "Reimbursement challenges in certain markets"
+  ],
+  "recommendations": [
+    "Focus on trials targeting solid tumors for differentiation",
+    "Monitor manufacturing innovation for cost reduction opportunities",
+    "Track real-world evidence for approved CAR-T therapies"
+  ]
+}""",
+    'trial_classification': """{
+  "therapeutic_area": "Oncology",
+  "disease_category": "Hematologic Malignancy",
+  "intervention_class": "Biological - CAR-T Cell Therapy",
+  "target_population": "Adults with relapsed/refractory B-cell lymphoma",
+  "innovation_level": "Novel",
+  "commercial_potential": "High",
+  "key_insights": [
+    "CAR-T therapy represents breakthrough approach for blood cancers",
+    "Strong market potential with limited competition in this indication",
+    "Phase 3 data suggests significant efficacy improvements over standard care"
+  ]
+}""",
+    'trial_assessment': """{
+  "target_population": "Adults with relapsed/refractory B-cell lymphoma",
+  "innovation_level": "Novel",
+  "commercial_potential": "High",
+  "key_insights": [
+    "CAR-T therapy represents breakthrough approach for blood cancers",
+    "Strong market potential with limited competition in this indication",
+    "Phase 3 data suggests significant efficacy improvements over standard care"
+  ]
+}""",
+    'trial_results': """{
+  "primary_endpoint_met": true,
+  "primary_endpoint": "Overall Survival",
+  "primary_result": "HR 0.42 (95% CI: 0.31-0.58), p<0.0001",
+  "secondary_endpoints": [
+    {"endpoint": "Progression-Free Survival", "result": "HR 0.35, p<0.0001"},
+    {"endpoint": "Objective Response Rate", "result": "72% vs 45%, p<0.001"}
+  ],
+  "safety_summary": "Adverse events consistent with known profile",
+  "conclusion": "Treatment demonstrates significant clinical benefit"
+}"""
+}
+
+def request_bytes(prompt):
+    """Approximate upload size of a prompt: text as UTF-8, image parts as their encoded bytes"""
+    if isinstance(prompt, (list, tuple)):
+        return sum(request_bytes(part) for part in prompt)
+    if isinstance(prompt, str):
+        return len(prompt.encode('utf-8'))
+    if isinstance(prompt, dict) and 'data' in prompt:
+        return len(prompt['data'])
+    if hasattr(prompt, 'save'):
+        # PIL image - the SDK uploads the source file as-is, or re-encodes an in-memory image
+        if getattr(prompt, 'filename', None):
+            return os.path.getsize(prompt.filename)
+        buffer = io.BytesIO()
+        prompt.save(buffer, format='PNG')
+        return buffer.tell()
+    return len(str(prompt))
+
+class MockRateLimitError(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted"""
+    code = 429
+
+class MockServerError(Exception):
+    """Stands in for google.api_core.exceptions.ServiceUnavailable"""
+    code = 503
+
+class MockSimulation:
+    """
+    Seeded latency, quota and failure behaviour for the mock model
+    
+    Args:
+        latency_ms: Base latency - the value for 'fixed', mean for 'normal'
+            and 'exponential', median for 'lognormal'
+        distribution: 'fixed', 'normal', 'lognormal' or 'exponential'
+        spread: Std dev in ms for 'normal', sigma for 'lognormal'
+        ms_per_input_token: Extra delay per prompt token
+        ms_per_output_token: Extra delay per response token
+        rate_limit_rpm: Requests allowed per minute before 429s (0 = unlimited)
+        malformed_rate: Fraction of responses returned as truncated JSON
+        upload_mbps: Request upload bandwidth, so large images cost time (0 = instant)
+        stall_rate: Fraction of requests that straggle (overloaded replica, long GC pause)
+        stall_ms: Extra latency of a straggling request
+        error_rate: Fraction of requests that fail with a 503
+        seed: RNG seed, so a run can be replayed exactly
+        time_scale: Multiplier on all simulated time (0.01 = 100x faster)
+    """
+    def __init__(self, latency_ms=0, distribution='fixed', spread=0.0, ms_per_input_token=0.0,
+                 ms_per_output_token=0.0, rate_limit_rpm=0, malformed_rate=0.0, upload_mbps=0.0,
+                 stall_rate=0.0, stall_ms=0.0, error_rate=0.0, seed=42, time_scale=1.0):
+        if distribution not in ('fixed', 'normal', 'lognormal', 'exponential'):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.spread = spread
+        self.ms_per_input_token = ms_per_input_token
+        self.ms_per_output_token = ms_per_output_token
+        self.rate_limit_rpm = rate_limit_rpm
+        self.malformed_rate = malformed_rate
+        self.upload_mbps = upload_mbps
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self.time_scale = time_scale
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self.stats = {'requests': 0, 'rate_limited': 0, 'malformed': 0, 'stalled': 0, 'errors': 0,
+                      'simulated_seconds': 0.0}
+    
+    @classmethod
+    def from_settings(cls):
+        return cls(latency_ms=MOCK_LATENCY_MS, distribution=MOCK_LATENCY_DISTRIBUTION,
+                   spread=MOCK_LATENCY_SPREAD, ms_per_input_token=MOCK_MS_PER_INPUT_TOKEN,
+                   ms_per_output_token=MOCK_MS_PER_OUTPUT_TOKEN, rate_limit_rpm=MOCK_RATE_LIMIT_RPM,
+                   malformed_rate=MOCK_MALFORMED_RATE, upload_mbps=MOCK_UPLOAD_MBPS,
+                   stall_rate=MOCK_STALL_RATE, stall_ms=MOCK_STALL_MS, error_rate=MOCK_ERROR_RATE,
+                   seed=MOCK_SEED, time_scale=MOCK_TIME_SCALE)
+    
+    def _sample_latency_ms(self):
+        """Base latency draw (lock held)"""
+        if self.distribution == 'normal':
+            return max(0.0, self._rng.gauss(self.latency_ms, self.spread))
+        if self.distribution == 'lognormal':
+            return self.latency_ms * self._rng.lognormvariate(0.0, self.spread)
+        if self.distribution == 'exponential':
+            return self._rng.expovariate(1.0 / self.latency_ms) if self.latency_ms else 0.0
+        return float(self.latency_ms)
+    
+    def admit(self):
+        """Count a request against the per-minute quota, raising a 429 when it is spent (or a random 503)"""
+        with self._lock:
+            self.stats['requests'] += 1
+            # Only drawn when enabled, so seeded runs without errors replay unchanged
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats['errors'] += 1
+                raise MockServerError("503 The model is overloaded (mock)")
+            if not self.rate_limit_rpm:
+                return
+            
+            now = time.monotonic()
+            window = 60.0 * self.time_scale
+            while self._window and now - self._window[0] >= window:
+                self._window.popleft()
+            
+            if len(self._window) >= self.rate_limit_rpm:
+                self.stats['rate_limited'] += 1
+                raise MockRateLimitError(f"429 Resource has been exhausted (mock quota {self.rate_limit_rpm}/min)")
+            self._window.append(now)
+    
+    def delay(self, prompt_tokens, response_tokens, request_bytes=0):
+        """Sleep for a sampled, token-proportional latency plus upload time"""
+        with self._lock:
+            ms = (self._sample_latency_ms() + prompt_tokens * self.ms_per_input_token +
+                  response_tokens * self.ms_per_output_token)
+            if self.upload_mbps:
+                ms += request_bytes * 8 / (self.upload_mbps * 1000)
+            if self.stall_rate and self._rng.random() < self.stall_rate:
+                self.stats['stalled'] += 1
+                ms += self.stall_ms
+            seconds = ms / 1000.0 * self.time_scale
+            self.stats['simulated_seconds'] += seconds
+        
+        if seconds > 0:
+            time.sleep(seconds)
+    
+    def corrupt(self, text):
+        """Occasionally truncate a response so it is no longer valid JSON"""
+        with self._lock:
+            if self.malformed_rate <= 0 or self._rng.random() >= self.malformed_rate or len(text) < 3:
+                return text
+            self.stats['malformed'] += 1
+            return text[:self._rng.randint(1, len(text) - 2)]
+
+class MockGeminiModel:
+    def __init__(self, model_name, generation_config=None, simulation=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.simulation = simulation
+    
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        if self.simulation:
+            self.simulation.admit()
+        
+        text = self._respond(prompt, generation_config)
+        response = MockGeminiResponse(text, prompt)
+        
+        if self.simulation:
+            self.simulation.delay(response.usage_metadata.prompt_token_count,
+                                  response.usage_metadata.candidates_token_count,
+                                  request_bytes(prompt) if self.simulation.upload_mbps else 0)
+            response.text = self.simulation.corrupt(text)
+        
+        return response
+    
+    def _respond(self, prompt, generation_config):
+        # Mock intelligent responses based on prompt
+        if isinstance(prompt, list):
+            prompt_text = str(prompt[0]) if prompt else ""
+        else:
+            prompt_text = str(prompt)
+        
+        # Schema-constrained request - answer from the matching canned response
+        config = generation_config or self.generation_config or {}
+        schema = config.get('response_schema')
+        if schema is not None:
+            name = schema_name(schema)
+            if name in MOCK_RESPONSES:
+                return MOCK_RESPONSES[name]
+            return json.dumps(self._mock_json(schema))
+        
+        prompt_lower = prompt_text.lower()
+        
+        # Trial comparison/summary - check FIRST (more specific)
+        if any(word in prompt_lower for word in ['summary', 'strategic insights', 'investor', 'market trends', 'investment opportunities']):
+            return MOCK_RESPONSES['trial_comparison']
+        
+        # Clinical trial classification - check SECOND
+        elif any(word in prompt_lower for word in ['classify', 'therapeutic_area', 'analyze this clinical trial']):
+            return MOCK_RESPONSES['trial_classification']
+        
+        # Default response
+        return f'{{"analysis": "Mock response for: {prompt_text[:50]}..."}}'
+    
+    def _mock_json(self, schema):
+        """Canned or default object for a schema; batch schemas (an object of schemas) answer each part"""
+        name = schema_name(schema)
+        if name in MOCK_RESPONSES:
+            return json.loads(MOCK_RESPONSES[name])
+        properties = schema.get('properties', {})
+        if name is None and properties and all('properties' in part for part in properties.values()):
+            return {key: self._mock_json(part) for key, part in properties.items()}
+        return conform({}, schema)
+
+def is_rate_limit_error(error):
+    """True for quota/429 errors worth retrying"""
+    return (getattr(error, 'code', None) == 429 or
+            type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose recent calls keep failing"""
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failed
+    calls it opens and calls fail fast; after `reset_seconds` one probe call
+    is let through (half-open), which closes it on success and reopens it
+    on failure.
+    """
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state, self._probing = 'half_open', False
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return self.state == 'closed'
+    
+    def record(self, success):
+        with self._lock:
+            if success:
+                self.state, self._failures, self._probing = 'closed', 0, False
+                return
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"⚠️ Model circuit opened after {self._failures} failed calls - failing fast for "
+                          f"{self.reset_seconds:.0f}s")
+                self.state, self._opened_at, self._probing = 'open', time.monotonic(), False
+    
+    def report(self):
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self._failures}
+
+_attempt_pool = None
+_attempt_pool_lock = threading.Lock()
+
+def _attempts():
+    """Threads that run attempts, so the caller can time out or hedge them"""
+    global _attempt_pool
+    with _attempt_pool_lock:
+        if _attempt_pool is None:
+            _attempt_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix='model-attempt')
+        return _attempt_pool
+
+class InstrumentedModel:
+    """
+    Wraps a real or mock model to retry rate-limited calls and record
+    token counts, latency and retries per call site in `usage_tracker`;
+    each request sent (hedges included) holds a slot from the shared
+    `scheduler` until it finishes
+
+    Attempts still running past their call site's HEDGE_PERCENTILE latency
+    are sent a second time (within HEDGE_MAX_FRACTION of calls) and the
+    first answer is used. A CircuitBreaker fails calls fast while the
+    backend keeps failing.
+    """
+    LATENCY_WINDOW = 200  # Recent successful attempts per call site
+    
+    def __init__(self, model, model_name, hedge=HEDGE_ENABLED, timeout=MODEL_CALL_TIMEOUT):
+        self.model = model
+        self.model_name = model_name
+        self.hedge = hedge
+        self.timeout = timeout
+        self.breaker = CircuitBreaker()
+        self._latencies = {}  # call_site -> deque of seconds
+        self._attempt_count = 0
+        self._hedge_count = 0
+        self._lock = threading.Lock()
+    
+    def _hedge_after(self, call_site):
+        """Seconds after which an attempt is hedged, or None (not enough history, or disabled)"""
+        with self._lock:
+            self._attempt_count += 1
+            if not self.hedge:
+                return None
+            latencies = sorted(self._latencies.get(call_site, ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(HEDGE_PERCENTILE / 100 * len(latencies)))]
+    
+    def _take_hedge(self):
+        """Spend one extra request from the hedge budget, if any is left"""
+        with self._lock:
+            if self._hedge_count + 1 > HEDGE_MAX_FRACTION * self._attempt_count:
+                return False
+            self._hedge_count += 1
+            return True
+    
+    def _attempt(self, prompt, call_site, kwargs, release, priority, cost):
+        """
+        One attempt, hedged and timed out as configured
+
+        Args:
+            release: Gives back the scheduler slot the attempt was granted - only
+                once its request finishes, even if the caller timed out first
+            priority, cost: Scheduler class and cost, for the slot a hedge takes
+        """
+        hedge_after = self._hedge_after(call_site)
+        start = time.perf_counter()
+        if hedge_after is None and not self.timeout:
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+            finally:
+                release()
+        else:
+            try:
+                primary = _attempts().submit(self.model.generate_content, prompt, **kwargs)
+            except BaseException:
+                release()
+                raise
+            primary.add_done_callback(lambda _: release())
+            settled = threading.Event()  # Caller has its answer or gave up - a hedge still queued is not sent
+            pending, winner, error = {primary}, None, None
+            hedge_at = start + hedge_after if hedge_after is not None else None
+            deadline = start + self.timeout if self.timeout else None
+            try:
+                while winner is None:
+                    limits = [t for t in (hedge_at, deadline) if t is not None]
+                    timeout = max(0.0, min(limits) - time.perf_counter()) if limits else None
+                    done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is None:
+                            winner = future
+                            break
+                        error = future.exception()
+                    if winner is not None:
+                        break
+                    if not pending:
+                        raise error  # Every request sent failed
+                    now = time.perf_counter()
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError(f"No response from {self.model_name} within {self.timeout:g}s")
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at = None  # At most one hedge per attempt
+                        if self._take_hedge():
+                            usage_tracker.record_hedge(call_site)
+                            pending.add(_attempts().submit(self._hedge, prompt, kwargs, priority, cost, settled))
+            finally:
+                settled.set()
+            if winner is not primary:
+                usage_tracker.record_hedge(call_site, won=True)
+            response = winner.result()
+        
+        with self._lock:
+            self._latencies.setdefault(call_site, deque(maxlen=self.LATENCY_WINDOW)).append(
+                time.perf_counter() - start)
+        return response
+    
+    def _hedge(self, prompt, kwargs, priority, cost, settled):
+        """The second request of a slow attempt, under a scheduler slot of its own (same class)"""
+        with scheduler.slot(priority, cost):
+            if settled.is_set():
+                return None  # Answered (or given up) while this waited for a slot - nothing to send
+            return self.model.generate_content(prompt, **kwargs)
+    
+    def generate_content(self, prompt, call_site="unknown", priority=None, **kwargs):
+        """
+        Args:
+            prompt: Prompt or list of prompt parts
+            call_site: Name used to aggregate usage, e.g. 'classify_trial'
+            priority: Scheduler class, e.g. 'batch' (default SCHEDULER_DEFAULT_CLASS)
+            **kwargs: Passed through to the underlying generate_content
+        
+        Raises:
+            CircuitOpenError: The backend is failing; nothing was sent
+        """
+        if not self.breaker.allow():
+            usage_tracker.record_circuit_rejection(call_site)
+            raise CircuitOpenError(f"{self.model_name} is failing - calls paused for up to "
+                                   f"{self.breaker.reset_seconds:.0f}s")
+        
+        retries = 0
+        start = time.perf_counter()
+        cost = estimate_tokens(prompt)
+        
+        while True:
+            try:
+                release = scheduler.acquire(priority, cost)  # Released by _attempt when the request finishes
+                with span('model.generate_content', category='model', call_site=call_site, attempt=retries + 1):
+                    response = self._attempt(prompt, call_site, kwargs, release, priority, cost)
+                break
+            except Exception as e:
+                if is_rate_limit_error(e) and retries < GEMINI_MAX_RETRIES:
+                    delay = GEMINI_RETRY_BASE_DELAY * (2 ** retries)
+                    print(f"⏳ Rate limited in {call_site}, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    retries += 1
+                    continue
+                self.breaker.record(False)
+                usage_tracker.record_call(call_site, 0, 0, time.perf_counter() - start,
+                                          retries=retries, error=True)
+                raise
+        
+        self.breaker.record(True)
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt)
+        response_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(response.text)
+        usage_tracker.record_call(call_site, prompt_tokens, response_tokens,
+                                  time.perf_counter() - start, retries=retries)
+        
+        return response
+
+def parse_json_response(text):
+    """
+    Parse a model response as JSON
+    
+    Schema-constrained responses are plain JSON; free-form ones may be
+    wrapped in a markdown code fence, which is stripped first.
+    """
+    text = text.strip()
+    
+    # Extract JSON if wrapped in markdown
+    if '```json' in text:
+        text = text.split('```json')[1].split('```')[0].strip()
+    elif '```' in text:
+        text = text.split('```')[1].split('```')[0].strip()
+    
+    with span('json.parse', category='parse', chars=len(text)):
+        return json.loads(text)
+
+def get_gemini_model(model_name="gemini-2.0-flash", use_mock=True, response_schema=None, simulation=None):
+    """
+    Get Gemini model - mock or real
+    
+    Args:
+        model_name: Gemini model to use
+        use_mock: If True, use mock (for development without API quota)
+        response_schema: Optional schema from src.utils.schemas; every
+            response from the model is then constrained to JSON matching it
+        simulation: Optional MockSimulation for the mock; defaults to the
+            MOCK_* settings (instant responses unless configured)
+    """
+    generation_config = json_generation_config(response_schema) if response_schema else None
+    
+    if use_mock:
+        print(f"🔧 Using MOCK Gemini ({model_name})")
+        model = MockGeminiModel(model_name, generation_config=generation_config,
+                                simulation=simulation or MockSimulation.from_settings())
+    else:
+        print(f"🌐 Using REAL Gemini ({model_name})")
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        model = genai.GenerativeModel(model_name, generation_config=generation_config)
+    
+    return InstrumentedModel(model, model_name)
+
+class SharedModel:
+    """
+    A model client that is only created on its first request
+
+    Construction configures the SDK (or prints the mock banner), which
+    importing an analyzer or app.py should not pay for.
+    """
+    def __init__(self, model_name, use_mock):
+        self.model_name = model_name
+        self.use_mock = use_mock
+        self._model = None
+        self._lock = threading.Lock()
+    
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = get_gemini_model(self.model_name, use_mock=self.use_mock)
+        return self._model
+    
+    def generate_content(self, prompt, call_site="unknown", **kwargs):
+        return self.model.generate_content(prompt, call_site=call_site, **kwargs)
+
+_shared_models = {}
+_shared_models_lock = threading.Lock()
+
+def shared_model(model_name="gemini-2.0-flash", use_mock=True):
+    """
+    The process-wide client for a model name, created on first use
+
+    Every analyzer asking for the same model (and mode) gets the same
+    client, so the SDK is configured once and quota is shared as in
+    production. Use get_gemini_model for a private client (custom
+    response_schema or simulation).
+    """
+    with _shared_models_lock:
+        key = (model_name, use_mock)
+        if key not in _shared_models:
+            _shared_models[key] = SharedModel(model_name, use_mock)
+        return _shared_models[key]
+
+def model_health():
+    """Circuit state of each shared model client created so far"""
+    with _shared_models_lock:
+        created = [(key, shared._model) for key, shared in _shared_models.items() if shared._model is not None]
+    return {f"{name}{' (mock)' if mock else ''}": model.breaker.report() for (name, mock), model in created}
\ No newline at end of file
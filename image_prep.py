@@ -0,0 +1,111 @@
+# src/utils/image_prep.py
+"""
+Shrink images before they are sent to Gemini Vision
+
+Each figure type has a profile (IMAGE_PREP_PROFILES): whitespace margins are
+trimmed, the image is downsampled to a maximum long edge, reduced to a
+palette or grayscale where colour carries no information, and re-encoded.
+Fewer pixels means fewer billed image tiles and fewer bytes on the wire.
+"""
+
+import io
+from pathlib import Path
+from config.settings import IMAGE_PREP_PROFILES, IMAGE_TRIM_MARGINS
+
+try:
+    from PIL import Image, ImageChops
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+MIME_TYPES = {'PNG': 'image/png', 'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+# Pixels differing from the background by less than this are treated as background
+TRIM_THRESHOLD = 24
+TRIM_PADDING = 8
+
+def load_image(image):
+    """(PIL image, original encoded bytes or None) for a path, bytes or PIL image"""
+    if isinstance(image, (bytes, bytearray)):
+        data = bytes(image)
+        return Image.open(io.BytesIO(data)), data
+    if isinstance(image, (str, Path)):
+        data = Path(image).read_bytes()
+        return Image.open(io.BytesIO(data)), data
+    return image, None
+
+def _flatten(img):
+    """RGB on a white background (transparent PNGs otherwise turn black)"""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, 'white')
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img if img.mode == 'RGB' else img.convert('RGB')
+
+def trim_margins(img, threshold=TRIM_THRESHOLD, padding=TRIM_PADDING):
+    """Crop uniform borders, using the top-left pixel as the background colour"""
+    # Find the content box on a 4x reduced copy - a tenth of the work, a few pixels of slack
+    factor = 4 if min(img.size) >= 400 else 1
+    small = img.reduce(factor) if factor > 1 else img
+    background = Image.new(small.mode, small.size, img.getpixel((0, 0)))
+    mask = ImageChops.difference(small, background).convert('L').point(lambda p: 255 if p > threshold else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return img
+
+    x0, y0, x1, y1 = (edge * factor for edge in bbox)
+    bbox = (max(0, x0 - padding), max(0, y0 - padding), min(img.width, x1 + padding), min(img.height, y1 + padding))
+    return img.crop(bbox) if bbox != (0, 0, img.width, img.height) else img
+
+def _encode(img, profile):
+    buffer = io.BytesIO()
+    fmt = profile.get('format', 'PNG')
+    if fmt == 'JPEG':
+        img.save(buffer, format='JPEG', quality=profile.get('quality', 80))
+    else:
+        # optimize=True saves ~8% more but is several times slower than the default level
+        img.save(buffer, format=fmt)
+    return buffer.getvalue(), MIME_TYPES[fmt]
+
+def prepare_image(image, figure_type='figure', profiles=IMAGE_PREP_PROFILES):
+    """
+    Trim, downsample and re-encode an image for a vision request
+
+    Args:
+        image: Path, encoded bytes or PIL image
+        figure_type: Profile to apply ('survival_curve', 'adverse_events', 'figure', 'scanned_page')
+        profiles: Profile table (defaults to IMAGE_PREP_PROFILES)
+
+    Returns:
+        Prompt part {'mime_type', 'data'}; the original encoding is kept when
+        the image was not resized and re-encoding would not make it smaller
+    """
+    img, original = load_image(image)
+    profile = profiles.get(figure_type, profiles['figure'])
+    original_mime, original_size = MIME_TYPES.get(img.format), img.size
+
+    img = _flatten(img)
+    if IMAGE_TRIM_MARGINS:
+        img = trim_margins(img)
+
+    max_edge = profile.get('max_edge')
+    if max_edge and max(img.size) > max_edge:
+        if img is image:
+            img = img.copy()  # thumbnail() resizes in place - leave the caller's image alone
+        # Area averaging keeps thin plot lines and text strokes visible and is ~3x faster than Lanczos
+        img.thumbnail((max_edge, max_edge), Image.Resampling.BOX)
+
+    mode = profile.get('mode', 'rgb')
+    if mode == 'grayscale':
+        img = img.convert('L')
+    elif mode == 'palette':
+        # No dithering - dither noise defeats PNG's compression on flat line art
+        img = img.quantize(colors=profile.get('colors', 64), method=Image.Quantize.FASTOCTREE,
+                           dither=Image.Dither.NONE)
+
+    data, mime_type = _encode(img, profile)
+    # Resized images always win: billed tiles depend on pixel dimensions, not bytes
+    if original and original_mime and img.size == original_size and len(original) <= len(data):
+        return {'mime_type': original_mime, 'data': original}
+    return {'mime_type': mime_type, 'data': data}
\ No newline at end of file
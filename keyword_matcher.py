@@ -0,0 +1,80 @@
+# src/utils/keyword_matcher.py
+"""
+Find many keywords in text in one pass (Aho-Corasick)
+
+The automaton is built once from the whole vocabulary, so matching a trial's
+conditions costs time proportional to the text, however many terms there
+are. Matching is case-insensitive, treats any run of non-alphanumeric
+characters as one space ("Non-Small-Cell" = "non small cell") and only
+reports whole words; overlapping hits resolve to the longest term.
+"""
+
+import re
+from collections import deque
+
+_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+def normalize(text):
+    return ' ' + _SEPARATORS.sub(' ', text.lower()).strip() + ' '
+
+class KeywordMatcher:
+    """
+    Args:
+        terms: {term: payload} - the payload is returned with each match
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(term length, term, payload)] ending here
+
+        for term, payload in terms.items():
+            key = normalize(term)  # Padded with spaces, so hits are whole words
+            state = 0
+            for char in key:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((len(key), term, payload))
+
+        # Breadth-first failure links; each state also reports its suffix states' terms
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Whole-word matches in `text`, longest first where they overlap
+
+        Returns:
+            [(term, payload)] in text order
+        """
+        text = normalize(text)
+        hits = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, term, payload in self._output[state]:
+                hits.append((end - length, end, term, payload))
+
+        # Keep the longest of overlapping hits (terms share their padding space, hence the -1)
+        hits.sort(key=lambda hit: (hit[0], -(hit[1] - hit[0])))
+        matches, covered = [], 0
+        for start, end, term, payload in hits:
+            if start >= covered - 1:
+                matches.append((term, payload))
+                covered = end
+        return matches
\ No newline at end of file
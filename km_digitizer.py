@@ -0,0 +1,353 @@
+# src/utils/km_digitizer.py
+"""
+Read Kaplan-Meier curves off the pixels, without a model
+
+Finds the axes (the longest dark row and column), calibrates them from the
+tick marks and the tick labels found in the figure's text (the PDF text
+layer, or text supplied by the caller), separates the arms by hue and traces
+each arm as a monotone step function. Medians are where each trace first
+drops to 0.5. Which arm is the control comes from the legend in the text -
+a colour name ("red: placebo") or the median it states ("Control (median
+11.2 mo)"). Plots it cannot read confidently - monochrome arms, no tick
+labels, more than two arms, arms the legend does not identify - get a low
+confidence so the caller can fall back to Gemini Vision.
+"""
+
+import re
+from config.settings import KM_DIGITIZER_MAX_EDGE, KM_DIGITIZER_MIN_CONFIDENCE
+from src.utils.ae_table import BARE_ARM_PATTERN, CONTROL_CUES, control_arm
+from src.utils.image_prep import load_image
+
+try:
+    import numpy as np
+    from PIL import Image
+    DIGITIZER_AVAILABLE = True
+except ImportError:
+    DIGITIZER_AVAILABLE = False
+
+DARK_THRESHOLD = 128  # Max gray level of axis/tick ink (thin lines turn gray when downsampled)
+COLOR_THRESHOLD = 80  # Chroma (max - min channel) separating coloured curves from black/gray ink
+MIN_CURVE_COVERAGE = 0.5  # Share of the x-axis a trace must span to count as an arm
+TICK_LENGTH = 6  # Pixels beyond the axis searched for tick marks
+
+NUMBER_PATTERN = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+HR_PATTERN = re.compile(r'\bHR\b[\s=:,]*([0-9]*\.?[0-9]+)', re.IGNORECASE)
+CI_PATTERN = re.compile(r'95%\s*CI[\s:,]*([0-9]*\.?[0-9]+)\s*(?:-|–|to)\s*([0-9]*\.?[0-9]+)', re.IGNORECASE)
+P_PATTERN = re.compile(r'\bp\s*([<>=≤≥]\s*0?\.[0-9]+)', re.IGNORECASE)
+
+# Legend entries: "red: placebo", "blue = Drug X", "Drug X (blue)", "Control (median 11.2 mo)"
+HUES = {'red': 0, 'orange': 30, 'yellow': 60, 'green': 120, 'cyan': 180, 'blue': 240, 'purple': 270,
+        'violet': 270, 'magenta': 300, 'pink': 330}
+LEGEND_LABEL = r"([A-Za-z][\w'+/-]*(?:\s[A-Za-z+][\w'+/-]*){0,3})"
+HUE_NAME = r'(' + '|'.join(HUES) + r')'
+HUE_FIRST_PATTERN = re.compile(HUE_NAME + r'(?:\s+(?:line|curve))?\s*[:=]\s*' + LEGEND_LABEL, re.IGNORECASE)
+HUE_AFTER_PATTERN = re.compile(LEGEND_LABEL + r'\s*\(' + HUE_NAME + r'(?:\s+(?:line|curve))?\)', re.IGNORECASE)
+MEDIAN_LEGEND_PATTERN = re.compile(LEGEND_LABEL + r'\s*[(:,]?\s*median\b[\s:=]*([0-9]*\.?[0-9]+)', re.IGNORECASE)
+
+def tick_progressions(text):
+    """
+    Tick label sequences in figure text: evenly spaced values from 0, e.g. 0 6 12 18 24
+
+    Text-layer order is unreliable (axis labels interleave with legends and
+    y labels often read top-down), so progressions are found in the set of
+    numbers rather than in sequence.
+
+    Returns:
+        (time_ticks, survival_ticks) - ascending value lists or None. Survival
+        ticks end at 1 or 100; the longest other progression is the time axis.
+    """
+    values = {round(float(n), 6) for n in NUMBER_PATTERN.findall(text)}
+    if 0.0 not in values:
+        return None, None
+
+    progressions = []
+    for step in sorted(v for v in values if v > 0):
+        run = [0.0]
+        while round(run[-1] + step, 6) in values:
+            run.append(round(run[-1] + step, 6))
+        if len(run) >= 3:
+            progressions.append(run)
+
+    survival = max((run for run in progressions if run[-1] in (1.0, 100.0)), key=len, default=None)
+    time = max((run for run in progressions if not (survival and set(run) <= set(survival))),
+               key=len, default=None)
+    return time, survival
+
+def _runs(indexes):
+    """Centres of runs of consecutive integers"""
+    if len(indexes) == 0:
+        return []
+    breaks = np.where(np.diff(indexes) > 1)[0]
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(indexes) - 1]))
+    return [(indexes[s] + indexes[e]) / 2 for s, e in zip(starts, ends)]
+
+def find_axes(dark):
+    """
+    Locate the x and y axes
+
+    Args:
+        dark: Boolean (height, width) array of ink pixels
+
+    Returns:
+        Dict with origin (x, y), x_end, y_top, plot edges and tick centres,
+        or None if there is no pair of long dark lines
+    """
+    height, width = dark.shape
+
+    col_counts = dark.sum(axis=0)
+    row_counts = dark.sum(axis=1)
+    y_axis = int(col_counts.argmax())
+    x_axis = int(row_counts.argmax())
+    if col_counts[y_axis] < 0.3 * height or row_counts[x_axis] < 0.3 * width:
+        return None
+
+    # Axis line thickness: neighbouring rows/columns that are nearly as dark
+    x_rows = np.where(row_counts >= 0.7 * row_counts[x_axis])[0]
+    x_rows = x_rows[np.abs(x_rows - x_axis) <= 6]
+    y_cols = np.where(col_counts >= 0.7 * col_counts[y_axis])[0]
+    y_cols = y_cols[np.abs(y_cols - y_axis) <= 6]
+    axis_top, axis_bottom = int(x_rows.min()), int(x_rows.max())
+    axis_left, axis_right = int(y_cols.min()), int(y_cols.max())
+
+    x_line = np.where(dark[axis_top:axis_bottom + 1].any(axis=0))[0]
+    y_line = np.where(dark[:, axis_left:axis_right + 1].any(axis=1))[0]
+    x_line = x_line[x_line >= axis_left]
+    y_line = y_line[y_line <= axis_bottom]
+    if len(x_line) == 0 or len(y_line) == 0:
+        return None
+
+    # Ticks: short marks just outside each axis (mostly dark - their ends blur into the axis)
+    below = dark[axis_bottom + 1:axis_bottom + 1 + TICK_LENGTH, axis_left:]
+    x_ticks = [axis_left + c for c in _runs(np.where(below.mean(axis=0) >= 0.6)[0])] if below.size else []
+    left = dark[:axis_bottom + 1, max(0, axis_left - TICK_LENGTH):axis_left]
+    y_ticks = _runs(np.where(left.mean(axis=1) >= 0.6)[0]) if left.size else []
+
+    return {
+        'origin': ((axis_left + axis_right) / 2, (axis_top + axis_bottom) / 2),
+        'x_end': int(x_line.max()),
+        'y_top': int(y_line.min()),
+        'plot_left': axis_right + 1,
+        'plot_bottom': axis_top - 1,
+        'x_ticks': x_ticks,
+        'y_ticks': sorted(y_ticks, reverse=True)  # bottom (0) first
+    }
+
+def trace_curves(hsv, axes):
+    """
+    Separate coloured traces by hue and follow each as a monotone step function
+
+    Works on the coordinates of coloured pixels only, which are a few
+    percent of the plot.
+
+    Args:
+        hsv: (height, width, 3) uint8 HSV array, as from PIL's 'HSV' mode
+        axes: find_axes() result
+
+    Returns:
+        List of dicts with hue, columns and rows (pixel centres of the trace)
+        and coverage (share of plot columns the trace spans)
+    """
+    # Allow for curves drawn on the top edge (survival 1.0) above the axis line's end
+    top, bottom = max(0, axes['y_top'] - TICK_LENGTH * 2), axes['plot_bottom']
+    left, right = axes['plot_left'], axes['x_end']
+    plot = hsv[top:bottom + 1, left:right + 1]
+    width = plot.shape[1]
+
+    chroma = plot[..., 1].astype(np.uint16) * plot[..., 2] // 255
+    ys, xs = np.nonzero(chroma > COLOR_THRESHOLD)
+    hues = plot[ys, xs, 0].astype(np.float32) * 360 / 256
+    # 30 degree bins centred on the primaries, so pure red does not straddle 0/360
+    bins = (((hues + 15) % 360) // 30).astype(np.int8)
+    counts = np.bincount(bins, minlength=12)
+    missing = np.iinfo(np.int32).max
+    curves = []
+
+    for hue_bin in np.where(counts >= MIN_CURVE_COVERAGE * width)[0]:
+        selected = bins == hue_bin
+        y, x = ys[selected], xs[selected]
+
+        first = np.full(width, missing, dtype=np.int32)
+        np.minimum.at(first, x, y)
+        has = first < missing
+        if has.mean() < MIN_CURVE_COVERAGE:
+            continue  # Legend text or annotation, not a trace
+
+        # Survival never rises, so the trace's row never decreases. Bound each column by
+        # the running maximum of the topmost pixel, which drops text sitting above the curve.
+        line_width = max(1, int(np.median(np.bincount(x, minlength=width)[has])))
+        bound = np.maximum.accumulate(np.where(has, first, 0))
+        keep = y >= bound[x] - line_width
+        trace = np.full(width, missing, dtype=np.int32)
+        np.minimum.at(trace, x[keep], y[keep])
+        valid = trace < missing
+
+        curves.append({
+            'hue': int(hue_bin) * 30,
+            'columns': np.where(valid)[0] + left,
+            'rows': trace[valid] + top + (line_width - 1) / 2,
+            'coverage': float(valid.mean())
+        })
+
+    return curves
+
+def _calibrate(positions, labels, origin, end):
+    """(pixel origin, value per pixel, exact) from tick positions, or from the axis ends"""
+    if labels and len(positions) == len(labels) and len(labels) >= 2:
+        return positions[0], (labels[-1] - labels[0]) / (positions[-1] - positions[0]), True
+    if labels:
+        return origin, (labels[-1] - labels[0]) / (end - origin), False
+    return None, None, False
+
+def _nearest(values, target, tolerance):
+    """Index of the one value within `tolerance` of `target` that is nearer than the other, or None"""
+    distances = [distance if distance <= tolerance else None for distance in
+                 (abs(value - target) if value is not None else None for value in values)]
+    found = [(distance, index) for index, distance in enumerate(distances) if distance is not None]
+    if not found or (len(found) > 1 and found[0][0] == found[1][0]):
+        return None
+    return min(found)[1]
+
+def identify_arms(arms, text):
+    """
+    Tell the treatment arm from the control with the legend in `text`
+
+    Legend entries are matched to arms by colour name or by stated median;
+    an entry's label names the control if it has a control cue ("Placebo",
+    "Control", "Chemotherapy" against "Drug X + chemotherapy"). With only one
+    arm labelled, the label must be the cue alone ("Placebo (n=112)").
+
+    Args:
+        arms: The two digitized arms ({'hue', 'median'})
+
+    Returns:
+        (treatment, control), or None when the legend does not tell them apart
+    """
+    labels = {}  # arm index -> legend label
+    for hue_first in (True, False):
+        for match in (HUE_FIRST_PATTERN if hue_first else HUE_AFTER_PATTERN).finditer(text):
+            hue, label = match.groups() if hue_first else match.groups()[::-1]
+            target = HUES[hue.lower()]
+            index = _nearest([min(abs(arm['hue'] - target), 360 - abs(arm['hue'] - target)) for arm in arms], 0, 45)
+            if index is not None:
+                labels.setdefault(index, label)
+    medians = [arm['median'] for arm in arms]
+    stated = [(label, float(median)) for label, median in MEDIAN_LEGEND_PATTERN.findall(text)]
+    if len(stated) == 2 and None not in medians and medians[0] != medians[1] and stated[0][1] != stated[1][1]:
+        # Both medians stated: pair them with the arms by rank, which tolerates a reading a few months off
+        longer = 0 if medians[0] > medians[1] else 1
+        for label, median in stated:
+            labels.setdefault(longer if median == max(m for _, m in stated) else 1 - longer, label)
+    else:
+        for label, median in stated:
+            index = _nearest(medians, median, max(1.0, 0.1 * median))
+            if index is not None:
+                labels.setdefault(index, label)
+
+    named = {index: label.lower() for index, label in labels.items()}
+    if not any(cue in label for label in named.values() for cue in CONTROL_CUES):
+        return None
+    if len(named) == 2:
+        control, ambiguous = control_arm([named[0], named[1]])
+        if ambiguous or named[0] == named[1]:
+            return None
+        index = [named[0], named[1]].index(control)
+    else:
+        # One labelled arm is the control only if it names the control alone -
+        # "Drug X + chemotherapy" could as well be the treatment
+        index, label = next(iter(named.items()))
+        if not any(cue in label and not BARE_ARM_PATTERN.sub(' ', label.replace(cue, ' ')).split()
+                   for cue in CONTROL_CUES):
+            return None
+    return arms[1 - index], arms[index]
+
+def digitize_km(image, text=""):
+    """
+    Digitize a two-arm Kaplan-Meier plot
+
+    Args:
+        image: Path, encoded bytes or PIL image
+        text: Text in and around the figure - tick labels, legend, caption
+
+    Returns:
+        SURVIVAL_CURVE_SCHEMA fields plus 'confidence' (0-1), 'method' and
+        per-arm 'curves'; medians are None when the curve never reaches 0.5
+    """
+    if not DIGITIZER_AVAILABLE:
+        return {'confidence': 0.0, 'method': 'local_digitizer', 'reason': "NumPy/PIL not installed"}
+
+    img, _ = load_image(image)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    if max(img.size) > KM_DIGITIZER_MAX_EDGE:
+        img = img.copy()  # thumbnail() resizes in place - leave the caller's image alone
+        img.thumbnail((KM_DIGITIZER_MAX_EDGE, KM_DIGITIZER_MAX_EDGE), Image.Resampling.BOX)
+    img = img.convert('RGB')
+
+    def failed(reason):
+        return {'confidence': 0.0, 'method': 'local_digitizer', 'reason': reason}
+
+    axes = find_axes(np.asarray(img.convert('L')) < DARK_THRESHOLD)
+    if axes is None:
+        return failed("no axes found")
+
+    time_ticks, survival_ticks = tick_progressions(text)
+    if not time_ticks:
+        return failed("no time-axis tick labels")
+
+    x0, x_scale, x_exact = _calibrate(axes['x_ticks'], time_ticks, axes['origin'][0], axes['x_end'])
+    y0, y_scale, y_exact = _calibrate(axes['y_ticks'], survival_ticks, axes['origin'][1], axes['y_top'])
+    if y0 is None:
+        # Unlabelled survival axis: assume it runs from 0 to 1 over its full height
+        y0, y_scale = axes['origin'][1], 1.0 / (axes['y_top'] - axes['origin'][1])
+    if survival_ticks and survival_ticks[-1] == 100.0:
+        y_scale /= 100.0
+
+    curves = trace_curves(np.asarray(img.convert('HSV')), axes)
+    if len(curves) != 2:
+        return failed(f"{len(curves)} coloured arms found (need 2)")
+
+    confidence = 1.0 * (1.0 if x_exact else 0.8) * (1.0 if y_exact else 0.9)
+    arms = []
+    for curve in curves:
+        months = (curve['columns'] - x0) * x_scale + time_ticks[0]
+        survival = (curve['rows'] - y0) * y_scale
+        # A trace that does not start near 1.0 means the y calibration is off
+        if abs(survival[:5].mean() - 1.0) > 0.08:
+            confidence *= 0.5
+        confidence *= min(1.0, curve['coverage'] / 0.8)
+
+        below = np.where(survival <= 0.5)[0]
+        arms.append({
+            'hue': curve['hue'],
+            'median': round(float(months[below[0]]), 1) if len(below) else None,
+            'mean_survival': float(survival.mean())
+        })
+
+    identified = identify_arms(arms, text)
+    if identified:
+        treatment, control = identified
+        analysis = "Medians read from the digitized curves; arms identified from the legend"
+    else:
+        # Only a guess: the better-surviving curve as treatment - not enough to skip the model
+        treatment, control = sorted(arms, key=lambda arm: -arm['mean_survival'])
+        confidence = min(confidence, KM_DIGITIZER_MIN_CONFIDENCE / 2)
+        analysis = "Medians read from the digitized curves; the legend does not identify the arms, " \
+                   "so the higher curve is taken as the treatment arm"
+    hr = HR_PATTERN.search(text)
+    ci = CI_PATTERN.search(text)
+    p_value = P_PATTERN.search(text)
+
+    return {
+        'median_survival_treatment': treatment['median'],
+        'median_survival_control': control['median'],
+        'hazard_ratio': float(hr.group(1)) if hr else None,
+        'confidence_interval': f"{ci.group(1)}-{ci.group(2)}" if ci else "Not reported",
+        'p_value': re.sub(r'\s+', ' ', p_value.group(1)) if p_value else "Not reported",
+        'analysis': analysis,
+        'data_quality': ("High" if confidence >= 0.9 else
+                         "Medium" if confidence >= KM_DIGITIZER_MIN_CONFIDENCE else "Low"),
+        'confidence': round(confidence, 3),
+        'method': 'local_digitizer',
+        'curves': [{'hue': arm['hue'], 'median': arm['median']} for arm in (treatment, control)]
+    }
\ No newline at end of file
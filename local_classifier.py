@@ -0,0 +1,222 @@
+# src/analyzers/local_classifier.py
+"""
+Rule-based pre-classification of trials, before any model call
+
+`therapeutic_area`, `disease_category` and `intervention_class` mostly follow
+from a trial's structured `conditions` and `interventions[].type`. Conditions
+(and, with less weight, the title) are matched against a condition
+vocabulary with one precompiled multi-pattern matcher; intervention types
+map directly to a class. Each result carries a confidence: agreement between
+the matched conditions and a single unambiguous intervention type score high,
+no or conflicting matches score low. Confident trials only need the model for
+the judgement fields (population, innovation, commercial potential, insights).
+"""
+
+from collections import Counter
+from src.utils.keyword_matcher import KeywordMatcher
+
+# therapeutic area -> disease category -> terms (matched as whole words, case/punctuation-insensitive)
+CONDITION_VOCABULARY = {
+    'Oncology': {
+        'Hematologic Malignancy': ['lymphoma', 'lymphomas', 'leukemia', 'leukaemia', 'myeloma', 'multiple myeloma',
+                                   'myelodysplastic syndrome', 'myelodysplastic syndromes', 'hodgkin disease',
+                                   'b cell lymphoma', 'large b cell lymphoma', 'mantle cell lymphoma',
+                                   'follicular lymphoma', 'acute lymphoblastic leukemia', 'acute myeloid leukemia',
+                                   'chronic lymphocytic leukemia', 'myeloproliferative neoplasm', 'waldenstrom'],
+        'Lung Cancer': ['lung cancer', 'non small cell lung cancer', 'nsclc', 'small cell lung cancer', 'sclc',
+                        'lung adenocarcinoma', 'carcinoma non small cell lung', 'squamous cell lung cancer',
+                        'lung carcinoma', 'mesothelioma'],
+        'Breast Cancer': ['breast cancer', 'breast carcinoma', 'breast neoplasms', 'triple negative breast cancer'],
+        'Gastrointestinal Cancer': ['colorectal cancer', 'colon cancer', 'rectal cancer', 'gastric cancer',
+                                    'pancreatic cancer', 'pancreatic adenocarcinoma', 'hepatocellular carcinoma',
+                                    'liver cancer', 'esophageal cancer', 'cholangiocarcinoma', 'biliary tract cancer'],
+        'Genitourinary Cancer': ['prostate cancer', 'bladder cancer', 'urothelial carcinoma', 'renal cell carcinoma',
+                                 'kidney cancer'],
+        'Gynecologic Cancer': ['ovarian cancer', 'ovarian carcinoma', 'cervical cancer', 'endometrial cancer'],
+        'CNS Tumor': ['glioblastoma', 'glioma', 'brain tumor', 'brain tumors', 'medulloblastoma'],
+        'Skin Cancer': ['melanoma', 'merkel cell carcinoma', 'basal cell carcinoma'],
+        'Head and Neck Cancer': ['head and neck cancer', 'head and neck squamous cell carcinoma', 'nasopharyngeal carcinoma',
+                                 'thyroid cancer'],
+        'Sarcoma': ['sarcoma', 'osteosarcoma', 'ewing sarcoma'],
+        'Solid Tumor': ['solid tumor', 'solid tumors', 'advanced solid tumors', 'neoplasms', 'cancer', 'carcinoma',
+                        'metastatic cancer', 'tumor']
+    },
+    'Cardiology': {
+        'Heart Failure': ['heart failure', 'cardiomyopathy'],
+        'Arrhythmia': ['atrial fibrillation', 'arrhythmia', 'ventricular tachycardia'],
+        'Coronary Artery Disease': ['coronary artery disease', 'myocardial infarction', 'acute coronary syndrome',
+                                    'angina'],
+        'Hypertension': ['hypertension', 'pulmonary arterial hypertension'],
+        'Dyslipidemia': ['hypercholesterolemia', 'dyslipidemia', 'hyperlipidemia']
+    },
+    'Neurology': {
+        'Neurodegenerative Disease': ['alzheimer disease', 'alzheimers disease', 'alzheimer s disease',
+                                      'parkinson disease', 'parkinsons disease', 'parkinson s disease',
+                                      'amyotrophic lateral sclerosis', 'huntington disease', 'dementia'],
+        'Multiple Sclerosis': ['multiple sclerosis'],
+        'Epilepsy': ['epilepsy', 'seizures'],
+        'Stroke': ['stroke', 'ischemic stroke'],
+        'Migraine': ['migraine']
+    },
+    'Immunology': {
+        'Autoimmune Disease': ['systemic lupus erythematosus', 'lupus', 'lupus nephritis', 'rheumatoid arthritis',
+                               'psoriasis', 'psoriatic arthritis', 'ankylosing spondylitis', 'sjogren syndrome',
+                               'myasthenia gravis', 'systemic sclerosis'],
+        'Inflammatory Bowel Disease': ['crohn disease', 'crohns disease', 'crohn s disease', 'ulcerative colitis'],
+        'Atopic Disease': ['atopic dermatitis', 'eczema']
+    },
+    'Infectious Disease': {
+        'Viral Infection': ['hiv', 'hiv infections', 'hepatitis b', 'hepatitis c', 'covid 19', 'sars cov 2',
+                            'influenza', 'rsv', 'respiratory syncytial virus', 'cytomegalovirus'],
+        'Bacterial Infection': ['tuberculosis', 'sepsis', 'pneumonia', 'bacterial infections'],
+        'Parasitic Infection': ['malaria']
+    },
+    'Endocrinology': {
+        'Diabetes': ['diabetes', 'type 2 diabetes', 'type 1 diabetes', 'diabetes mellitus', 'type 2 diabetes mellitus'],
+        'Obesity': ['obesity', 'overweight'],
+        'Metabolic Disease': ['nash', 'nonalcoholic steatohepatitis', 'metabolic syndrome']
+    },
+    'Respiratory': {
+        'Obstructive Lung Disease': ['asthma', 'copd', 'chronic obstructive pulmonary disease'],
+        'Cystic Fibrosis': ['cystic fibrosis'],
+        'Interstitial Lung Disease': ['idiopathic pulmonary fibrosis', 'pulmonary fibrosis']
+    },
+    'Psychiatry': {
+        'Mood Disorder': ['depression', 'major depressive disorder', 'bipolar disorder'],
+        'Psychotic Disorder': ['schizophrenia'],
+        'Anxiety Disorder': ['anxiety', 'generalized anxiety disorder', 'ptsd', 'post traumatic stress disorder'],
+        'Substance Use Disorder': ['opioid use disorder', 'alcohol use disorder', 'smoking cessation']
+    },
+    'Hematology': {
+        'Inherited Blood Disorder': ['sickle cell disease', 'sickle cell anemia', 'hemophilia', 'hemophilia a',
+                                     'hemophilia b', 'thalassemia', 'beta thalassemia'],
+        'Anemia': ['anemia', 'iron deficiency anemia']
+    }
+}
+
+# Condition entries that describe a biomarker or a complication rather than a disease - neutral evidence
+NEUTRAL_CONDITIONS = ['egfr mutation', 'kras g12c', 'alk rearrangement', 'her2 positive', 'braf v600e',
+                      'cytokine release syndrome', 'healthy volunteers', 'healthy']
+
+# ClinicalTrials.gov intervention type -> intervention_class
+INTERVENTION_CLASSES = {
+    'DRUG': 'Drug',
+    'BIOLOGICAL': 'Biological',
+    'DEVICE': 'Device',
+    'PROCEDURE': 'Procedure',
+    'RADIATION': 'Radiation',
+    'BEHAVIORAL': 'Behavioral',
+    'GENETIC': 'Genetic',
+    'DIETARY_SUPPLEMENT': 'Dietary Supplement',
+    'COMBINATION_PRODUCT': 'Combination Product',
+    'DIAGNOSTIC_TEST': 'Diagnostic Test'
+}
+# Interventions that are the comparator, not what the trial studies
+COMPARATOR_NAMES = ('placebo', 'standard of care', 'best supportive care', 'observation', 'sham')
+# Terms and some intervention names that mean cell or gene therapy whatever the listed type
+CELL_THERAPY_TERMS = ('car t', 'car-t', 'chimeric antigen receptor', 'cell therapy', 'gene therapy', 'tcr t')
+
+TITLE_WEIGHT = 0.5  # A title match counts half a condition match
+
+_matcher = None
+
+def _condition_matcher():
+    """Built on first use - the vocabulary compiles into one automaton"""
+    global _matcher
+    if _matcher is None:
+        terms = {term: (area, category) for area, categories in CONDITION_VOCABULARY.items()
+                 for category, words in categories.items() for term in words}
+        terms.update({term: None for term in NEUTRAL_CONDITIONS})
+        _matcher = KeywordMatcher(terms)
+    return _matcher
+
+def _classify_disease(trial):
+    """(therapeutic_area, disease_category, confidence)"""
+    matcher = _condition_matcher()
+    votes = Counter()
+    unmatched = 0
+    for condition in trial.get('conditions', []):
+        hits = matcher.find(condition)
+        labels = [payload for _, payload in hits if payload]
+        if not hits:
+            unmatched += 1
+        # A condition votes once, for its most specific (first, longest) match
+        if labels:
+            votes[labels[0]] += 1.0
+    for _, payload in matcher.find(trial.get('title', '')):
+        if payload:
+            votes[payload] += TITLE_WEIGHT
+
+    if not votes:
+        return None, None, 0.0
+
+    areas = Counter()
+    for (area, _), weight in votes.items():
+        areas[area] += weight
+    area, area_votes = areas.most_common(1)[0]
+    # 'Solid Tumor' is the catch-all - prefer any more specific category of the same area
+    categories = Counter({category: weight for (a, category), weight in votes.items() if a == area})
+    specific = Counter({c: w for c, w in categories.items() if c != 'Solid Tumor'}) or categories
+    category, category_votes = specific.most_common(1)[0]
+
+    total = sum(areas.values())
+    confidence = area_votes / total  # Conflicting areas lower it
+    confidence *= category_votes / sum(specific.values())
+    if unmatched:
+        confidence *= 0.8 ** unmatched  # Conditions the vocabulary does not know
+    if not any(trial.get('conditions', [])):
+        confidence *= 0.7  # Title only
+    return area, category, round(confidence, 3)
+
+def _classify_intervention(trial):
+    """(intervention_class, confidence)"""
+    interventions = [i for i in trial.get('interventions', [])
+                     if not any(name in i.get('name', '').lower() for name in COMPARATOR_NAMES)]
+    if not interventions:
+        return None, 0.0
+
+    text = ' '.join([trial.get('title', '')] + [i.get('name', '') for i in interventions]).lower()
+    if any(term in text for term in CELL_THERAPY_TERMS):
+        return 'Biological', 1.0
+
+    classes = Counter(INTERVENTION_CLASSES.get(str(i.get('type', '')).upper().replace(' ', '_'), 'Other')
+                      for i in interventions)
+    intervention_class, count = classes.most_common(1)[0]
+    if len(classes) == 1:
+        return intervention_class, 1.0 if intervention_class != 'Other' else 0.5
+    # Mixed types, e.g. drug plus radiation - the majority type, named with the rest
+    return '/'.join(name for name, _ in classes.most_common()), round(0.6 * count / sum(classes.values()) + 0.2, 3)
+
+def classify_locally(trial):
+    """
+    Deterministic part of a classification
+
+    Returns:
+        {'therapeutic_area', 'disease_category', 'intervention_class', 'confidence'} -
+        fields that could not be determined are None and pull confidence to 0
+    """
+    area, category, disease_confidence = _classify_disease(trial)
+    intervention_class, intervention_confidence = _classify_intervention(trial)
+    return {
+        'therapeutic_area': area,
+        'disease_category': category,
+        'intervention_class': intervention_class,
+        'confidence': round(min(disease_confidence, intervention_confidence), 3)
+    }
+
+def _words(text):
+    return set(str(text or '').lower().replace('-', ' ').replace('/', ' ').split())
+
+def agreement(local, model):
+    """
+    Per-field agreement of a local classification with the model's
+
+    therapeutic_area must match exactly (case-insensitive); disease_category
+    and intervention_class agree when they share a word ('Biological' vs
+    'Biological - CAR-T Cell Therapy').
+    """
+    return {
+        'therapeutic_area': str(local['therapeutic_area']).lower() == str(model.get('therapeutic_area')).lower(),
+        'disease_category': bool(_words(local['disease_category']) & _words(model.get('disease_category'))),
+        'intervention_class': bool(_words(local['intervention_class']) & _words(model.get('intervention_class')))
+    }
\ No newline at end of file
@@ -0,0 +1,282 @@
+# src/utils/materialized_views.py
+"""
+Precomputed dashboard views, kept fresh in the background
+
+A view materializes what the dashboard asks for about one condition: the
+search results (VIEW_MAX_RESULTS trials), every one of those trials'
+analyses, and the compare_trials summary of the first DEMO_ANALYZE_TRIALS
+(the set /api/analyze compares). The API answers a search or analysis a
+view covers straight from it, with the view's age, instead of paying the
+ClinicalTrials.gov and model latency.
+
+Precomputer refreshes the views of DEMO_DISEASE_AREAS and the
+VIEW_POPULAR_CONDITIONS most-requested conditions once they are older than
+VIEW_REFRESH_SECONDS. A refresh re-runs the search but only re-analyzes
+trials whose tracked fields (change_detection) moved or whose last analysis
+fell back to defaults, and only re-compares when the compared set changed.
+Its model calls run at 'batch' priority, behind dashboard requests.
+
+Views and request counts live in one SQLite database (VIEW_STORE_PATH, WAL
+mode), so every API worker process serves the views one precompute job
+writes and counts requests towards the same popularity ranking.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from src.utils.change_detection import tracked_fields, fingerprint
+from src.analyzers.trial_analyzer import ANALYSIS_FAILED, MODEL_UNAVAILABLE
+from config.settings import (VIEW_STORE_PATH, VIEW_REFRESH_SECONDS, VIEW_MAX_AGE_SECONDS, VIEW_MAX_RESULTS,
+                             VIEW_POPULAR_CONDITIONS, DEMO_ANALYZE_TRIALS, DEMO_DISEASE_AREAS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS views (key TEXT PRIMARY KEY, condition TEXT, payload TEXT, refreshed_at REAL);
+CREATE TABLE IF NOT EXISTS requests (key TEXT PRIMARY KEY, condition TEXT, count INTEGER, last_requested REAL);
+"""
+
+def view_key(condition):
+    """Conditions differing only in case or surrounding spaces share a view"""
+    return ' '.join(condition.split()).lower()
+
+def live_freshness():
+    """Freshness of a response computed for this request"""
+    return {'source': 'live', 'refreshed_at': datetime.now().isoformat(), 'age_seconds': 0.0, 'stale': False}
+
+class MaterializedView:
+    """One condition's precomputed search results, analyses and comparison"""
+
+    def __init__(self, payload, refreshed_at):
+        self.condition = payload['condition']
+        self.trials = payload['trials']
+        self.analyses = payload['analyses']
+        self.compared = payload['compared']
+        self.summary = payload['summary']
+        self.max_results = payload['max_results']
+        self.refreshed_at = refreshed_at
+        self._answers = {}  # Repeated requests get the same objects, so cursors into them stay valid
+
+    def age(self):
+        return time.time() - self.refreshed_at
+
+    def freshness(self):
+        return {'source': 'materialized', 'refreshed_at': datetime.fromtimestamp(self.refreshed_at).isoformat(),
+                'age_seconds': round(self.age(), 1), 'stale': self.age() > VIEW_REFRESH_SECONDS}
+
+    def search(self, max_results):
+        """The first `max_results` trials, or None if a search for that many could find more than the view holds"""
+        if self.max_results is not None and max_results > self.max_results:
+            return None
+        key = ('search', max_results)
+        if key not in self._answers:
+            self._answers[key] = self.trials[:max_results]
+        return self._answers[key]
+
+    def analysis(self, trials):
+        """{'trials' (with 'analysis'), 'summary'} of `trials` if they are the view's compared set, else None"""
+        nct_ids = [trial['nct_id'] for trial in trials]
+        if nct_ids != self.compared or any(nct_id not in self.analyses for nct_id in nct_ids):
+            return None
+        if 'analysis' not in self._answers:
+            self._answers['analysis'] = {
+                'trials': [{**trial, 'analysis': self.analyses[trial['nct_id']]} for trial in trials],
+                'summary': self.summary
+            }
+        return self._answers['analysis']
+
+class ViewStore:
+    """
+    Args:
+        path: SQLite database shared by the API workers and the precompute job
+    """
+
+    def __init__(self, path=VIEW_STORE_PATH):
+        self.path = path
+        self._local = threading.local()  # One connection per thread
+        self._lock = threading.Lock()
+        self._views = {}  # key -> MaterializedView, reparsed only when the stored one is newer
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._local.db = db
+        return db
+
+    def get(self, condition, max_age=VIEW_MAX_AGE_SECONDS):
+        """The condition's view, or None if there is none or it is older than `max_age` seconds"""
+        key = view_key(condition)
+        row = self._db().execute("SELECT refreshed_at FROM views WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[0] > max_age:
+            return None
+        with self._lock:
+            view = self._views.get(key)
+            if view is None or view.refreshed_at != row[0]:
+                payload, refreshed_at = self._db().execute("SELECT payload, refreshed_at FROM views WHERE key = ?",
+                                                           (key,)).fetchone()
+                view = self._views[key] = MaterializedView(json.loads(payload), refreshed_at)
+        return view
+
+    def put(self, condition, trials, analyses, compared, summary, max_results=None):
+        """
+        Store a condition's view; returns it
+
+        Args:
+            max_results: What the search that found `trials` asked for (None: it found every trial)
+        """
+        payload = {'condition': condition, 'trials': trials, 'analyses': analyses, 'compared': compared,
+                   'summary': summary, 'max_results': max_results}
+        refreshed_at = time.time()
+        self._db().execute("INSERT OR REPLACE INTO views VALUES (?, ?, ?, ?)",
+                           (view_key(condition), condition, json.dumps(payload), refreshed_at))
+        return MaterializedView(payload, refreshed_at)
+
+    def ages(self):
+        """{condition: seconds since its view was refreshed}"""
+        now = time.time()
+        return {condition: now - refreshed_at for condition, refreshed_at in
+                self._db().execute("SELECT condition, refreshed_at FROM views")}
+
+    def record_request(self, condition, served):
+        """Count a dashboard request for `condition` towards popular(); `served` = answered from a view"""
+        with self._lock:
+            if served:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._db().execute("INSERT INTO requests VALUES (?, ?, 1, ?) ON CONFLICT (key) DO UPDATE SET count = count + 1, "
+                           "condition = excluded.condition, last_requested = excluded.last_requested",
+                           (view_key(condition), ' '.join(condition.split()), time.time()))
+
+    def popular(self, limit=VIEW_POPULAR_CONDITIONS):
+        """The most-requested conditions, most requested first"""
+        return [condition for (condition,) in self._db().execute(
+            "SELECT condition FROM requests ORDER BY count DESC, last_requested DESC LIMIT ?", (limit,))]
+
+    def report(self):
+        return {
+            'views': {condition: round(age, 1) for condition, age in self.ages().items()},
+            'hits': self.hits,
+            'misses': self.misses,
+            'popular': self.popular()
+        }
+
+class Precomputer:
+    """
+    Keeps the views of configured and popular conditions fresh
+
+    Args:
+        store: ViewStore to write
+        scraper: ClinicalTrialsScraper (anything with search_trials)
+        analyzer: TrialAnalyzer, ideally with priority='batch'
+        conditions: Always kept fresh (default DEMO_DISEASE_AREAS)
+        popular: How many of the most-requested conditions to add
+        refresh_seconds: A view older than this is refreshed
+    """
+
+    def __init__(self, store, scraper, analyzer, conditions=None, popular=VIEW_POPULAR_CONDITIONS,
+                 refresh_seconds=VIEW_REFRESH_SECONDS, max_results=VIEW_MAX_RESULTS,
+                 compare_trials=DEMO_ANALYZE_TRIALS):
+        self.store = store
+        self.scraper = scraper
+        self.analyzer = analyzer
+        self.configured = list(conditions if conditions is not None else DEMO_DISEASE_AREAS)
+        self.popular = popular
+        self.refresh_seconds = refresh_seconds
+        self.max_results = max_results
+        self.compare_trials = compare_trials
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.analyzed = 0
+
+    def conditions(self):
+        """Configured conditions, then the most-requested ones, without duplicates"""
+        conditions = {}
+        for condition in self.configured + self.store.popular(self.popular):
+            conditions.setdefault(view_key(condition), condition)
+        return list(conditions.values())
+
+    def refresh(self, condition):
+        """
+        Rebuild one condition's view, reusing what has not changed; returns it
+
+        Raises RuntimeError, leaving the stored view alone, when the search finds
+        nothing for a condition that had trials - search_trials reports a failed
+        request as an empty result, and an empty view must not replace a good one.
+        """
+        previous = self.store.get(condition, max_age=float('inf'))
+        trials = self.scraper.search_trials(condition, max_results=self.max_results)
+        if not trials and previous is not None and previous.trials:
+            raise RuntimeError(f"search returned no trials - keeping the view of {len(previous.trials)}")
+
+        analyses = {}
+        if previous is not None:
+            before = {trial['nct_id']: fingerprint(tracked_fields(trial)) for trial in previous.trials}
+            for trial in trials:
+                analysis = previous.analyses.get(trial['nct_id'])
+                if analysis is None or analysis.get('target_population') in (ANALYSIS_FAILED, MODEL_UNAVAILABLE):
+                    continue  # Never analyzed, or only a fallback result - analyze again
+                if before.get(trial['nct_id']) == fingerprint(tracked_fields(trial)):
+                    analyses[trial['nct_id']] = analysis
+        pending = [trial for trial in trials if trial['nct_id'] not in analyses]
+        if pending:
+            for trial in self.analyzer.analyze_batch(pending):
+                analyses[trial['nct_id']] = trial['analysis']
+        self.analyzed += len(pending)
+
+        compared = [trial['nct_id'] for trial in trials[:self.compare_trials]]
+        reanalyzed = {trial['nct_id'] for trial in pending}
+        if previous is not None and previous.compared == compared and not reanalyzed & set(compared):
+            summary = previous.summary
+        else:
+            summary = self.analyzer.compare_trials([{**trial, 'analysis': analyses[trial['nct_id']]}
+                                                    for trial in trials[:self.compare_trials]])
+        self.refreshes += 1
+        # A search that found fewer trials than asked for found all of them
+        return self.store.put(condition, trials, analyses, compared, summary,
+                              self.max_results if len(trials) >= self.max_results else None)
+
+    def run_once(self, force=False):
+        """Refresh every view that is missing or older than refresh_seconds; returns the refreshed conditions"""
+        ages = {view_key(condition): age for condition, age in self.store.ages().items()}
+        refreshed = []
+        for condition in self.conditions():
+            if self._stop.is_set():
+                break
+            if not force and ages.get(view_key(condition), float('inf')) < self.refresh_seconds:
+                continue
+            try:
+                self.refresh(condition)
+                refreshed.append(condition)
+            except Exception as e:  # One failing condition must not stop the others
+                print(f"⚠️ View refresh failed for {condition}: {e}")
+        return refreshed
+
+    def start(self, interval=60.0):
+        """Run in a daemon thread, checking for views to refresh every `interval` seconds"""
+        def loop():
+            while not self._stop.is_set():
+                self.run_once()
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name='view-precompute', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+# Process-wide store, like usage_tracker
+view_store = ViewStore()
\ No newline at end of file
@@ -0,0 +1,54 @@
+# monitor.py
+"""
+Daily monitoring pass - fetch the tracked conditions, report what changed
+since the last run, and reclassify only new and changed trials
+
+    python monitor.py                      # DEMO_DISEASE_AREAS, 100 trials each
+    python monitor.py "Multiple Myeloma"   # specific conditions
+"""
+
+import sys
+from src.scrapers.clinical_trials import ClinicalTrialsScraper
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.utils.change_detection import ChangeDetector
+from src.utils.trial_history import TrialHistory
+from src.utils.usage import usage_tracker
+from config.settings import DEMO_DISEASE_AREAS, USE_MOCK_GEMINI
+
+conditions = sys.argv[1:] or DEMO_DISEASE_AREAS
+
+print("="*60)
+print("📡 TRIALS INTEL - MONITORING PASS")
+print("="*60)
+
+scraper = ClinicalTrialsScraper()
+analyzer = TrialAnalyzer(use_mock=USE_MOCK_GEMINI, priority='batch')
+detector = ChangeDetector()
+print(f"\nSnapshot: {len(detector)} trials from previous runs")
+
+def show(event):
+    if event['type'] != 'changed':
+        print(f"  {'➕' if event['type'] == 'added' else '➖'} {event['nct_id']} {event['type']}")
+        return
+    for change in event['changes']:
+        print(f"  🔄 {event['nct_id']} {change['field']}: {change['old']} → {change['new']}")
+
+detector.subscribe(show)
+
+# Trials matching several conditions are fetched once per condition but tracked once
+trials = {}
+for condition in conditions:
+    for trial in scraper.search_trials(condition, max_results=100):
+        trials.setdefault(trial['nct_id'], trial)
+
+print(f"\n🔍 Comparing {len(trials)} trials with the snapshot...")
+analyzed, events = detector.refresh(list(trials.values()), analyzer)
+
+# Keep every version for point-in-time queries (TrialHistory.as_of)
+history = TrialHistory()
+print(f"🕓 {history.record(list(trials.values()))} new versions in {history.path}")
+
+counts = {kind: sum(event['type'] == kind for event in events) for kind in ('added', 'changed', 'removed')}
+print(f"\n✅ {counts['added']} added, {counts['changed']} changed, "
+      f"{len(analyzed) - counts['added'] - counts['changed']} unchanged")
+print(f"🧠 {usage_tracker.report()['totals']['calls']} model calls")
\ No newline at end of file
@@ -0,0 +1,197 @@
+# src/utils/pdf_layout.py
+"""
+Find figure and table regions on a PDF page without a model
+
+Figures come from embedded images and clusters of vector drawing ops;
+tables from runs of text lines with several aligned numeric columns.
+Captions ("Figure 2", "Table 3", "Kaplan-Meier", "Adverse events") decide
+which vision method each cropped region is routed to.
+"""
+
+import re
+from config.settings import (LAYOUT_MIN_FIGURE_AREA, LAYOUT_MIN_DRAWING_ITEMS, LAYOUT_CLUSTER_GAP,
+                             LAYOUT_LABEL_MARGIN, LAYOUT_CAPTION_DISTANCE, PDF_RENDER_DPI)
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+CAPTION_PATTERN = re.compile(r'^\s*(figure|fig\.|table|supplementary (figure|table))\s*[s\d]', re.IGNORECASE)
+NUMERIC_PATTERN = re.compile(r'^[<>≤≥]?\(?-?\d+(\.\d+)?%?\)?,?$')
+
+SURVIVAL_CUES = ('kaplan-meier', 'kaplan meier', 'survival', 'time to event', 'event-free', 'months since')
+ADVERSE_EVENT_CUES = ('adverse event', 'adverse reaction', 'toxicit', 'safety population', 'grade >=3',
+                      'grade ≥3', 'grade 3')
+
+def route_for(text, kind):
+    """Vision method for a region: 'survival_curve', 'adverse_events' or None (generic)"""
+    lowered = text.lower()
+    if kind == 'figure' and any(cue in lowered for cue in SURVIVAL_CUES):
+        return 'survival_curve'
+    if any(cue in lowered for cue in ADVERSE_EVENT_CUES):
+        return 'adverse_events'
+    return None
+
+def _cluster_rects(weighted_rects, gap):
+    """
+    Merge rectangles that lie within `gap` points of each other
+
+    Args:
+        weighted_rects: [(rect, weight)], weight being e.g. the path's item count
+
+    Returns:
+        [(rect, total_weight)]
+    """
+    # Lines have zero-height rects, which a union would ignore; give them thickness
+    clusters = [(pymupdf.Rect(r.x0 - 0.5, r.y0 - 0.5, r.x1 + 0.5, r.y1 + 0.5), weight)
+                for r, weight in weighted_rects]
+
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for rect, weight in clusters:
+            grown = pymupdf.Rect(rect.x0 - gap, rect.y0 - gap, rect.x1 + gap, rect.y1 + gap)
+            for i, (other, other_weight) in enumerate(result):
+                if grown.intersects(other):
+                    result[i] = (other | rect, other_weight + weight)
+                    merged = True
+                    break
+            else:
+                result.append((rect, weight))
+        clusters = result
+
+    return clusters
+
+def _text_lines(words):
+    """Group words into lines: [(rect, [words])], words as returned by get_text('words')"""
+    lines = {}
+    for word in words:
+        x0, y0, x1, y1, text, block, line = word[:7]
+        lines.setdefault((block, line), []).append(word)
+
+    result = []
+    for line_words in lines.values():
+        line_words.sort(key=lambda w: w[0])
+        rect = pymupdf.Rect(line_words[0][:4])
+        for word in line_words[1:]:
+            rect |= pymupdf.Rect(word[:4])
+        result.append((rect, line_words))
+
+    # Rows of a table are often separate blocks; merge lines sharing a baseline
+    result.sort(key=lambda item: (round(item[0].y1), item[0].x0))
+    rows = []
+    for rect, line_words in result:
+        if rows and abs(rows[-1][0].y1 - rect.y1) < 2:
+            rows[-1] = (rows[-1][0] | rect, sorted(rows[-1][1] + line_words, key=lambda w: w[0]))
+        else:
+            rows.append((rect, line_words))
+    return rows
+
+def _caption_lines(rows):
+    return [(rect, ' '.join(w[4] for w in words)) for rect, words in rows
+            if CAPTION_PATTERN.match(' '.join(w[4] for w in words))]
+
+def _nearest_caption(rect, captions):
+    """Closest caption directly above or below a region"""
+    best, best_distance = None, LAYOUT_CAPTION_DISTANCE
+    for caption_rect, text in captions:
+        if caption_rect.x1 < rect.x0 or caption_rect.x0 > rect.x1:
+            continue
+        distance = min(abs(caption_rect.y0 - rect.y1), abs(rect.y0 - caption_rect.y1))
+        if distance <= best_distance:
+            best, best_distance = text, distance
+    return best or ""
+
+def _table_regions(rows, min_columns=3, min_rows=3):
+    """Runs of consecutive rows with at least `min_columns` numeric cells"""
+    def numeric_cells(words):
+        return sum(1 for w in words if NUMERIC_PATTERN.match(w[4]))
+
+    regions, run = [], []
+    for index, (rect, words) in enumerate(rows):
+        if numeric_cells(words) >= min_columns:
+            run.append(index)
+            continue
+        if len(run) >= min_rows:
+            regions.append(run)
+        run = []
+    if len(run) >= min_rows:
+        regions.append(run)
+
+    tables = []
+    for run in regions:
+        rect = pymupdf.Rect(rows[run[0]][0])
+        for index in run[1:]:
+            rect |= rows[index][0]
+        # Pull in header rows directly above (column titles have no numbers)
+        first = run[0]
+        while first > 0 and rows[first - 1][0].y1 > rect.y0 - 20 and \
+                not CAPTION_PATTERN.match(' '.join(w[4] for w in rows[first - 1][1])):
+            first -= 1
+            rect |= rows[first][0]
+        tables.append((rect, list(range(first, run[-1] + 1))))
+    return tables
+
+def detect_regions(page):
+    """
+    Figure and table regions on a page
+
+    Returns:
+        List of dicts with kind ('figure'/'table'), bbox, caption, route and
+        source ('image', 'vector' or 'text'), in reading order. Text-layer
+        tables also carry their positioned words as rows of (x0, y0, x1, y1, text)
+    """
+    page_rect = page.rect
+    page_area = abs(page_rect) or 1.0
+    rows = _text_lines(page.get_text("words"))
+    captions = _caption_lines(rows)
+    regions = []
+
+    # Embedded raster figures (a page-sized image is a scan, not a figure)
+    for info in page.get_image_info():
+        rect = pymupdf.Rect(info['bbox']) & page_rect
+        if LAYOUT_MIN_FIGURE_AREA <= abs(rect) / page_area < 0.9:
+            regions.append({'kind': 'figure', 'bbox': rect, 'source': 'image'})
+
+    # Vector plots: clusters of many drawing items
+    drawings = [(path['rect'], len(path['items'])) for path in page.get_drawings()]
+    for rect, items in _cluster_rects(drawings, LAYOUT_CLUSTER_GAP):
+        if items >= LAYOUT_MIN_DRAWING_ITEMS and abs(rect & page_rect) / page_area >= LAYOUT_MIN_FIGURE_AREA:
+            regions.append({'kind': 'figure', 'bbox': rect & page_rect, 'source': 'vector'})
+
+    # Grow figures to take in nearby tick labels and legends
+    for region in regions:
+        margin = pymupdf.Rect(region['bbox'].x0 - LAYOUT_LABEL_MARGIN, region['bbox'].y0 - LAYOUT_LABEL_MARGIN,
+                              region['bbox'].x1 + LAYOUT_LABEL_MARGIN, region['bbox'].y1 + LAYOUT_LABEL_MARGIN)
+        # Wide rows are body text, unless they are all numbers (an axis's tick labels)
+        inside = [words for rect, words in rows
+                  if rect.intersects(margin) and
+                  (rect.width < margin.width * 0.8 or all(NUMERIC_PATTERN.match(w[4]) for w in words)) and
+                  not CAPTION_PATTERN.match(' '.join(w[4] for w in words))]
+        for words in inside:
+            for word in words:
+                region['bbox'] = region['bbox'] | pymupdf.Rect(word[:4])
+        region['text'] = ' '.join(w[4] for words in inside for w in words)
+
+    # Text-layer tables, skipping anything already inside a figure
+    for rect, row_indexes in _table_regions(rows):
+        if any(region['bbox'].contains(rect) for region in regions):
+            continue
+        regions.append({'kind': 'table', 'bbox': rect, 'source': 'text',
+                        'text': '\n'.join(' '.join(w[4] for w in rows[i][1]) for i in row_indexes),
+                        'rows': [[tuple(w[:5]) for w in rows[i][1]] for i in row_indexes]})
+
+    for region in regions:
+        region['caption'] = _nearest_caption(region['bbox'], captions)
+        region['route'] = route_for(f"{region['caption']} {region['text']}", region['kind'])
+
+    regions.sort(key=lambda region: (region['bbox'].y0, region['bbox'].x0))
+    return regions
+
+def crop_region(page, region, dpi=PDF_RENDER_DPI, padding=6):
+    """Render just a region to PNG bytes"""
+    bbox = region['bbox']
+    clip = pymupdf.Rect(bbox.x0 - padding, bbox.y0 - padding, bbox.x1 + padding, bbox.y1 + padding) & page.rect
+    return page.get_pixmap(dpi=dpi, clip=clip).tobytes("png")
\ No newline at end of file
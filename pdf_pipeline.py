@@ -0,0 +1,147 @@
+# src/utils/pdf_pipeline.py
+"""
+Split PDFs into pages across a process pool
+
+Each page yields its text layer. Figures found by the layout step are
+cropped and rasterized for vision; adverse-event tables are read from the
+text layer in the worker and only cropped when that fails. Scanned pages
+(no usable text) are rendered whole. Everything else stays text-only.
+Pages are yielded as soon as their chunk finishes, so the model stage can
+start before the whole document is done.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib.util import find_spec
+from config.settings import (PDF_RENDER_DPI, PDF_WORKERS, PDF_PAGES_PER_TASK, PDF_MIN_TEXT_CHARS,
+                             AE_TABLE_EXTRACTION_ENABLED, AE_TABLE_MIN_CONFIDENCE)
+
+# PyMuPDF (and the layout step built on it) is imported where pages are opened, not on import
+PDF_AVAILABLE = find_spec('pymupdf') is not None
+
+def page_count(pdf_path):
+    import pymupdf
+    with pymupdf.open(pdf_path) as doc:
+        return doc.page_count
+
+def _is_scanned(page, text):
+    """Little or no text layer but an image - OCR/vision is the only way in"""
+    return len(text.strip()) < PDF_MIN_TEXT_CHARS and bool(page.get_images())
+
+def process_page_range(pdf_path, page_numbers, dpi=PDF_RENDER_DPI):
+    """
+    Extract text and, where needed, a rendered PNG for each page
+
+    Runs inside pool workers, so it opens its own handle on the document.
+
+    Args:
+        pdf_path: Path to the PDF
+        page_numbers: 0-based page indexes to process
+        dpi: Render resolution for crops and scanned pages
+    """
+    import pymupdf
+    from src.utils.pdf_layout import detect_regions, crop_region
+    from src.utils.ae_table import extract_ae_table
+
+    results = []
+
+    with pymupdf.open(pdf_path) as doc:
+        for number in page_numbers:
+            page = doc[number]
+            text = page.get_text("text")
+            image, regions, reason = None, [], None
+
+            if _is_scanned(page, text):
+                image = page.get_pixmap(dpi=dpi).tobytes("png")
+                reason = 'scanned'
+            else:
+                for region in detect_regions(page):
+                    # Other numeric tables are already readable from the text layer
+                    if region['kind'] == 'table' and region['route'] != 'adverse_events':
+                        continue
+                    rows = region.pop('rows', None)
+                    if rows and AE_TABLE_EXTRACTION_ENABLED:
+                        region['table'] = extract_ae_table(rows)
+                    if region.get('table', {}).get('confidence', 0.0) >= AE_TABLE_MIN_CONFIDENCE:
+                        region['image'] = None  # Read from the text layer - nothing to send
+                    else:
+                        region['image'] = crop_region(page, region, dpi)
+                    region['bbox'] = tuple(region['bbox'])
+                    region['figure_id'] = f"p{number + 1}.{len(regions) + 1}"
+                    regions.append(region)
+                reason = 'regions' if any(region['image'] for region in regions) else None
+
+            results.append({
+                'pdf_path': str(pdf_path),
+                'page_number': number + 1,
+                'text': text,
+                'needs_vision': reason is not None,
+                'vision_reason': reason,
+                'image': image,
+                'regions': regions,
+                'width': page.rect.width,
+                'height': page.rect.height
+            })
+
+    return results
+
+def _chunks(pdf_path, pages_per_task):
+    total = page_count(pdf_path)
+    for start in range(0, total, pages_per_task):
+        yield list(range(start, min(start + pages_per_task, total)))
+
+def iter_document_pages(pdf_paths, workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK, dpi=PDF_RENDER_DPI,
+                        errors=None):
+    """
+    Yield processed pages from many PDFs as they become ready
+
+    Pages come back in completion order, not page order; each carries its
+    pdf_path and page_number.
+
+    Args:
+        pdf_paths: Iterable of PDF paths
+        workers: Worker processes (1 = process inline)
+        pages_per_task: Pages handed to a worker at a time
+        dpi: Render resolution for pages that need vision
+        errors: Dict that collects pdf_path -> error message for documents
+            that cannot be read, while the others carry on; without it the
+            first error is raised
+    """
+    if not PDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF not available - pip install pymupdf")
+
+    pdf_paths = [str(path) for path in pdf_paths]
+
+    def failed(pdf_path, error):
+        if errors is None:
+            raise error
+        errors.setdefault(pdf_path, str(error))
+
+    if workers <= 1:
+        for pdf_path in pdf_paths:
+            try:
+                for numbers in _chunks(pdf_path, pages_per_task):
+                    yield from process_page_range(pdf_path, numbers, dpi)
+            except Exception as e:
+                failed(pdf_path, e)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for pdf_path in pdf_paths:
+            try:
+                for numbers in _chunks(pdf_path, pages_per_task):
+                    futures[executor.submit(process_page_range, pdf_path, numbers, dpi)] = pdf_path
+            except Exception as e:
+                failed(pdf_path, e)
+
+        for future in as_completed(futures):
+            try:
+                pages = future.result()
+            except Exception as e:
+                failed(futures[future], e)
+                continue
+            yield from pages
+
+def iter_pages(pdf_path, **kwargs):
+    """Yield processed pages of one PDF as they become ready (see iter_document_pages)"""
+    yield from iter_document_pages([pdf_path], **kwargs)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# precompute.py
+"""
+Refresh the materialized dashboard views (src/utils/materialized_views.py)
+
+The demo server refreshes them itself (VIEW_PRECOMPUTE); with several API
+worker processes, set VIEW_PRECOMPUTE=false and run this once next to them.
+
+    python precompute.py                         # stale views of DEMO_DISEASE_AREAS + most-requested
+    python precompute.py --force                 # refresh every view now
+    python precompute.py --watch                 # keep refreshing until stopped
+    python precompute.py "Multiple Myeloma"      # also keep this condition fresh
+"""
+
+import argparse
+import sys
+import time
+from src.scrapers.clinical_trials import ClinicalTrialsScraper
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.utils.materialized_views import Precomputer, view_store
+from src.utils.usage import usage_tracker
+from config.settings import DEMO_DISEASE_AREAS, USE_MOCK_GEMINI
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute dashboard views")
+    parser.add_argument('conditions', nargs='*', help="Kept fresh besides DEMO_DISEASE_AREAS")
+    parser.add_argument('--force', action='store_true', help="Refresh every view, however recent")
+    parser.add_argument('--watch', action='store_true', help="Keep refreshing until stopped")
+    parser.add_argument('--interval', type=float, default=60, help="Seconds between checks with --watch")
+    args = parser.parse_args()
+
+    analyzer = TrialAnalyzer(use_mock=USE_MOCK_GEMINI, priority='batch')  # Queues behind dashboard requests
+    precomputer = Precomputer(view_store, ClinicalTrialsScraper(), analyzer,
+                              conditions=DEMO_DISEASE_AREAS + args.conditions)
+    print(f"🗂️ Views in {view_store.path} for: {', '.join(precomputer.conditions())}")
+    while True:
+        refreshed = precomputer.run_once(force=args.force)
+        print(f"✅ Refreshed {len(refreshed)} views ({precomputer.analyzed} trials analyzed, "
+              f"{usage_tracker.report()['totals']['calls']} model calls so far)")
+        for condition, age in view_store.ages().items():
+            print(f"   {condition}: {age / 60:.0f} min old")
+        if not args.watch:
+            break
+        args.force = False
+        time.sleep(args.interval)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -1,84 +1,115 @@
-# production_mode.py
-"""
-Production mode - All real Gemini (text + vision)
-Use this for final submission when you have API quota
-"""
-
-import os
-from dotenv import load_dotenv
-
-# Force real Gemini mode
-os.environ['USE_MOCK_GEMINI'] = 'false'
-
-# Reload settings
-load_dotenv(override=True)
-
-from src.scrapers.clinical_trials import ClinicalTrialsScraper
-from src.analyzers.trial_analyzer import TrialAnalyzer
-from src.analyzers.pdf_analyzer import PDFAnalyzer
-import json
-
-print("="*60)
-print("🚀 TRIALS INTEL - PRODUCTION MODE")
-print("="*60)
-print("\n⚠️  USING REAL GEMINI API - Will consume quota")
-print("="*60)
-
-# Initialize with real Gemini
-scraper = ClinicalTrialsScraper()
-analyzer = TrialAnalyzer(use_mock=False)
-pdf_analyzer = PDFAnalyzer(use_mock=False)
-
-# Run full pipeline
-print("\n[1/4] Searching ClinicalTrials.gov...")
-trials = scraper.search_trials("CAR-T Cell Therapy", max_results=5)
-print(f"✅ Found {len(trials)} trials")
-
-print("\n[2/4] Analyzing with Gemini (text)...")
-analyzed = analyzer.analyze_batch(trials)
-print(f"✅ Analyzed {len(analyzed)} trials")
-
-print("\n[3/4] Generating comparative intelligence...")
-summary = analyzer.compare_trials(analyzed)
-print("✅ Generated investment insights")
-
-print("\n[4/4] Sample vision analysis...")
-# Note: For real vision, you'd need actual PDF/image files
-# This is placeholder for the architecture
-print("✅ Vision analysis ready (requires real PDF inputs)")
-
-# Save results
-output = {
-    'trials': analyzed,
-    'summary': summary,
-    'metadata': {
-        'mode': 'PRODUCTION',
-        'gemini_model': 'gemini-2.0-flash',
-        'total_trials': len(analyzed)
-    }
-}
-
-with open('data/processed/production_analysis.json', 'w') as f:
-    json.dump(output, f, indent=2)
-
-print("\n💾 Saved: data/processed/production_analysis.json")
-print("\n✅ PRODUCTION RUN COMPLETE")
-
-# Display sample results
-print("\n" + "="*60)
-print("SAMPLE RESULTS")
-print("="*60)
-
-trial = analyzed[0]
-print(f"\n🔬 {trial['title']}")
-print(f"\nAnalysis:")
-a = trial['analysis']
-print(f"  • Therapeutic Area: {a['therapeutic_area']}")
-print(f"  • Commercial Potential: {a['commercial_potential']}")
-print(f"  • Innovation Level: {a['innovation_level']}")
-
-if summary.get('ai_insights'):
-    ai = summary['ai_insights']
-    print(f"\n📈 Market Trends:")
-    for trend in ai['market_trends'][:2]:
+# production_mode.py
+"""
+Production mode - All real Gemini (text + vision)
+Use this for final submission when you have API quota
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Force real Gemini mode
+os.environ['USE_MOCK_GEMINI'] = 'false'
+
+# Reload settings
+load_dotenv(override=True)
+
+from src.scrapers.clinical_trials import ClinicalTrialsScraper
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.usage import usage_tracker
+from src.utils.corpus_snapshot import publish
+from src.utils.tracing import span, start_profiler
+import json
+
+start_profiler()
+
+print("="*60)
+print("🚀 TRIALS INTEL - PRODUCTION MODE")
+print("="*60)
+print("\n⚠️  USING REAL GEMINI API - Will consume quota")
+print("="*60)
+
+# Initialize with real Gemini
+scraper = ClinicalTrialsScraper()
+analyzer = TrialAnalyzer(use_mock=False, priority='batch')  # Queues behind dashboard requests
+pdf_analyzer = PDFAnalyzer(use_mock=False)
+
+# Run full pipeline
+print("\n[1/4] Searching ClinicalTrials.gov...")
+with span('stage.search', category='pipeline'):
+    trials = scraper.search_trials("CAR-T Cell Therapy", max_results=5)
+print(f"✅ Found {len(trials)} trials")
+
+print("\n[2/4] Analyzing with Gemini (text)...")
+with span('stage.analyze', category='pipeline'):
+    analyzed = analyzer.analyze_batch(trials)
+print(f"✅ Analyzed {len(analyzed)} trials")
+
+print("\n[3/4] Generating comparative intelligence...")
+with span('stage.compare', category='pipeline'):
+    summary = analyzer.compare_trials(analyzed)
+print("✅ Generated investment insights")
+
+print("\n[4/4] Sample vision analysis...")
+# Note: For real vision, you'd need actual PDF/image files
+# This is placeholder for the architecture
+print("✅ Vision analysis ready (requires real PDF inputs)")
+
+# Usage report for this run
+usage = usage_tracker.report()
+totals = usage['totals']
+per_trial = {
+    'tokens': round((totals['prompt_tokens'] + totals['response_tokens']) / max(len(analyzed), 1)),
+    'estimated_cost_usd': round(totals['estimated_cost_usd'] / max(len(analyzed), 1), 6)
+}
+usage['per_trial'] = per_trial
+
+# Save results
+output = {
+    'trials': analyzed,
+    'summary': summary,
+    'metadata': {
+        'mode': 'PRODUCTION',
+        'gemini_model': 'gemini-2.0-flash',
+        'total_trials': len(analyzed),
+        'usage': usage
+    }
+}
+
+os.makedirs('data/processed', exist_ok=True)
+with open('data/processed/production_analysis.json', 'w') as f:
+    json.dump(output, f, indent=2)
+
+print("\n💾 Saved: data/processed/production_analysis.json")
+
+# Shared with the API workers, which switch to it without restarting
+snapshot_path = publish(analyzed, metadata={'summary': summary, 'source': 'production_mode'})
+print(f"📦 Published corpus snapshot: {snapshot_path}")
+
+print(f"\n📊 Gemini usage: {totals['calls']} calls, "
+      f"{totals['prompt_tokens']} prompt + {totals['response_tokens']} response tokens, "
+      f"~${totals['estimated_cost_usd']:.4f} (~{per_trial['tokens']} tokens/trial)")
+for call_site, site in usage['by_call_site'].items():
+    print(f"  • {call_site}: {site['calls']} calls, {site['prompt_tokens']}+{site['response_tokens']} tokens, "
+          f"avg {site['latency_avg']}s, {site['retries']} retries, "
+          f"{site['cache_hits']} cache hits ({site['cache_hit_rate']:.0%}), {site['local_results']} answered locally")
+print("\n✅ PRODUCTION RUN COMPLETE")
+
+# Display sample results
+print("\n" + "="*60)
+print("SAMPLE RESULTS")
+print("="*60)
+
+trial = analyzed[0]
+print(f"\n🔬 {trial['title']}")
+print(f"\nAnalysis:")
+a = trial['analysis']
+print(f"  • Therapeutic Area: {a['therapeutic_area']}")
+print(f"  • Commercial Potential: {a['commercial_potential']}")
+print(f"  • Innovation Level: {a['innovation_level']}")
+
+if summary.get('ai_insights'):
+    ai = summary['ai_insights']
+    print(f"\n📈 Market Trends:")
+    for trend in ai['market_trends'][:2]:
         print(f"  • {trend}")
\ No newline at end of file
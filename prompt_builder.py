@@ -0,0 +1,100 @@
+# src/utils/prompt_builder.py
+"""
+Prompts assembled to fit a token budget
+
+A prompt is a sequence of sections: fixed text, always sent, and lists of
+items (conditions, interventions, counts, insights) that may be cut. Fixed
+text is counted first; the remaining budget goes to item sections in order
+of priority, each keeping items from its start until the budget runs out,
+and a cut section ends with how many items it left out. Values are written
+compactly ("DRUG: Osimertinib; RADIATION: SBRT" rather than indented JSON).
+
+Token counts use the same ~4 chars/token estimate as the usage report, and
+each built prompt's size, budget and cuts are recorded there per call site.
+"""
+
+from src.utils.usage import estimate_tokens, usage_tracker
+
+CHARS_PER_TOKEN = 4  # Matches estimate_tokens
+
+class PromptBuilder:
+    """
+    Args:
+        budget: Token budget for the whole prompt; fixed text is never cut, so
+            a prompt of fixed text alone may still exceed it
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self._sections = []  # In prompt order
+        self.stats = None  # Set by build()
+
+    def text(self, text):
+        """Fixed text, always included"""
+        self._sections.append({'text': text})
+        return self
+
+    def items(self, name, header, items, priority=1, separator=', '):
+        """
+        Items kept from the start while the budget lasts
+
+        Args:
+            name: Section name, as reported in stats
+            header: Text before the items, e.g. "Conditions: "
+            items: Item strings, most important first
+            priority: Higher-priority sections get budget first; ties go in prompt order
+        """
+        self._sections.append({'name': name, 'header': header, 'items': [str(item) for item in items],
+                               'priority': priority, 'separator': separator})
+        return self
+
+    def build(self, call_site=None):
+        """
+        Join the sections into the prompt, one per line
+
+        Args:
+            call_site: If given, the prompt's stats are recorded in the usage report
+        """
+        fixed = sum(len(s['text']) if 'text' in s else len(s['header']) for s in self._sections)
+        remaining = self.budget * CHARS_PER_TOKEN - fixed - (len(self._sections) - 1)
+
+        kept = {}  # Section index -> items kept
+        for index, section in sorted(((i, s) for i, s in enumerate(self._sections) if 'items' in s),
+                                     key=lambda pair: -pair[1]['priority']):
+            count = 0
+            for item in section['items']:
+                cost = len(item) + (len(section['separator']) if count else 0)
+                # Leave room for the "(+n more)" note unless this is the last item
+                reserve = 0 if count + 1 == len(section['items']) else len(section['separator']) + 12
+                if cost + reserve > remaining:
+                    break
+                remaining -= cost
+                count += 1
+            kept[index] = count
+            if count < len(section['items']):
+                remaining -= len(section['separator']) + 12
+
+        lines, dropped = [], {}  # Section name -> items left out, summed over same-named sections
+        for index, section in enumerate(self._sections):
+            if 'text' in section:
+                lines.append(section['text'])
+                continue
+            shown = section['items'][:kept[index]]
+            left_out = len(section['items']) - kept[index]
+            if left_out:
+                shown.append(f"(+{left_out} more)")
+                dropped[section['name']] = dropped.get(section['name'], 0) + left_out
+            lines.append(section['header'] + section['separator'].join(shown))
+        prompt = '\n'.join(lines)
+
+        full = '\n'.join(s['text'] if 'text' in s else s['header'] + s['separator'].join(s['items'])
+                         for s in self._sections)
+        self.stats = {
+            'tokens': estimate_tokens(prompt),
+            'untrimmed_tokens': estimate_tokens(full),
+            'budget': self.budget,
+            'dropped': dropped
+        }
+        if call_site:
+            usage_tracker.record_prompt(call_site, self.stats)
+        return prompt
\ No newline at end of file
@@ -0,0 +1,136 @@
+# reclassify.py
+"""
+Reclassify many trials across worker processes and machines
+
+Jobs go into a shared queue (WORK_QUEUE_PATH), sharded by nct_id; workers
+lease them, analyze them with TrialAnalyzer and store the results once each.
+Point WORK_QUEUE_PATH at the same database on every node (the SQLite file is
+a local stand-in for a networked queue - keep it on a local disk with all
+nodes' workers on one machine, or on storage with working file locks).
+
+    python reclassify.py enqueue full-2026-10 data/processed/production_analysis.json
+    python reclassify.py enqueue full-2026-10 --condition "Multiple Myeloma" --max-results 1000
+    python reclassify.py work full-2026-10 --processes 8                     # one node
+    python reclassify.py work full-2026-10 --processes 8 --node 1 --nodes 3  # node 1 of 3
+    python reclassify.py status full-2026-10 --watch
+    python reclassify.py export full-2026-10                                 # data/processed/full-2026-10_analysis.json
+    python reclassify.py export full-2026-10 --publish                       # ...and serve it as the API's corpus
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from config.settings import DEMO_DISEASE_AREAS, USE_MOCK_GEMINI, WORK_BATCH_SIZE, ANALYSIS_CONCURRENCY, PROCESSED_DATA_PATH
+from src.utils.work_queue import WorkQueue, worker_shards
+
+def load_trials(args):
+    if args.source:
+        with open(args.source) as f:
+            data = json.load(f)
+        trials = data['trials'] if isinstance(data, dict) else data
+        return [{key: value for key, value in trial.items() if key != 'analysis'} for trial in trials]
+
+    from src.scrapers.clinical_trials import ClinicalTrialsScraper
+    scraper = ClinicalTrialsScraper()
+    trials = {}
+    for condition in args.condition or DEMO_DISEASE_AREAS:
+        for trial in scraper.search_trials(condition, max_results=args.max_results):
+            trials.setdefault(trial['nct_id'], trial)
+    return list(trials.values())
+
+def run_worker(run, index, workers, batch_size, concurrency):
+    """One worker process: its own analyzer and queue connection"""
+    from src.analyzers.trial_analyzer import TrialAnalyzer
+    queue = WorkQueue()
+    analyzer = TrialAnalyzer(use_mock=USE_MOCK_GEMINI, priority='batch')
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    stored = analyzer.work(queue, run, worker, worker_shards(index, workers, queue.shards),
+                           batch_size=batch_size, max_workers=concurrency)
+    print(f"✅ Worker {index}/{workers} ({worker}) stored {stored} results")
+
+def show(progress):
+    print(f"📊 {progress['run']}: {progress['done']}/{progress['total']} done, {progress['leased']} in progress, "
+          f"{progress['pending']} pending, {progress['failed']} failed - {progress['per_second']} trials/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed trial reclassification")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="Add trials to a run")
+    enqueue.add_argument('run')
+    enqueue.add_argument('source', nargs='?', help="Saved analysis or trial list (JSON); default: search")
+    enqueue.add_argument('--condition', action='append', help="Search condition (repeatable)")
+    enqueue.add_argument('--max-results', type=int, default=100)
+
+    work = commands.add_parser('work', help="Run worker processes until the run is finished")
+    work.add_argument('run')
+    work.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    work.add_argument('--node', type=int, default=0, help="This node's index")
+    work.add_argument('--nodes', type=int, default=1, help="Nodes working on the run")
+    work.add_argument('--batch-size', type=int, default=WORK_BATCH_SIZE)
+    work.add_argument('--concurrency', type=int, default=ANALYSIS_CONCURRENCY, help="Model calls per process")
+
+    status = commands.add_parser('status', help="Progress of a run")
+    status.add_argument('run')
+    status.add_argument('--watch', action='store_true', help="Report every few seconds until finished")
+
+    export = commands.add_parser('export', help="Write a run's trials with their analysis")
+    export.add_argument('run')
+    export.add_argument('path', nargs='?')
+    export.add_argument('--publish', action='store_true', help="Also publish as the API's corpus snapshot")
+    args = parser.parse_args()
+
+    queue = WorkQueue()
+
+    if args.command == 'enqueue':
+        trials = load_trials(args)
+        print(f"📥 {queue.enqueue(args.run, trials)} of {len(trials)} trials added to {args.run} "
+              f"({queue.shards} shards in {queue.path})")
+
+    elif args.command == 'work':
+        workers = args.processes * args.nodes
+        first = args.node * args.processes
+        print(f"👷 Starting workers {first}-{first + args.processes - 1} of {workers} on {args.run}")
+        # Spawned, not forked: each worker opens its own database connection and model client
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=run_worker, args=(args.run, index, workers, args.batch_size,
+                                                              args.concurrency))
+                     for index in range(first, first + args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        show(queue.progress(args.run))
+
+    elif args.command == 'status':
+        while True:
+            progress = queue.progress(args.run)
+            show(progress)
+            if not args.watch or progress['complete']:
+                break
+            time.sleep(5)
+        print(f"   by worker: {progress['workers']}")
+        for nct_id, error in list(queue.failures(args.run).items())[:20]:
+            print(f"   ❌ {nct_id}: {error}")
+
+    elif args.command == 'export':
+        results = queue.results(args.run)
+        trials = [{**trial, 'analysis': results[trial['nct_id']]} for trial in queue.trials(args.run)
+                  if trial['nct_id'] in results]
+        path = args.path or os.path.join(PROCESSED_DATA_PATH, f"{args.run}_analysis.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'trials': trials, 'metadata': {'run': args.run, 'progress': queue.progress(args.run)}}, f,
+                      indent=2)
+        print(f"💾 {len(trials)} analyzed trials saved to {path}")
+        if args.publish:
+            from src.utils.corpus_snapshot import publish
+            print(f"📦 Published corpus snapshot: {publish(trials, metadata={'run': args.run})}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
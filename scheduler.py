@@ -0,0 +1,144 @@
+# src/utils/scheduler.py
+"""
+Priority scheduling of model calls sharing one quota
+
+Every model call takes a slot from the process-wide scheduler before it is
+sent. At most MODEL_MAX_CONCURRENCY calls run at once; each priority class
+(SCHEDULER_CLASSES) has its own cap below that, so batch work can never hold
+every slot, and a weight. Waiting calls are served by weighted fair queuing:
+a call's finish tag is its class's previous tag (or the current virtual time,
+if later) plus cost / weight, and the smallest tag among classes under
+their cap goes next. A queue of batch calls has tags stretching far ahead,
+so an interactive call arriving behind them is served next, while batch
+still gets its weighted share when both are busy.
+
+A rate-limited attempt gives its slot back during the retry backoff. A
+hedged request takes a slot of its own, and a request left running after
+its caller timed out holds its slot until it actually finishes.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from config.settings import MODEL_MAX_CONCURRENCY, SCHEDULER_CLASSES, SCHEDULER_DEFAULT_CLASS
+
+WAIT_SAMPLES = 10000  # Recent waits kept per class for percentiles
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+class _Class:
+    def __init__(self, weight, max_concurrency):
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.queue = deque()  # Waiting tickets, FIFO
+        self.running = 0
+        self.last_finish = 0.0
+        self.dispatched = 0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+class QuotaScheduler:
+    """
+    Args:
+        max_concurrency: Calls in flight across all classes
+        classes: {name: {'weight': w, 'max_concurrency': n}}
+        default_class: Class of calls that name none
+    """
+
+    def __init__(self, max_concurrency=MODEL_MAX_CONCURRENCY, classes=SCHEDULER_CLASSES,
+                 default_class=SCHEDULER_DEFAULT_CLASS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_class = default_class
+        self._classes = {name: _Class(config['weight'], max(1, config['max_concurrency']))
+                         for name, config in classes.items()}
+        self._condition = threading.Condition()
+        self._running = 0
+        self._virtual_time = 0.0
+
+    def _dispatch(self):
+        """Grant slots to the smallest finish tags while any are free (lock held)"""
+        while self._running < self.max_concurrency:
+            ready = [c for c in self._classes.values() if c.queue and c.running < c.max_concurrency]
+            if not ready:
+                break
+            chosen = min(ready, key=lambda c: c.queue[0]['finish'])
+            ticket = chosen.queue.popleft()
+            ticket['granted'] = True
+            self._virtual_time = max(self._virtual_time, ticket['start'])
+            chosen.running += 1
+            chosen.dispatched += 1
+            self._running += 1
+        self._condition.notify_all()
+
+    def acquire(self, priority=None, cost=1.0):
+        """
+        Wait for one of the shared slots; returns the function that gives it back
+
+        For a slot that outlives the caller's block - a request still running
+        after its caller timed out keeps its slot until it finishes. Releasing
+        twice is harmless.
+
+        Args:
+            priority: Class name (default SCHEDULER_DEFAULT_CLASS)
+            cost: Relative size of the call (e.g. prompt tokens) - fair
+                queuing shares cost, not call counts, between classes
+        """
+        name = priority or self.default_class
+        if name not in self._classes:
+            raise ValueError(f"Unknown priority class '{name}' (expected one of {sorted(self._classes)})")
+        klass = self._classes[name]
+        enqueued = time.perf_counter()
+
+        with self._condition:
+            start = max(self._virtual_time, klass.last_finish)
+            klass.last_finish = start + max(cost, 1.0) / klass.weight
+            ticket = {'start': start, 'finish': klass.last_finish, 'granted': False, 'released': False}
+            klass.queue.append(ticket)
+            self._dispatch()
+            while not ticket['granted']:
+                self._condition.wait()
+            klass.waits.append(time.perf_counter() - enqueued)
+
+        def release():
+            with self._condition:
+                if ticket['released']:
+                    return
+                ticket['released'] = True
+                klass.running -= 1
+                self._running -= 1
+                self._dispatch()
+        return release
+
+    @contextmanager
+    def slot(self, priority=None, cost=1.0):
+        """Hold one of the shared slots for the duration of the block (see acquire)"""
+        release = self.acquire(priority, cost)
+        try:
+            yield
+        finally:
+            release()
+
+    def report(self):
+        """Per class: running, queued, dispatched and wait-time percentiles (ms)"""
+        with self._condition:
+            classes = {name: (c.running, len(c.queue), c.dispatched, list(c.waits), c.weight, c.max_concurrency)
+                       for name, c in self._classes.items()}
+            running = self._running
+        report = {'max_concurrency': self.max_concurrency, 'running': running, 'classes': {}}
+        for name, (class_running, queued, dispatched, waits, weight, cap) in classes.items():
+            report['classes'][name] = {
+                'weight': weight,
+                'max_concurrency': cap,
+                'running': class_running,
+                'queued': queued,
+                'dispatched': dispatched,
+                **{f'wait_p{pct}_ms': round(_percentile(waits, pct) * 1000, 3) for pct in (50, 95, 99)}
+            }
+        return report
+
+# Shared scheduler for the process
+scheduler = QuotaScheduler()
\ No newline at end of file
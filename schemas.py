@@ -0,0 +1,178 @@
+# src/utils/schemas.py
+"""JSON response schemas shared by the analyzers, the mock model and the validators"""
+
+# Schemas use the OpenAPI subset accepted by Gemini's `response_schema`
+# (type, description, enum, items, properties, required, nullable).
+
+TRIAL_CLASSIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "therapeutic_area": {"type": "string", "description": "Oncology/Cardiology/Neurology/etc"},
+        "disease_category": {"type": "string", "description": "specific disease type"},
+        "intervention_class": {"type": "string", "description": "Drug/Device/Biological/etc"},
+        "target_population": {"type": "string"},
+        "innovation_level": {"type": "string", "enum": ["Novel", "Incremental", "Standard"]},
+        "commercial_potential": {"type": "string", "enum": ["High", "Medium", "Low"]},
+        "key_insights": {"type": "array", "items": {"type": "string"}, "description": "3 short insights"}
+    },
+    "required": ["therapeutic_area", "disease_category", "intervention_class", "target_population",
+                 "innovation_level", "commercial_potential", "key_insights"]
+}
+
+# The judgement part of a classification - what the local pre-classifier cannot fill in
+ASSESSMENT_FIELDS = ["target_population", "innovation_level", "commercial_potential", "key_insights"]
+TRIAL_ASSESSMENT_SCHEMA = {
+    "type": "object",
+    "properties": {field: TRIAL_CLASSIFICATION_SCHEMA["properties"][field] for field in ASSESSMENT_FIELDS},
+    "required": ASSESSMENT_FIELDS
+}
+
+TRIAL_COMPARISON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "market_trends": {"type": "array", "items": {"type": "string"}},
+        "investment_opportunities": {"type": "array", "items": {"type": "string"}},
+        "competitive_landscape": {"type": "string"},
+        "risk_factors": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["market_trends", "investment_opportunities", "competitive_landscape",
+                 "risk_factors", "recommendations"]
+}
+
+SURVIVAL_CURVE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "median_survival_treatment": {"type": "number", "nullable": True, "description": "months"},
+        "median_survival_control": {"type": "number", "nullable": True, "description": "months"},
+        "hazard_ratio": {"type": "number", "nullable": True},
+        "confidence_interval": {"type": "string", "description": "95% CI"},
+        "p_value": {"type": "string"},
+        "analysis": {"type": "string", "description": "brief clinical significance"},
+        "data_quality": {"type": "string", "enum": ["High", "Medium", "Low"]}
+    },
+    "required": ["median_survival_treatment", "median_survival_control", "hazard_ratio",
+                 "confidence_interval", "p_value", "analysis", "data_quality"]
+}
+
+ADVERSE_EVENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "grade_3_plus_treatment": {"type": "number", "nullable": True, "description": "percent"},
+        "grade_3_plus_control": {"type": "number", "nullable": True, "description": "percent"},
+        "most_common_ae": {"type": "string"},
+        "most_common_ae_rate": {"type": "number", "nullable": True, "description": "percent"},
+        "serious_aes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "event": {"type": "string"},
+                    "rate": {"type": "number", "description": "percent, any grade, treatment arm"},
+                    "grade_3_plus_rate": {"type": "number", "nullable": True, "description": "percent"},
+                    "control_rate": {"type": "number", "nullable": True, "description": "percent, any grade"}
+                },
+                "required": ["event", "rate"]
+            }
+        },
+        "analysis": {"type": "string"}
+    },
+    "required": ["grade_3_plus_treatment", "grade_3_plus_control", "most_common_ae",
+                 "most_common_ae_rate", "serious_aes", "analysis"]
+}
+
+PAGE_FIGURES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "figure_type": {"type": "string",
+                        "enum": ["survival_curve", "adverse_events_table", "forest_plot", "other"]},
+        "findings": {"type": "string", "description": "quantitative results shown, with numbers"}
+    },
+    "required": ["figure_type", "findings"]
+}
+
+TRIAL_RESULTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "primary_endpoint_met": {"type": "boolean", "nullable": True},
+        "primary_endpoint": {"type": "string"},
+        "primary_result": {"type": "string", "description": "effect size, CI and p-value"},
+        "secondary_endpoints": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "endpoint": {"type": "string"},
+                    "result": {"type": "string"}
+                },
+                "required": ["endpoint", "result"]
+            }
+        },
+        "safety_summary": {"type": "string"},
+        "conclusion": {"type": "string"}
+    },
+    "required": ["primary_endpoint_met", "primary_endpoint", "primary_result",
+                 "secondary_endpoints", "safety_summary", "conclusion"]
+}
+
+SCHEMAS = {
+    'trial_classification': TRIAL_CLASSIFICATION_SCHEMA,
+    'trial_assessment': TRIAL_ASSESSMENT_SCHEMA,
+    'trial_comparison': TRIAL_COMPARISON_SCHEMA,
+    'survival_curve': SURVIVAL_CURVE_SCHEMA,
+    'adverse_events': ADVERSE_EVENTS_SCHEMA,
+    'page_figures': PAGE_FIGURES_SCHEMA,
+    'trial_results': TRIAL_RESULTS_SCHEMA
+}
+
+# Value used for a missing field when the caller gives no explicit default
+TYPE_DEFAULTS = {
+    'string': "Unknown",
+    'array': [],
+    'object': {},
+    'number': None,
+    'integer': None,
+    'boolean': None
+}
+
+def schema_name(schema):
+    """Return the registered name of a schema, or None if it isn't one of ours"""
+    for name, registered in SCHEMAS.items():
+        if schema is registered or schema == registered:
+            return name
+    return None
+
+def json_generation_config(schema):
+    """Generation config asking Gemini for JSON constrained to `schema`"""
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema
+    }
+
+def missing_fields(data, schema):
+    """List required fields of `schema` that are absent from `data`"""
+    return [field for field in schema.get('required', []) if field not in data]
+
+def conform(data, schema, defaults=None):
+    """
+    Fill missing required fields so `data` matches `schema`
+
+    Args:
+        data: Parsed JSON object from the model
+        schema: One of the schemas above
+        defaults: Optional {field: value} overriding the per-type defaults
+    """
+    defaults = defaults or {}
+    properties = schema.get('properties', {})
+
+    for field in schema.get('required', []):
+        if field in data:
+            continue
+        if field in defaults:
+            value = defaults[field]
+        else:
+            value = TYPE_DEFAULTS.get(properties.get(field, {}).get('type'), "Unknown")
+        # Never share the mutable defaults between results
+        data[field] = list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+
+    return data
\ No newline at end of file
@@ -1,30 +1,165 @@
-# config/settings.py
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# API Keys
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-
-# Gemini Settings
-GEMINI_MODEL = "gemini-2.0-flash"
-USE_MOCK_GEMINI = os.getenv('USE_MOCK_GEMINI', 'true').lower() == 'true'
-
-# ClinicalTrials.gov API
-CLINICAL_TRIALS_BASE_URL = "https://clinicaltrials.gov/api/v2/studies"
-
-# Processing Settings
-MAX_TRIALS_TO_FETCH = 20  # Start small
-PDF_STORAGE_PATH = "data/raw/pdfs"
-PROCESSED_DATA_PATH = "data/processed"
-
-# Demo Settings
-DEMO_DISEASE_AREAS = [
-    "CAR-T Cell Therapy",
-    "Non-Small Cell Lung Cancer"
-]
-
-# Create directories
-os.makedirs(PDF_STORAGE_PATH, exist_ok=True)
-os.makedirs(PROCESSED_DATA_PATH, exist_ok=True)
\ No newline at end of file
+# config/settings.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# API Keys
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+
+# Gemini Settings
+GEMINI_MODEL = "gemini-2.0-flash"
+USE_MOCK_GEMINI = os.getenv('USE_MOCK_GEMINI', 'true').lower() == 'true'
+USE_STRUCTURED_OUTPUT = os.getenv('USE_STRUCTURED_OUTPUT', 'true').lower() == 'true'  # Schema-constrained JSON responses
+
+# Gemini retries and cost accounting (USD per 1M tokens, gemini-2.0-flash list price)
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '3'))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv('GEMINI_RETRY_BASE_DELAY', '2.0'))  # seconds, doubled per retry
+GEMINI_INPUT_PRICE_PER_1M = float(os.getenv('GEMINI_INPUT_PRICE_PER_1M', '0.10'))
+GEMINI_OUTPUT_PRICE_PER_1M = float(os.getenv('GEMINI_OUTPUT_PRICE_PER_1M', '0.40'))
+GEMINI_BUDGET_USD = float(os.getenv('GEMINI_BUDGET_USD')) if os.getenv('GEMINI_BUDGET_USD') else None
+
+# Model call scheduling - calls share one quota; interactive ones go ahead of queued batch work
+MODEL_MAX_CONCURRENCY = int(os.getenv('MODEL_MAX_CONCURRENCY', '16'))  # Calls in flight per process
+SCHEDULER_CLASSES = {  # Weighted fair queuing between classes, each capped below the total
+    'interactive': {'weight': 8, 'max_concurrency': 16},
+    'batch': {'weight': 1, 'max_concurrency': int(os.getenv('SCHEDULER_BATCH_MAX_CONCURRENCY', '12'))}
+}
+SCHEDULER_DEFAULT_CLASS = 'interactive'
+
+# Tail latency - an attempt slower than the HEDGE_PERCENTILE of its call site's recent ones is sent again
+# and the first answer wins; extra requests are capped at HEDGE_MAX_FRACTION of calls
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'true').lower() == 'true'
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = 20  # Latencies seen before a call site is hedged
+HEDGE_MAX_FRACTION = float(os.getenv('HEDGE_MAX_FRACTION', '0.05'))
+MODEL_CALL_TIMEOUT = float(os.getenv('MODEL_CALL_TIMEOUT', '120'))  # seconds per attempt, 0 = none
+# Circuit breaker - after this many consecutive failed calls, calls fail fast (analyzers fall back to rules)
+# for CIRCUIT_RESET_SECONDS, then one probe call decides whether to close it
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+
+# Mock model simulation (load testing without API quota) - defaults keep the mock instant
+MOCK_LATENCY_MS = float(os.getenv('MOCK_LATENCY_MS', '0'))
+MOCK_LATENCY_DISTRIBUTION = os.getenv('MOCK_LATENCY_DISTRIBUTION', 'fixed')  # fixed/normal/lognormal/exponential
+MOCK_LATENCY_SPREAD = float(os.getenv('MOCK_LATENCY_SPREAD', '0'))  # ms std dev (normal) or sigma (lognormal)
+MOCK_MS_PER_INPUT_TOKEN = float(os.getenv('MOCK_MS_PER_INPUT_TOKEN', '0'))
+MOCK_MS_PER_OUTPUT_TOKEN = float(os.getenv('MOCK_MS_PER_OUTPUT_TOKEN', '0'))
+MOCK_RATE_LIMIT_RPM = int(os.getenv('MOCK_RATE_LIMIT_RPM', '0'))  # 0 = unlimited
+MOCK_MALFORMED_RATE = float(os.getenv('MOCK_MALFORMED_RATE', '0'))
+MOCK_UPLOAD_MBPS = float(os.getenv('MOCK_UPLOAD_MBPS', '0'))  # Request upload bandwidth, 0 = instant
+MOCK_STALL_RATE = float(os.getenv('MOCK_STALL_RATE', '0'))  # Fraction of requests that straggle...
+MOCK_STALL_MS = float(os.getenv('MOCK_STALL_MS', '0'))  # ...by this much extra latency
+MOCK_ERROR_RATE = float(os.getenv('MOCK_ERROR_RATE', '0'))  # Fraction of requests failing with a 503
+MOCK_SEED = int(os.getenv('MOCK_SEED', '42'))
+MOCK_TIME_SCALE = float(os.getenv('MOCK_TIME_SCALE', '1.0'))
+
+# Tracing and profiling (off unless set)
+TRACE_FILE = os.getenv('TRACE_FILE')  # e.g. data/processed/trace.json - Chrome trace format
+PROFILE_MODE = os.getenv('PROFILE_MODE', '').lower()  # 'cprofile' or 'sample'
+PROFILE_OUTPUT = os.getenv('PROFILE_OUTPUT', 'data/processed/profile')  # .prof / .folded added
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+
+# ClinicalTrials.gov API
+CLINICAL_TRIALS_BASE_URL = "https://clinicaltrials.gov/api/v2/studies"
+
+# Processing Settings
+MAX_TRIALS_TO_FETCH = 20  # Start small
+ANALYSIS_CONCURRENCY = int(os.getenv('ANALYSIS_CONCURRENCY', '1'))  # Parallel classify_trial calls in analyze_batch
+# Rule-based pre-classification: confident trials only ask the model for the judgement fields, several per request
+LOCAL_CLASSIFIER_ENABLED = os.getenv('LOCAL_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv('LOCAL_CLASSIFIER_MIN_CONFIDENCE', '0.75'))  # Below this, the model classifies
+ASSESSMENT_BATCH_SIZE = int(os.getenv('ASSESSMENT_BATCH_SIZE', '8'))  # Pre-classified trials per assessment request
+# Prompt token budgets - lists (interventions, insights) are cut to fit, lowest priority first
+CLASSIFY_PROMPT_TOKEN_BUDGET = int(os.getenv('CLASSIFY_PROMPT_TOKEN_BUDGET', '400'))  # Per trial, also per trial in batches
+COMPARE_PROMPT_TOKEN_BUDGET = int(os.getenv('COMPARE_PROMPT_TOKEN_BUDGET', '3000'))
+# Directories are created by whatever writes to them, not on import
+PDF_STORAGE_PATH = "data/raw/pdfs"
+PROCESSED_DATA_PATH = "data/processed"
+
+# PDF Processing
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', '0')) or os.cpu_count() or 1  # Page-processing processes
+PDF_PAGES_PER_TASK = 2  # Pages per pool task - smaller streams sooner, larger has less overhead
+PDF_RENDER_DPI = 150
+PDF_MIN_TEXT_CHARS = 200  # Pages with less text than this (and images) are treated as scans
+PDF_TEXT_CHAR_LIMIT = 60000  # Document text sent to the results prompt
+VISION_CONCURRENCY = int(os.getenv('VISION_CONCURRENCY', '4'))  # Parallel vision calls per document
+VISION_BATCH_SIZE = int(os.getenv('VISION_BATCH_SIZE', '1'))  # Figures per multimodal request (1 = one each)
+
+# Page layout detection (PDF points) - finds figure/table regions to crop before vision
+LAYOUT_MIN_FIGURE_AREA = 0.03  # Fraction of the page
+LAYOUT_MIN_DRAWING_ITEMS = 20  # Path segments before a drawing cluster counts as a plot
+LAYOUT_CLUSTER_GAP = 12  # Drawings closer than this belong to the same figure
+LAYOUT_LABEL_MARGIN = 30  # Text this close to a figure (ticks, legends) is cropped with it
+LAYOUT_CAPTION_DISTANCE = 60  # Max gap between a region and its caption
+
+# Vision image preprocessing - images are trimmed, downsampled and re-encoded before upload.
+# Per figure type: longest edge in px, colour mode ('palette', 'grayscale' or 'rgb') and encoding.
+# KM curves keep a small palette so arms stay distinguishable by colour; tables and scans are text.
+IMAGE_PREP_ENABLED = os.getenv('IMAGE_PREP_ENABLED', 'true').lower() == 'true'
+IMAGE_TRIM_MARGINS = True
+IMAGE_PREP_PROFILES = {
+    'survival_curve': {'max_edge': 1024, 'mode': 'palette', 'colors': 16, 'format': 'PNG'},
+    'adverse_events': {'max_edge': 1536, 'mode': 'grayscale', 'format': 'PNG'},
+    'figure': {'max_edge': 1024, 'mode': 'palette', 'colors': 64, 'format': 'PNG'},
+    'scanned_page': {'max_edge': 1600, 'mode': 'grayscale', 'format': 'JPEG', 'quality': 80}
+}
+
+# Vision result cache - near-identical figures (same plot in article, poster, press release) reuse results
+VISION_CACHE_ENABLED = os.getenv('VISION_CACHE_ENABLED', 'true').lower() == 'true'
+VISION_CACHE_PATH = os.getenv('VISION_CACHE_PATH', 'data/processed/vision_cache.sqlite')
+VISION_CACHE_MAX_DISTANCE = int(os.getenv('VISION_CACHE_MAX_DISTANCE', '24'))  # Differing bits of 255
+
+# Local Kaplan-Meier digitizer - tried before Gemini Vision on survival curves
+KM_DIGITIZER_ENABLED = os.getenv('KM_DIGITIZER_ENABLED', 'true').lower() == 'true'
+KM_DIGITIZER_MIN_CONFIDENCE = float(os.getenv('KM_DIGITIZER_MIN_CONFIDENCE', '0.75'))  # Below this, ask the model
+KM_DIGITIZER_MAX_EDGE = 1200  # Images are downsampled to this before tracing
+
+# Adverse-event tables in a PDF's text layer are read locally; only image tables go to vision
+AE_TABLE_EXTRACTION_ENABLED = os.getenv('AE_TABLE_EXTRACTION_ENABLED', 'true').lower() == 'true'
+AE_TABLE_MIN_CONFIDENCE = float(os.getenv('AE_TABLE_MIN_CONFIDENCE', '0.8'))  # Below this, crop for vision
+
+# Trial monitoring - fingerprints of these fields are compared between runs; only moved trials are reclassified
+CHANGE_TRACKED_FIELDS = ['status', 'phase', 'enrollment', 'completion_date', 'interventions', 'title', 'conditions']
+CHANGE_SNAPSHOT_PATH = os.getenv('CHANGE_SNAPSHOT_PATH', 'data/processed/trial_snapshot.json')
+CHANGE_EVENTS_PATH = os.getenv('CHANGE_EVENTS_PATH', 'data/processed/change_events.jsonl')
+TRIAL_HISTORY_PATH = os.getenv('TRIAL_HISTORY_PATH', 'data/processed/trial_history.jsonl')  # Every version, as deltas
+HISTORY_SNAPSHOT_INTERVAL = 10  # Every n-th version of a trial is stored whole, bounding deltas per lookup
+
+# Distributed reclassification (reclassify.py) - jobs in a SQLite queue shared by worker processes/nodes,
+# sharded by nct_id hash; a job whose lease runs out is handed to another worker
+WORK_QUEUE_PATH = os.getenv('WORK_QUEUE_PATH', 'data/processed/work_queue.sqlite')
+WORK_QUEUE_SHARDS = int(os.getenv('WORK_QUEUE_SHARDS', '64'))  # Fixed when the queue is created
+WORK_LEASE_SECONDS = float(os.getenv('WORK_LEASE_SECONDS', '300'))
+WORK_MAX_ATTEMPTS = int(os.getenv('WORK_MAX_ATTEMPTS', '3'))
+WORK_RETRY_DELAY = float(os.getenv('WORK_RETRY_DELAY', '10'))  # seconds, doubled per failed attempt
+WORK_BATCH_SIZE = int(os.getenv('WORK_BATCH_SIZE', '32'))  # Jobs leased (and analyzed together) at a time
+
+# Corpus snapshots - the pipeline publishes trials and analyses as one file that every API worker memory-maps
+# read-only; workers switch to a newly published snapshot within CORPUS_CHECK_SECONDS
+CORPUS_SNAPSHOT_DIR = os.getenv('CORPUS_SNAPSHOT_DIR', 'data/processed/corpus')
+CORPUS_SNAPSHOT_KEEP = 3  # Older snapshots are deleted on publish
+CORPUS_CHECK_SECONDS = float(os.getenv('CORPUS_CHECK_SECONDS', '1'))
+
+# Materialized dashboard views - search results, analyses and comparisons of DEMO_DISEASE_AREAS and the most-
+# requested conditions, precomputed in the background and served by /api/search and /api/analyze
+VIEW_STORE_PATH = os.getenv('VIEW_STORE_PATH', 'data/processed/views.sqlite')
+VIEW_PRECOMPUTE = os.getenv('VIEW_PRECOMPUTE', 'true').lower() == 'true'  # Refresh in the app's own process
+VIEW_REFRESH_SECONDS = float(os.getenv('VIEW_REFRESH_SECONDS', '3600'))  # Views older than this are refreshed
+VIEW_MAX_AGE_SECONDS = float(os.getenv('VIEW_MAX_AGE_SECONDS', '86400'))  # Older views are not served at all
+VIEW_POPULAR_CONDITIONS = int(os.getenv('VIEW_POPULAR_CONDITIONS', '5'))
+VIEW_MAX_RESULTS = 100  # Trials per materialized search; larger searches go live
+
+# API responses - trial lists are paged behind a cursor, optionally projected, and compressed if accepted
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '100'))  # Trials per page unless the request sets `limit`
+API_MAX_PAGE_SIZE = 1000
+API_COMPRESS_MIN_BYTES = 1024  # Below this compression costs more than it saves
+API_GZIP_LEVEL = 6
+API_BROTLI_QUALITY = 5  # 0-11; higher is smaller but much slower
+
+# Demo Settings
+DEMO_DISEASE_AREAS = [
+    "CAR-T Cell Therapy",
+    "Non-Small Cell Lung Cancer"
+]
+DEMO_ANALYZE_TRIALS = 5  # Trials of the last search that /api/analyze analyzes and compares
\ No newline at end of file
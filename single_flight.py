@@ -0,0 +1,69 @@
+# src/utils/single_flight.py
+"""
+Coalesce identical concurrent calls
+
+The first caller for a key runs the function; callers arriving with the same
+key while it is in flight wait for it and get the same result (or the same
+exception) instead of starting their own scraper fetch or model calls. Once
+the call finishes the key is forgotten - this is not a cache.
+"""
+
+import threading
+from src.utils.tracing import span
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self, name='single_flight'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() unless an identical call is in flight, then share its outcome
+
+        Args:
+            key: Hashable identity of the call (e.g. ('search', condition, max_results))
+            fn: Zero-argument callable
+
+        Returns:
+            (result, shared) - shared is True for callers that waited on another's call.
+            The result object is the same for all of them, so treat it as read-only.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            with span(f'{self.name}.wait', category='coalesce'):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.executed += 1
+            call.done.set()
+        return call.result, False
+
+    def report(self):
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
\ No newline at end of file
@@ -0,0 +1,165 @@
+# test_ae_table.py
+"""Test adverse-event table extraction from PDF text layers (mock model for the fallbacks)"""
+
+import os
+import tempfile
+import time
+from benchmarks.synthetic import AE_ROWS, make_trial_pdf
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.pdf_pipeline import PDF_AVAILABLE, process_page_range
+from src.utils.usage import usage_tracker
+from config.settings import AE_TABLE_MIN_CONFIDENCE
+
+print("="*60)
+print("ADVERSE EVENT TABLES FROM THE TEXT LAYER")
+print("="*60)
+
+if not PDF_AVAILABLE:
+    print("❌ PyMuPDF not installed - pip install pymupdf")
+    exit(1)
+
+import pymupdf
+
+workdir = tempfile.mkdtemp()
+
+def table_pdf(name, columns, headers, body, scanned=False):
+    """One-page PDF with a captioned table; `scanned` rasterizes the page first"""
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_textbox(pymupdf.Rect(72, 60, 540, 160), "Safety\n\n" + "Results were consistent. " * 12, fontsize=10)
+    page.insert_text((72, 200), "Table 2. Treatment-related adverse events", fontsize=10)
+    y = 220
+    for row in headers + body:
+        for x, cell in zip(columns, row):
+            page.insert_text((x, y), cell, fontsize=8)
+        y += 14
+
+    if scanned:
+        pixmap = page.get_pixmap(dpi=100)
+        doc = pymupdf.open()
+        doc.new_page().insert_image(pymupdf.Rect(0, 0, 612, 792), pixmap=pixmap)
+
+    path = os.path.join(workdir, name)
+    doc.save(path)
+    return path
+
+def read_table(path, page=0):
+    regions = process_page_range(path, [page])[0]['regions']
+    return regions[0] if regions else None
+
+# Test 1: The synthetic publication's table
+print("\n[TEST 1] Spanning arm headers, n (%) cells")
+print("-"*60)
+
+region = read_table(make_trial_pdf(os.path.join(workdir, "trial.pdf")), 7)
+table = region['table']
+rates = {ae['event']: ae for ae in table['serious_aes']}
+for event, treatment_any, treatment_3, control_any, _ in AE_ROWS:
+    expected = (round(treatment_any / 2.25, 1), round(treatment_3 / 2.25, 1), round(control_any / 2.25, 1))
+    found = (rates[event]['rate'], rates[event]['grade_3_plus_rate'], rates[event]['control_rate'])
+    print(f"   {event:<26} {found}")
+    if found != expected:
+        print(f"❌ Expected {expected}")
+        exit(1)
+if (table['grade_3_plus_treatment'], table['grade_3_plus_control']) != (68.0, 42.2) or region['image'] is not None:
+    print(f"❌ Unexpected summary: {table['grade_3_plus_treatment']}/{table['grade_3_plus_control']}")
+    exit(1)
+print(f"✅ {len(rates)} events, grade ≥3 {table['grade_3_plus_treatment']}% vs {table['grade_3_plus_control']}%, "
+      f"no crop rendered")
+
+# Test 2: Other layouts
+print("\n[TEST 2] Control arm first, percentages only, grade 3-4 bands")
+print("-"*60)
+
+path = table_pdf("placebo_first.pdf", [72, 250, 320, 400, 470],
+                 [["", "Placebo (n=148)", "", "Drug X 10 mg (n=150)", ""],
+                  ["Adverse event, %", "All grades", "Grade 3-4", "All grades", "Grade 3-4"]],
+                 [["Diarrhea", "12.2", "0.7", "41.3", "6.0"],
+                  ["Rash", "8.1", "0.0", "30.7", "2.7"],
+                  ["Hypertension", "10.8", "2.0", "22.0", "8.7"],
+                  ["Any grade 3-4 event", "18.9", "18.9", "39.3", "39.3"]])
+table = read_table(path)['table']
+print(f"   {table['analysis']}")
+print(f"   Most common: {table['most_common_ae']} ({table['most_common_ae_rate']}%), "
+      f"grade 3-4 {table['grade_3_plus_treatment']}% vs {table['grade_3_plus_control']}%")
+if table['most_common_ae'] != "Diarrhea" or table['most_common_ae_rate'] != 41.3 or \
+        table['serious_aes'][0]['control_rate'] != 12.2 or table['grade_3_plus_treatment'] != 39.3:
+    print("❌ Arms or bands misread")
+    exit(1)
+print("✅ Placebo recognized as control regardless of column order")
+
+path = table_pdf("counts_only.pdf", [72, 260, 360, 460],
+                 [["Event", "Drug X (N=80)", "Placebo (N=79)", "Total (N=159)"]],
+                 [["Nausea", "20", "9", "29"], ["Headache", "12", "11", "23"], ["Dizziness", "8", "3", "11"]])
+table = read_table(path)['table']
+print(f"   Bare counts: {[(ae['event'], ae['rate'], ae['control_rate']) for ae in table['serious_aes']]}")
+if table['serious_aes'][0]['rate'] != 25.0 or table['serious_aes'][0]['control_rate'] != 11.4 or \
+        table['grade_3_plus_treatment'] is not None:
+    print("❌ Counts not converted with the arm sizes")
+    exit(1)
+print("✅ Counts normalized to percentages using N from the header")
+
+path = table_pdf("combination.pdf", [72, 180, 360, 520],
+                 [["Event", "Pembrolizumab + chemotherapy (N=80)", "Chemotherapy (N=79)", "Total (N=159)"]],
+                 [["Nausea", "20", "9", "29"], ["Headache", "12", "11", "23"], ["Dizziness", "8", "3", "11"]])
+region = read_table(path)
+table = region['table']
+print(f"   {table['analysis']}")
+if table['serious_aes'][0]['rate'] != 25.0 or table['serious_aes'][0]['control_rate'] != 11.4 or \
+        region['image'] is not None:
+    print("❌ Combination arm taken as the control")
+    exit(1)
+path = table_pdf("two_combinations.pdf", [72, 180, 360, 520],
+                 [["Event", "Pembrolizumab + chemotherapy (N=80)", "Nivolumab + chemotherapy (N=79)", "Total (N=159)"]],
+                 [["Nausea", "20", "9", "29"], ["Headache", "12", "11", "23"], ["Dizziness", "8", "3", "11"]])
+region = read_table(path)
+if region['table']['confidence'] >= AE_TABLE_MIN_CONFIDENCE or region['image'] is None:
+    print(f"❌ Ambiguous arms trusted: confidence {region['table']['confidence']}")
+    exit(1)
+path = table_pdf("head_to_head.pdf", [72, 180, 360, 520],
+                 [["Event", "Drug A (N=80)", "Drug B (N=79)", "Total (N=159)"]],
+                 [["Nausea", "20", "9", "29"], ["Headache", "12", "11", "23"], ["Dizziness", "8", "3", "11"]])
+region = read_table(path)
+if region['table']['confidence'] >= AE_TABLE_MIN_CONFIDENCE or region['image'] is None:
+    print(f"❌ Head-to-head arms trusted: confidence {region['table']['confidence']}")
+    exit(1)
+print("✅ Chemotherapy alone is the control against its combination; ambiguous or head-to-head arms go to vision")
+
+# Test 3: Through the analyzer, in bulk
+print("\n[TEST 3] extract_results_bulk - AE tables without model calls")
+print("-"*60)
+
+paths = [make_trial_pdf(os.path.join(workdir, f"doc_{i}.pdf"), text_pages=2, seed=i) for i in range(12)]
+analyzer = PDFAnalyzer(use_mock=True)
+usage_tracker.reset()
+start = time.perf_counter()
+results = analyzer.extract_results_bulk(paths, workers=os.cpu_count())
+elapsed = time.perf_counter() - start
+
+sites = usage_tracker.report()['by_call_site']
+ae_site = sites.get('analyze_adverse_events_table', {})
+tables = [f['findings'] for result in results.values() for f in result['figures'] if f['figure_type'] == 'adverse_events']
+print(f"   {len(paths)} PDFs in {elapsed:.2f}s: {ae_site.get('local_results', 0)} tables read locally, "
+      f"{ae_site.get('calls', 0)} AE model calls")
+if len(tables) != len(paths) or any(t.get('method') != 'text_layer' for t in tables) or ae_site.get('calls', 0):
+    print("❌ Expected every AE table from the text layer")
+    exit(1)
+print("✅ Zero model calls for born-digital AE tables")
+
+# Test 4: Scans still go to vision
+print("\n[TEST 4] Scanned table falls back to vision")
+print("-"*60)
+
+path = table_pdf("scanned.pdf", [72, 260, 360, 460],
+                 [["Event", "Drug X (N=80)", "Placebo (N=79)", "Total (N=159)"]],
+                 [["Nausea", "20", "9", "29"], ["Headache", "12", "11", "23"], ["Dizziness", "8", "3", "11"]], scanned=True)
+usage_tracker.reset()
+result = analyzer.extract_trial_results(path)
+calls = usage_tracker.report()['by_call_site'].get('analyze_page_figures', {}).get('calls', 0)
+print(f"   Figures: {[f['figure_type'] for f in result['figures']]}, vision calls: {calls}")
+if calls != 1:
+    print("❌ Scanned page should get one vision call")
+    exit(1)
+print("✅ Image-only table sent to vision")
+
+print("\n✅ AE table extraction ready")
\ No newline at end of file
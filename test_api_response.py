@@ -0,0 +1,106 @@
+# test_api_response.py
+"""Test paged, projected and compressed API responses"""
+
+import gzip
+import json
+import app as app_module
+from benchmarks.synthetic import make_trial
+from src.utils.api_response import paginate, project, negotiate_encoding, decode_cursor, BROTLI_AVAILABLE
+
+print("="*60)
+print("API RESPONSES")
+print("="*60)
+
+def analyzed_trial(i):
+    return make_trial(i, analysis={'therapeutic_area': 'Oncology'})
+
+class ListScraper:
+    """Serves a fixed list of trials instead of calling ClinicalTrials.gov"""
+    def search_trials(self, condition, max_results=20):
+        return [analyzed_trial(i) for i in range(max_results)]
+
+trials = [analyzed_trial(i) for i in range(250)]
+
+# Test 1: Pagination and projection
+print("\n[TEST 1] Cursor pages cover the list exactly once")
+print("-"*60)
+
+seen, cursor = [], None
+while True:
+    page = paginate(trials, 1, cursor=cursor, limit=100, fields='nct_id,analysis.therapeutic_area')
+    seen.extend(page['items'])
+    cursor = page['next_cursor']
+    if cursor is None:
+        break
+if [t['nct_id'] for t in seen] != [t['nct_id'] for t in trials]:
+    print(f"❌ Pages returned {len(seen)} trials, expected {len(trials)} in order")
+    exit(1)
+if seen[0] != {'nct_id': trials[0]['nct_id'], 'analysis': {'therapeutic_area': 'Oncology'}}:
+    print(f"❌ Projection kept {seen[0]}")
+    exit(1)
+if project(trials[:1], None) != trials[:1]:
+    print("❌ No `fields` must return records unchanged")
+    exit(1)
+print(f"✅ {len(seen)} trials in 3 pages, projected to the requested fields")
+
+for bad in ('not-a-cursor', paginate(trials, 2, limit=10)['next_cursor']):
+    try:
+        paginate(trials, 1, cursor=bad)
+        print(f"❌ Cursor {bad!r} accepted")
+        exit(1)
+    except ValueError as e:
+        print(f"✅ Rejected: {e}")
+
+# Test 2: Encoding negotiation
+print("\n[TEST 2] Accept-Encoding negotiation")
+print("-"*60)
+
+cases = {'gzip, deflate': 'gzip', 'gzip;q=0, deflate': None, '': None, 'identity': None,
+         '*': 'br' if BROTLI_AVAILABLE else 'gzip'}
+for header, expected in cases.items():
+    got = negotiate_encoding(header)
+    if got != expected:
+        print(f"❌ {header!r} → {got}, expected {expected}")
+        exit(1)
+print(f"✅ {len(cases)} headers negotiated")
+
+# Test 3: Endpoints
+print("\n[TEST 3] /api/search and /api/trials")
+print("-"*60)
+
+app_module.scraper = ListScraper()
+client = app_module.app.test_client()
+
+response = client.post('/api/search', json={'condition': 'Lymphoma', 'max_results': 250, 'limit': 100,
+                                            'fields': 'nct_id,title,phase'},
+                       headers={'Accept-Encoding': 'gzip'})
+if response.headers.get('Content-Encoding') != 'gzip':
+    print(f"❌ Response not compressed: {dict(response.headers)}")
+    exit(1)
+data = json.loads(gzip.decompress(response.get_data()))
+if data['count'] != 250 or len(data['trials']) != 100 or set(data['trials'][0]) != {'nct_id', 'title', 'phase'}:
+    print(f"❌ First page: count {data['count']}, {len(data['trials'])} trials, fields {set(data['trials'][0])}")
+    exit(1)
+print(f"✅ First page of {len(data['trials'])}/{data['count']}, {len(response.get_data())} bytes gzipped")
+
+fetched = data['trials']
+cursor = data['next_cursor']
+while cursor:
+    page = client.get('/api/trials', query_string={'cursor': cursor, 'fields': 'nct_id,title,phase'}).get_json()
+    fetched.extend(page['trials'])
+    cursor = page['next_cursor']
+if len({t['nct_id'] for t in fetched}) != 250:
+    print(f"❌ Incremental fetch returned {len(fetched)} trials")
+    exit(1)
+print(f"✅ Remaining pages fetched incrementally ({len(fetched)} trials)")
+
+stale = data['next_cursor']
+client.post('/api/search', json={'condition': 'Lymphoma', 'max_results': 10})
+response = client.get('/api/trials', query_string={'cursor': stale})
+if response.status_code != 400:
+    print(f"❌ Cursor from a replaced search returned {response.status_code}")
+    exit(1)
+version, offset = decode_cursor(stale)
+print(f"✅ Stale cursor (version {version}, offset {offset}) rejected after a new search")
+
+print("\n✅ API responses ready")
\ No newline at end of file
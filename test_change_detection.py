@@ -0,0 +1,123 @@
+# test_change_detection.py
+"""Test fingerprint-based change detection between monitoring runs (mock model)"""
+
+import json
+import os
+import tempfile
+from benchmarks.synthetic import make_trial
+from src.analyzers.trial_analyzer import TrialAnalyzer, ANALYSIS_FAILED
+from src.utils.change_detection import ChangeDetector
+from src.utils.usage import usage_tracker
+
+print("="*60)
+print("CHANGE DETECTION")
+print("="*60)
+
+def tracked_trial(i):
+    return make_trial(i, conditions=['Lymphoma', 'Leukemia'], enrollment=100 + i,
+                      interventions=[{'type': 'DRUG', 'name': 'x'}, {'type': 'BIOLOGICAL', 'name': 'CAR-T'}])
+
+workdir = tempfile.mkdtemp()
+snapshot_path = os.path.join(workdir, 'snapshot.json')
+events_path = os.path.join(workdir, 'events.jsonl')
+analyzer = TrialAnalyzer(use_mock=True, local_classifier=False)  # One model call per classified trial
+
+# Test 1: First run
+print("\n[TEST 1] First run classifies everything")
+print("-"*60)
+
+trials = [tracked_trial(i) for i in range(200)]
+detector = ChangeDetector(snapshot_path, events_path)
+usage_tracker.reset()
+analyzed, events = detector.refresh(trials, analyzer)
+if len(events) != 200 or any(event['type'] != 'added' for event in events):
+    print(f"❌ Expected 200 'added' events, got {len(events)}")
+    exit(1)
+print(f"✅ {len(events)} added, {usage_tracker.report()['totals']['calls']} classify calls")
+
+# Test 2: Second run with a few changes
+print("\n[TEST 2] Only moved trials are diffed and reclassified")
+print("-"*60)
+
+trials = [tracked_trial(i) for i in range(200)]
+trials[3]['status'] = 'COMPLETED'
+trials[3]['enrollment'] = 97
+trials[50]['interventions'].append({'type': 'DRUG', 'name': 'rituximab'})
+trials[80]['interventions'].reverse()  # Reordering is not a change
+trials[120]['conditions'].reverse()
+trials[150]['start_date'] = '2023-12'  # Untracked field
+trials.append(tracked_trial(500))
+del trials[10]
+
+received = []
+detector = ChangeDetector(snapshot_path, events_path)  # Reloaded from disk
+detector.subscribe(received.append)
+usage_tracker.reset()
+analyzed, events = detector.refresh(trials, analyzer, complete=True)
+
+by_id = {event['nct_id']: event for event in events}
+expected = {'NCT90000003': 'changed', 'NCT90000050': 'changed', 'NCT90000500': 'added', 'NCT90000010': 'removed'}
+if {nct_id: event['type'] for nct_id, event in by_id.items()} != expected:
+    print(f"❌ Events: {[(e['nct_id'], e['type']) for e in events]}")
+    exit(1)
+status_change = {c['field']: (c['old'], c['new']) for c in by_id['NCT90000003']['changes']}
+if status_change != {'status': ('RECRUITING', 'COMPLETED'), 'enrollment': (103, 97)}:
+    print(f"❌ Field diff: {status_change}")
+    exit(1)
+if by_id['NCT90000050']['changes'][0]['added'] != ['DRUG: rituximab']:
+    print(f"❌ Intervention diff: {by_id['NCT90000050']['changes']}")
+    exit(1)
+print(f"✅ {len(events)} events: {sorted(expected.items())}")
+
+calls = usage_tracker.report()['totals']['calls']
+if calls != 3:
+    print(f"❌ {calls} classify calls, expected 3 (2 changed + 1 added)")
+    exit(1)
+if len(analyzed) != len(trials) or any(not trial.get('analysis') for trial in analyzed):
+    print("❌ Unchanged trials must get their stored classification back")
+    exit(1)
+print(f"✅ {calls} classify calls for {len(trials)} trials")
+
+if len(received) != 4:
+    print(f"❌ Subscriber got {len(received)} events")
+    exit(1)
+with open(events_path) as f:
+    logged = [json.loads(line) for line in f]
+if len(logged) != 204:
+    print(f"❌ Event log has {len(logged)} lines, expected 204")
+    exit(1)
+print(f"✅ Events delivered to subscribers and logged ({len(logged)} lines)")
+
+# Test 3: Nothing changed
+print("\n[TEST 3] An unchanged run costs nothing")
+print("-"*60)
+
+usage_tracker.reset()
+_, events = detector.refresh(trials, analyzer)
+calls = usage_tracker.report()['totals']['calls']
+if events or calls:
+    print(f"❌ {len(events)} events, {calls} calls")
+    exit(1)
+print("✅ No events, no model calls")
+
+# Test 4: A run in which the model failed
+print("\n[TEST 4] Fallback classifications are retried")
+print("-"*60)
+
+class FailingAnalyzer:
+    """Every classification falls back to defaults, as when the model errors"""
+
+    def analyze_batch(self, trials):
+        return [{**trial, 'analysis': {'target_population': ANALYSIS_FAILED}} for trial in trials]
+
+trials += [tracked_trial(600), tracked_trial(601)]
+detector.refresh(trials, FailingAnalyzer())
+usage_tracker.reset()
+analyzed, events = detector.refresh(trials, analyzer)
+calls = usage_tracker.report()['totals']['calls']
+if events or calls != 2 or any(trial['analysis']['target_population'] == ANALYSIS_FAILED for trial in analyzed):
+    print(f"❌ {calls} calls after the failed run, expected 2")
+    exit(1)
+print(f"✅ {calls} unchanged trials with fallback classifications sent to the model again")
+
+print("\n✅ Change detection ready")
\ No newline at end of file
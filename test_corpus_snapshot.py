@@ -0,0 +1,156 @@
+# test_corpus_snapshot.py
+"""Test memory-mapped corpus snapshots and their atomic swap"""
+
+import os
+import random
+import tempfile
+import tracemalloc
+from benchmarks.synthetic import make_trial
+from src.utils.corpus_snapshot import CorpusSnapshot, CorpusStore, write_snapshot, publish
+from src.utils.trial_columns import TrialColumns, COLUMNS, STATUSES, parse_filters
+
+print("="*60)
+print("CORPUS SNAPSHOTS")
+print("="*60)
+
+rng = random.Random(11)
+def random_trial(i):
+    year = rng.randint(2008, 2028)
+    phases = rng.choice([[], ['PHASE1'], ['PHASE2'], ['PHASE2', 'PHASE3'], ['PHASE3']])
+    # Unsorted ids with non-ASCII titles exercise the nct_id index and the UTF-8 string tables
+    return make_trial(i, nct_id=f"NCT{60000000 + rng.randint(0, 10 ** 7):08d}-{i}", title=f"Étude {i} – CAR-T",
+                      status=rng.choice(STATUSES[:5]), phase=phases[0] if phases else 'N/A', phases=phases,
+                      enrollment=rng.choice([rng.randint(1, 2000), 'Unknown']),
+                      start_date=rng.choice([f"{year}-{rng.randint(1, 12):02d}", 'Unknown']),
+                      completion_date=f"{year + 2}-06-30",
+                      analysis={'innovation_level': rng.choice(['high', 'medium', 'low'])})
+
+trials = [random_trial(i) for i in range(3000)]
+directory = tempfile.mkdtemp()
+
+# Test 1: Round trip
+print("\n[TEST 1] Written once, read from the mapping")
+print("-"*60)
+
+path = os.path.join(directory, 'corpus.snap')
+write_snapshot(path, trials, metadata={'source': 'test'})
+tracemalloc.start()
+snapshot = CorpusSnapshot(path)
+opened_bytes = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+if len(snapshot) != 3000 or snapshot.metadata != {'source': 'test'}:
+    print("❌ Header not read back")
+    exit(1)
+if any(snapshot.record(i) != trial for i, trial in enumerate(trials)):
+    print("❌ Records differ")
+    exit(1)
+if snapshot.field(7, 'title') != trials[7]['title'] or snapshot.field(7, 'status') != trials[7]['status']:
+    print("❌ String fields differ")
+    exit(1)
+if any(snapshot.trial(trial['nct_id']) != trial for trial in rng.sample(trials, 200)) or snapshot.trial('NCT0') is not None:
+    print("❌ Lookup by nct_id failed")
+    exit(1)
+print(f"✅ {len(snapshot)} trials, fields and lookups; opening kept {opened_bytes / 1024:.1f} KiB on the heap")
+
+if opened_bytes > 64 * 1024:
+    print(f"❌ Opening the snapshot copied it: {opened_bytes} bytes")
+    exit(1)
+
+# Test 2: Columns are views of the file
+print("\n[TEST 2] Zero-copy columns")
+print("-"*60)
+
+columns, in_memory = snapshot.columns, TrialColumns(trials)
+for column in COLUMNS:
+    mapped = getattr(columns, column)
+    if mapped.flags.owndata or mapped.flags.writeable:
+        print(f"❌ {column} is a copy")
+        exit(1)
+    if mapped.tobytes() != getattr(in_memory, column).tobytes():
+        print(f"❌ {column} differs")
+        exit(1)
+filters = parse_filters({'min_enrollment': '500', 'start_from': '2015', 'phase': 'PHASE2'})
+if list(snapshot.rows(filters)) != list(in_memory.indexes(filters)):
+    print("❌ Filters differ")
+    exit(1)
+if snapshot.summarize(filters) != in_memory.summarize(in_memory.mask(filters)):
+    print("❌ Summaries differ")
+    exit(1)
+page = snapshot.trials(snapshot.rows(filters), fields='nct_id,title')[:3]
+if page != [{'nct_id': trials[i]['nct_id'], 'title': trials[i]['title']} for i in in_memory.indexes(filters)[:3]]:
+    print(f"❌ Projected page: {page}")
+    exit(1)
+print(f"✅ {len(COLUMNS)} read-only column views; filters, summaries and projections match in-memory columns")
+
+# Test 3: Publish and swap
+print("\n[TEST 3] Workers swap to a newly published snapshot")
+print("-"*60)
+
+corpus = os.path.join(directory, 'corpus')
+store = CorpusStore(corpus, check_seconds=0)
+if store.current() is not None:
+    print("❌ Snapshot before anything was published")
+    exit(1)
+publish(trials[:100], corpus, metadata={'run': 1}, keep=2)
+first = store.current()
+publish(trials[:200], corpus, metadata={'run': 2}, keep=2)
+second = store.current()
+if (len(first), len(second), second.metadata['run'], store.swaps) != (100, 200, 2, 2):
+    print("❌ Store did not swap to the new snapshot")
+    exit(1)
+if first.record(99) != trials[99]:
+    print("❌ Old snapshot unreadable while still in use")
+    exit(1)
+for run in range(3):
+    publish(trials[:10], corpus, keep=2)
+if len([name for name in os.listdir(corpus) if name.endswith('.snap')]) != 2:
+    print(f"❌ Old snapshots not pruned: {os.listdir(corpus)}")
+    exit(1)
+slow = CorpusStore(corpus, check_seconds=3600)
+slow.current()
+publish(trials[:20], corpus, keep=2)
+if len(slow.current()) != 10:
+    print("❌ Pointer re-read before check_seconds")
+    exit(1)
+print("✅ New snapshot picked up, old one still readable, older files pruned")
+
+# Test 4: API
+print("\n[TEST 4] /api/corpus endpoints")
+print("-"*60)
+
+import app as app_module
+import src.utils.corpus_snapshot as corpus_snapshot
+client = app_module.app.test_client()
+corpus_snapshot.corpus_store = CorpusStore(os.path.join(directory, 'empty'), check_seconds=0)
+if client.get('/api/corpus/trials').status_code != 404:
+    print("❌ Corpus served before one was published")
+    exit(1)
+
+corpus_snapshot.corpus_store = CorpusStore(corpus, check_seconds=0)
+publish(trials, corpus)
+expected = [trials[i]['nct_id'] for i in in_memory.indexes(filters)]
+query = '/api/corpus/trials?min_enrollment=500&start_from=2015&phase=PHASE2&limit=20&fields=nct_id'
+page = client.get(query).get_json()
+following = client.get(f"{query}&cursor={page['next_cursor']}").get_json()
+if page['count'] != len(expected) or [t['nct_id'] for t in page['trials'] + following['trials']] != expected[:40]:
+    print(f"❌ Corpus pages: {page['count']} vs {len(expected)}")
+    exit(1)
+trial = client.get(f"/api/corpus/trials/{trials[5]['nct_id']}").get_json()['trial']
+if trial['analysis'] != trials[5]['analysis'] or client.get('/api/corpus/trials/NCT0').status_code != 404:
+    print("❌ Single trial")
+    exit(1)
+if client.get('/api/corpus/summary?status=COMPLETED').get_json()['summary']['count'] != \
+        sum(t['status'] == 'COMPLETED' for t in trials):
+    print("❌ Summary")
+    exit(1)
+publish(trials[:50], corpus)
+if client.get(f"{query}&cursor={page['next_cursor']}").status_code != 400:
+    print("❌ Cursor into a replaced snapshot accepted")
+    exit(1)
+if client.get('/api/status').get_json()['corpus']['trials'] != 50:
+    print("❌ Status does not show the new snapshot")
+    exit(1)
+print(f"✅ {page['count']} filtered trials paged from the mapping; swap picked up by the running app")
+
+print("\n✅ Corpus snapshots ready")
\ No newline at end of file
@@ -0,0 +1,184 @@
+# test_hedging.py
+"""Test hedged model requests, per-attempt timeouts and the circuit breaker"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.gemini_wrapper import (InstrumentedModel, MockGeminiModel, MockSimulation, CircuitBreaker,
+                                      CircuitOpenError)
+from src.analyzers.trial_analyzer import TrialAnalyzer, MODEL_UNAVAILABLE
+from src.utils.usage import usage_tracker
+from src.utils.scheduler import QuotaScheduler
+import src.utils.gemini_wrapper as gemini_wrapper
+
+print("="*60)
+print("HEDGING AND CIRCUIT BREAKER")
+print("="*60)
+
+def make_model(**simulation):
+    return InstrumentedModel(MockGeminiModel('gemini-2.0-flash', simulation=MockSimulation(**simulation)),
+                             'gemini-2.0-flash')
+
+def timed_calls(model, count, call_site='hedge_test'):
+    def call(_):
+        start = time.perf_counter()
+        model.generate_content('Hello', call_site=call_site)
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return sorted(executor.map(call, range(count)))
+
+# Test 1: Stragglers are hedged
+print("\n[TEST 1] A slow attempt is sent again and the first answer wins")
+print("-"*60)
+
+usage_tracker.reset()
+model = make_model(latency_ms=10, stall_rate=0.03, stall_ms=1000, seed=3)
+model.hedge = False
+unhedged = timed_calls(model, 300)
+model.hedge = True
+hedged = timed_calls(model, 300)
+site = usage_tracker.report()['by_call_site']['hedge_test']
+slow = [sum(seconds > 0.5 for seconds in run) for run in (unhedged, hedged)]
+if not slow[0] or slow[1] * 3 > slow[0] or not site['hedge_wins']:
+    print(f"❌ {slow[0]} → {slow[1]} calls over 500 ms; {site['hedges']} hedges, {site['hedge_wins']} won")
+    exit(1)
+print(f"✅ {slow[0]} → {slow[1]} calls over 500 ms (p99 {unhedged[296] * 1000:.0f} → {hedged[296] * 1000:.0f} ms); "
+      f"{site['hedges']} hedges, {site['hedge_wins']} answered first")
+
+# Test 2: Budget cap
+print("\n[TEST 2] Extra requests stay within HEDGE_MAX_FRACTION")
+print("-"*60)
+
+usage_tracker.reset()
+model = make_model(latency_ms=10)
+model._latencies['hedge_test'] = deque([0.001] * 10000)  # Every call now looks slow
+timed_calls(model, 300)
+site = usage_tracker.report()['by_call_site']['hedge_test']
+if not 0.04 * 300 <= site['hedges'] <= 0.05 * 300:
+    print(f"❌ {site['hedges']} hedges for 300 calls")
+    exit(1)
+print(f"✅ {site['hedges']} hedges for 300 calls that all ran past the threshold")
+
+# Test 3: Per-attempt timeout
+print("\n[TEST 3] An attempt past MODEL_CALL_TIMEOUT fails")
+print("-"*60)
+
+model = make_model(latency_ms=500)
+model.timeout = 0.05
+start = time.perf_counter()
+try:
+    model.generate_content('Hello', call_site='hedge_test')
+    print("❌ Slow call did not time out")
+    exit(1)
+except TimeoutError as e:
+    elapsed = time.perf_counter() - start
+    if elapsed > 0.3:
+        print(f"❌ Timed out after {elapsed:.2f}s")
+        exit(1)
+    print(f"✅ {e} ({elapsed * 1000:.0f} ms)")
+held = gemini_wrapper.scheduler.report()['running']
+time.sleep(0.6)
+if not held or gemini_wrapper.scheduler.report()['running']:
+    print(f"❌ Timed-out request should hold its slot until it finishes ({held} running after the timeout)")
+    exit(1)
+print("✅ Timed-out request kept its scheduler slot until it finished")
+
+# Test 3b: Hedges count against the concurrency cap
+print("\n[TEST 3b] Hedges and timed-out attempts stay within MODEL_MAX_CONCURRENCY")
+print("-"*60)
+
+model = make_model(latency_ms=10, stall_rate=0.2, stall_ms=200, seed=5)
+model._latencies['hedge_test'] = deque([0.001] * 10000)
+in_flight, peak, lock = [0], [0], threading.Lock()
+send = model.model.generate_content
+def counted(*args, **kwargs):
+    with lock:
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+    try:
+        return send(*args, **kwargs)
+    finally:
+        with lock:
+            in_flight[0] -= 1
+model.model.generate_content = counted
+shared, gemini_wrapper.scheduler = gemini_wrapper.scheduler, QuotaScheduler(max_concurrency=4)
+try:
+    usage_tracker.reset()
+    timed_calls(model, 100)
+    hedges = usage_tracker.report()['by_call_site']['hedge_test']['hedges']
+finally:
+    gemini_wrapper.scheduler = shared
+if peak[0] > 4 or not hedges:
+    print(f"❌ {peak[0]} requests in flight with a cap of 4 ({hedges} hedges)")
+    exit(1)
+print(f"✅ At most {peak[0]} requests in flight with a cap of 4, {hedges} hedges included")
+
+# Test 4: Breaker states
+print("\n[TEST 4] Closed → open → half-open → closed")
+print("-"*60)
+
+breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.05)
+for _ in range(3):
+    breaker.allow()
+    breaker.record(False)
+if breaker.state != 'open' or breaker.allow():
+    print(f"❌ Still letting calls through after 3 failures: {breaker.report()}")
+    exit(1)
+time.sleep(0.06)
+if not breaker.allow() or breaker.allow():
+    print("❌ Half-open circuit should let exactly one probe through")
+    exit(1)
+breaker.record(False)
+if breaker.state != 'open':
+    print("❌ Failed probe did not reopen the circuit")
+    exit(1)
+time.sleep(0.06)
+breaker.allow()
+breaker.record(True)
+if breaker.report() != {'state': 'closed', 'consecutive_failures': 0}:
+    print(f"❌ Successful probe did not close the circuit: {breaker.report()}")
+    exit(1)
+print("✅ Opens after 3 failures, one probe after the reset time, closes on success")
+
+usage_tracker.reset()
+model = make_model(latency_ms=20, error_rate=1.0)
+model.breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+errors = []
+for _ in range(10):
+    start = time.perf_counter()
+    try:
+        model.generate_content('Hello', call_site='hedge_test')
+    except Exception as e:
+        errors.append((type(e).__name__, time.perf_counter() - start))
+site = usage_tracker.report()['by_call_site']['hedge_test']
+if [name for name, _ in errors].count('CircuitOpenError') != 7 or site['circuit_rejections'] != 7:
+    print(f"❌ {[name for name, _ in errors]}")
+    exit(1)
+print(f"✅ 3 failed calls sent, 7 refused in {max(s for n, s in errors if n == 'CircuitOpenError') * 1e6:.0f} µs or less")
+
+# Test 5: Analyzer falls back to rules
+print("\n[TEST 5] TrialAnalyzer while the circuit is open")
+print("-"*60)
+
+analyzer = TrialAnalyzer(use_mock=True)
+analyzer.model = model
+trials = [{'nct_id': 'NCT70000001', 'title': 'Study', 'conditions': ['Non-Small Cell Lung Cancer'],
+           'phase': 'PHASE2', 'interventions': [{'type': 'DRUG', 'name': 'x'}]},
+          {'nct_id': 'NCT70000002', 'title': 'Study', 'conditions': ['Rare Syndrome X'],
+           'phase': 'PHASE2', 'interventions': [{'type': 'DEVICE', 'name': 'y'}]}]
+try:
+    analyzed = analyzer.analyze_batch(trials)
+except CircuitOpenError as e:
+    print(f"❌ Circuit error reached the caller: {e}")
+    exit(1)
+first, second = (trial['analysis'] for trial in analyzed)
+if first['therapeutic_area'] != 'Oncology' or first['target_population'] != MODEL_UNAVAILABLE:
+    print(f"❌ Confident trial: {first}")
+    exit(1)
+if second['intervention_class'] != 'Device' or second['therapeutic_area'] != 'Rare Syndrome X':
+    print(f"❌ Uncertain trial: {second}")
+    exit(1)
+print("✅ Rule-based labels where the rules find any, condition defaults otherwise")
+
+print("\n✅ Hedging and circuit breaker ready")
\ No newline at end of file
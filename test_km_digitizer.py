@@ -0,0 +1,121 @@
+# test_km_digitizer.py
+"""Test the local Kaplan-Meier digitizer and its fallback to the model"""
+
+import os
+import tempfile
+import time
+from benchmarks.synthetic import km_curve_image, km_steps, make_trial_pdf
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.km_digitizer import digitize_km, tick_progressions
+from src.utils.pdf_pipeline import PDF_AVAILABLE, process_page_range
+from src.utils.usage import usage_tracker
+from config.settings import KM_DIGITIZER_MIN_CONFIDENCE
+
+print("="*60)
+print("KAPLAN-MEIER DIGITIZER")
+print("="*60)
+
+AXIS_TEXT = "1.0 0.8 0.6 0.4 0.2 0.0 0 6 12 18 24 30 36 HR 0.42, 95% CI 0.31-0.58, p<0.0001"
+TICK_TEXT = f"{AXIS_TEXT} Treatment (median 24.8 mo) Control (median 11.2 mo)"  # With km_curve_image's legend
+
+def true_median(median, seed, n):
+    """Median of the synthetic arm, straight from its step points"""
+    for t, s in km_steps(median, 36, n=n, seed=seed):
+        if s <= 0.5:
+            return t
+    return None
+
+# Test 1: Tick labels
+print("\n[TEST 1] Axis tick labels from figure text")
+print("-"*60)
+
+time_ticks, survival_ticks = tick_progressions("Months 0 6 12 1.0 0.8 18 24 0.6 0.4 0.2 0.0 30 36 (N=225)")
+print(f"   Time: {time_ticks}, survival: {survival_ticks}")
+if time_ticks != [0, 6, 12, 18, 24, 30, 36] or survival_ticks[-1] != 1.0:
+    print("❌ Tick progressions not recovered")
+    exit(1)
+print("✅ Axes labelled")
+
+# Test 2: Raster plots
+print("\n[TEST 2] Medians from rendered KM plots")
+print("-"*60)
+
+errors = []
+for seed in range(4):
+    start = time.perf_counter()
+    result = digitize_km(km_curve_image(seed=seed), TICK_TEXT)
+    elapsed = (time.perf_counter() - start) * 1000
+    expected = (true_median(24.8, seed * 2, 120), true_median(11.2, seed * 2 + 1, 120))
+    found = (result.get('median_survival_treatment'), result.get('median_survival_control'))
+    print(f"   Seed {seed}: {found} vs {tuple(round(e, 1) for e in expected)}, "
+          f"confidence {result['confidence']}, {elapsed:.0f}ms")
+    if None in found:
+        print(f"❌ Digitizer failed: {result.get('reason')}")
+        exit(1)
+    errors += [abs(f - e) for f, e in zip(found, expected)]
+
+if max(errors) > 0.5:
+    print(f"❌ Median error up to {max(errors):.2f} months")
+    exit(1)
+print(f"✅ Max median error {max(errors):.2f} months; HR {result['hazard_ratio']}, p {result['p_value']}")
+
+image = km_curve_image(seed=0)
+result = digitize_km(image, AXIS_TEXT)
+if image.size != (2400, 1800):
+    print(f"❌ Caller's image resized to {image.size}")
+    exit(1)
+if result['confidence'] >= KM_DIGITIZER_MIN_CONFIDENCE or result['data_quality'] == "High":
+    print(f"❌ Arms trusted without a legend: confidence {result['confidence']}, {result['data_quality']}")
+    exit(1)
+result = digitize_km(km_curve_image(seed=0), f"{AXIS_TEXT} red: Drug X; blue: placebo")
+if result['confidence'] < KM_DIGITIZER_MIN_CONFIDENCE or \
+        abs(result['median_survival_treatment'] - true_median(11.2, 1, 120)) > 0.5:
+    print(f"❌ Arms not taken from the colour legend: {result}")
+    exit(1)
+result = digitize_km(km_curve_image(seed=0), f"{AXIS_TEXT} blue: placebo")
+if result['confidence'] < KM_DIGITIZER_MIN_CONFIDENCE or \
+        abs(result['median_survival_treatment'] - true_median(11.2, 1, 120)) > 0.5:
+    print(f"❌ Lone placebo label not taken as the control: {result}")
+    exit(1)
+result = digitize_km(km_curve_image(seed=0), f"{AXIS_TEXT} red: Drug X + chemotherapy")
+if result['confidence'] >= KM_DIGITIZER_MIN_CONFIDENCE:
+    print(f"❌ Lone combination label taken as the control: confidence {result['confidence']}")
+    exit(1)
+print("✅ Arms assigned from the legend; without one the result is left to the model")
+
+# Test 3: Vector plot cropped from a PDF, labels from the text layer
+if PDF_AVAILABLE:
+    print("\n[TEST 3] KM plot cropped from a PDF page")
+    print("-"*60)
+
+    pdf_path = make_trial_pdf(os.path.join(tempfile.mkdtemp(), "trial.pdf"), seed=3)
+    region = process_page_range(pdf_path, [6])[0]['regions'][0]
+    result = digitize_km(region['image'], f"{region['caption']} {region['text']}")
+    expected = (true_median(24.8, 3, 60), true_median(11.2, 4, 60))
+    print(f"   Medians: {result.get('median_survival_treatment')} / {result.get('median_survival_control')} "
+          f"(expected {expected[0]:.1f} / {expected[1]:.1f})")
+    if result['confidence'] < 0.9 or abs(result['median_survival_treatment'] - expected[0]) > 0.5:
+        print(f"❌ Unexpected digitizer result: {result}")
+        exit(1)
+    print("✅ Read from the crop and its text layer")
+
+# Test 4: Model only when the digitizer is unsure
+print("\n[TEST 4] analyze_survival_curve fast path and fallback")
+print("-"*60)
+
+analyzer = PDFAnalyzer(use_mock=True)
+analyzer.use_mock = False  # Real path, mock model underneath
+usage_tracker.reset()
+
+analyzer.analyze_survival_curve(km_curve_image(seed=0), TICK_TEXT)  # Clean colour plot
+analyzer.analyze_survival_curve(km_curve_image(seed=1).convert('L'), TICK_TEXT)  # Monochrome arms
+analyzer.analyze_survival_curve(km_curve_image(seed=2))  # No tick labels
+
+site = usage_tracker.report()['by_call_site']['analyze_survival_curve']
+print(f"   Local: {site['local_results']}, model calls: {site['calls']}")
+if site['local_results'] != 1 or site['calls'] != 2:
+    print("❌ Expected one local result and two model fallbacks")
+    exit(1)
+print("✅ Model called only for plots the digitizer can't read")
+
+print("\n✅ KM digitizer ready")
\ No newline at end of file
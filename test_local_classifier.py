@@ -0,0 +1,132 @@
+# test_local_classifier.py
+"""Test the rule-based pre-classifier and the fewer model calls it buys"""
+
+import json
+from benchmarks.synthetic import make_trial
+from src.utils.keyword_matcher import KeywordMatcher
+from src.analyzers.local_classifier import classify_locally, agreement
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.utils.schemas import TRIAL_CLASSIFICATION_SCHEMA
+from src.utils.usage import usage_tracker
+
+print("="*60)
+print("LOCAL PRE-CLASSIFIER")
+print("="*60)
+
+# Test 1: Keyword matcher
+print("\n[TEST 1] Whole-word, longest-match keyword search")
+print("-"*60)
+
+matcher = KeywordMatcher({'lung cancer': 'lung', 'non small cell lung cancer': 'nsclc', 'cancer': 'any',
+                          'all': 'leukemia'})
+found = matcher.find('Carcinoma; Non-Small-Cell LUNG cancer, small  ball')
+if found != [('non small cell lung cancer', 'nsclc')]:
+    print(f"❌ Unexpected matches: {found}")
+    exit(1)
+if matcher.find('Cancer of the lung') != [('cancer', 'any')]:
+    print("❌ Short term not found on its own")
+    exit(1)
+print("✅ Punctuation and case ignored, longest term wins, no partial words ('small' ≠ 'all')")
+
+# Test 2: Classification and confidence
+print("\n[TEST 2] Classifying from conditions and intervention types")
+print("-"*60)
+
+def case_trial(i, conditions, types, title="Study"):
+    return make_trial(i, title=title, conditions=conditions,
+                      interventions=[{'type': kind, 'name': f"{kind.lower()} {n}"} for n, kind in enumerate(types)])
+
+cases = [
+    (case_trial(1, ['Non-Small Cell Lung Cancer', 'EGFR Mutation'], ['DRUG']),
+     ('Oncology', 'Lung Cancer', 'Drug'), True),
+    (case_trial(2, ['Diffuse Large B-Cell Lymphoma'], ['BIOLOGICAL', 'DRUG'], "Anti-CD19 CAR-T Cells"),
+     ('Oncology', 'Hematologic Malignancy', 'Biological'), True),
+    (case_trial(3, ['Type 2 Diabetes Mellitus'], ['DRUG', 'DRUG']), ('Endocrinology', 'Diabetes', 'Drug'), True),
+    (case_trial(4, ['Rare Syndrome X'], ['DRUG']), (None, None, 'Drug'), False),
+    (case_trial(5, ['Heart Failure', 'Multiple Myeloma'], ['DRUG']), None, False),
+    (case_trial(6, ['Asthma'], ['DRUG', 'DEVICE', 'BEHAVIORAL']), None, False),
+]
+for trial, expected, confident in cases:
+    local = classify_locally(trial)
+    labels = (local['therapeutic_area'], local['disease_category'], local['intervention_class'])
+    if expected and labels != expected:
+        print(f"❌ {trial['conditions']}: {labels}, expected {expected}")
+        exit(1)
+    if (local['confidence'] >= 0.75) != confident:
+        print(f"❌ {trial['conditions']}: confidence {local['confidence']}")
+        exit(1)
+print(f"✅ {len(cases)} trials: known conditions confident; unknown, conflicting or mixed ones deferred")
+
+# Test 3: Fewer model calls, same output shape
+print("\n[TEST 3] analyze_batch with and without the pre-classifier")
+print("-"*60)
+
+trials = [trial for trial, _, _ in cases] * 4
+trials = [{**trial, 'nct_id': f"NCT{81000000 + i:08d}"} for i, trial in enumerate(trials)]
+
+def run(local_classifier):
+    analyzer = TrialAnalyzer(use_mock=True, local_classifier=local_classifier, assessment_batch_size=5)
+    usage_tracker.reset()
+    analyzed = analyzer.analyze_batch(trials)
+    return analyzed, usage_tracker.report()
+
+baseline, baseline_usage = run(False)
+analyzed, usage = run(True)
+if [t['nct_id'] for t in analyzed] != [t['nct_id'] for t in trials]:
+    print("❌ Input order not kept")
+    exit(1)
+for trial in analyzed:
+    analysis = trial['analysis']
+    missing = [f for f in TRIAL_CLASSIFICATION_SCHEMA['required'] if analysis.get(f) in (None, "Unknown")]
+    if missing:
+        print(f"❌ {trial['nct_id']} missing {missing}: {json.dumps(analysis)}")
+        exit(1)
+local_count = sum('local_confidence' in t['analysis'] for t in analyzed)
+calls, before = usage['totals']['calls'], baseline_usage['totals']['calls']
+# 12 confident trials in batches of 5, plus 12 uncertain ones alone
+if local_count != 12 or calls != 3 + 12 or before != len(trials):
+    print(f"❌ {local_count} local, {calls} calls (was {before})")
+    exit(1)
+if usage['by_call_site']['classify_trial']['local_results'] != 12:
+    print("❌ Local results not recorded")
+    exit(1)
+print(f"✅ {before} → {calls} model calls; {local_count} trials classified locally, all fields filled")
+
+# Test 4: A batch reply missing a trial falls back to a single assessment
+print("\n[TEST 4] Incomplete batch reply")
+print("-"*60)
+
+analyzer = TrialAnalyzer(use_mock=True)
+generate = analyzer._generate
+def drop_first(prompt, schema, call_site):
+    response = generate(prompt, schema, call_site)
+    if call_site == 'assess_trials' and len(schema['properties']) > 1:
+        reply = json.loads(response.text)
+        reply.pop(sorted(reply)[0])
+        response.text = json.dumps(reply)
+    return response
+analyzer._generate = drop_first
+pair = [cases[0][0], {**cases[0][0], 'nct_id': 'NCT80000099'}]
+usage_tracker.reset()
+results = analyzer._assess_trials([(trial, classify_locally(trial)) for trial in pair])
+if usage_tracker.report()['totals']['calls'] != 2 or any(r['innovation_level'] == "Unknown" for r in results):
+    print("❌ Missing trial was not assessed separately")
+    exit(1)
+print("✅ Missing trial assessed on its own")
+
+# Test 5: Agreement with a model classification
+print("\n[TEST 5] Agreement scoring")
+print("-"*60)
+
+local = classify_locally(cases[1][0])
+model = {'therapeutic_area': 'Oncology', 'disease_category': 'Hematologic Malignancy - DLBCL',
+         'intervention_class': 'Biological - CAR-T Cell Therapy'}
+if agreement(local, model) != {'therapeutic_area': True, 'disease_category': True, 'intervention_class': True}:
+    print(f"❌ {agreement(local, model)}")
+    exit(1)
+if agreement(local, {**model, 'therapeutic_area': 'Hematology'})['therapeutic_area']:
+    print("❌ Different areas must disagree")
+    exit(1)
+print("✅ Area matched exactly; category and class by shared words")
+
+print("\n✅ Local pre-classifier ready")
\ No newline at end of file
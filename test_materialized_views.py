@@ -0,0 +1,172 @@
+# test_materialized_views.py
+"""Test precomputed dashboard views and their freshness"""
+
+import os
+import tempfile
+import time
+from benchmarks.synthetic import make_trial
+from src.utils.materialized_views import ViewStore, Precomputer, view_key
+from src.analyzers.trial_analyzer import TrialAnalyzer, ANALYSIS_FAILED
+
+print("="*60)
+print("MATERIALIZED VIEWS")
+print("="*60)
+
+class Scraper:
+    """Serves a fixed trial list per condition and counts searches"""
+
+    def __init__(self):
+        self.trials = {}
+        self.searches = 0
+
+    def search_trials(self, condition, max_results=20):
+        self.searches += 1
+        trials = self.trials.setdefault(view_key(condition), [
+            make_trial(len(self.trials) * 1000 + i, title=f"{condition} study {i}", conditions=[condition])
+            for i in range(12)])
+        return [dict(trial) for trial in trials[:max_results]]
+
+class Analyzer(TrialAnalyzer):
+    """Mock analyzer counting the trials it analyzes and the comparisons it makes"""
+
+    def __init__(self):
+        super().__init__(use_mock=True)
+        self.analyzed, self.comparisons = [], 0
+
+    def analyze_batch(self, trials, max_workers=None):
+        self.analyzed.extend(trial['nct_id'] for trial in trials)
+        return super().analyze_batch(trials)
+
+    def compare_trials(self, trials):
+        self.comparisons += 1
+        return super().compare_trials(trials)
+
+def new_store():
+    return ViewStore(os.path.join(tempfile.mkdtemp(), 'views.sqlite'))
+
+# Test 1: Building and reusing views
+print("\n[TEST 1] Refreshes analyze only what changed")
+print("-"*60)
+
+store, scraper, analyzer = new_store(), Scraper(), Analyzer()
+precomputer = Precomputer(store, scraper, analyzer, conditions=['CAR-T Cell Therapy'], max_results=10)
+if precomputer.run_once() != ['CAR-T Cell Therapy'] or len(analyzer.analyzed) != 10 or analyzer.comparisons != 1:
+    print(f"❌ First refresh: {len(analyzer.analyzed)} analyzed, {analyzer.comparisons} comparisons")
+    exit(1)
+view = store.get('  car-t cell THERAPY ')
+if view is None or len(view.trials) != 10 or len(view.analyses) != 10 or len(view.compared) != 5:
+    print("❌ View not stored under its normalized condition")
+    exit(1)
+if precomputer.run_once() != []:
+    print("❌ Fresh view refreshed again")
+    exit(1)
+
+analyzer.analyzed.clear()
+scraper.trials[view_key('CAR-T Cell Therapy')][7]['status'] = 'COMPLETED'
+precomputer.run_once(force=True)
+if analyzer.analyzed != [view.trials[7]['nct_id']] or analyzer.comparisons != 1:
+    print(f"❌ Unchanged trials re-analyzed: {analyzer.analyzed}, {analyzer.comparisons} comparisons")
+    exit(1)
+analyzer.analyzed.clear()
+scraper.trials[view_key('CAR-T Cell Therapy')][2]['status'] = 'COMPLETED'
+precomputer.run_once(force=True)
+if analyzer.analyzed != [view.trials[2]['nct_id']] or analyzer.comparisons != 2:
+    print("❌ Compared set not re-compared after one of its trials changed")
+    exit(1)
+print("✅ 10 trials analyzed once; later refreshes re-analyze only moved trials and re-compare only when needed")
+
+# Degraded analyses are retried even when the trial did not change
+stored = store.get('CAR-T Cell Therapy')
+analyses = {**stored.analyses, stored.trials[4]['nct_id']: {**stored.analyses[stored.trials[4]['nct_id']],
+                                                            'target_population': ANALYSIS_FAILED}}
+store.put('CAR-T Cell Therapy', stored.trials, analyses, stored.compared, stored.summary, 10)
+analyzer.analyzed.clear()
+precomputer.run_once(force=True)
+if analyzer.analyzed != [stored.trials[4]['nct_id']]:
+    print(f"❌ Failed analysis kept: {analyzer.analyzed}")
+    exit(1)
+print("✅ Fallback analyses re-analyzed on the next refresh")
+
+# A failed search leaves the view alone
+stored = store.get('CAR-T Cell Therapy')
+search, scraper.search_trials = scraper.search_trials, lambda condition, max_results=20: []  # As on a request error
+refreshed = precomputer.run_once(force=True)
+scraper.search_trials = search
+kept = store.get('CAR-T Cell Therapy')
+if refreshed or [t['nct_id'] for t in kept.trials] != [t['nct_id'] for t in stored.trials] or kept.summary != stored.summary:
+    print(f"❌ Empty search replaced the view: {len(kept.trials)} trials")
+    exit(1)
+print("✅ Empty search result logged and skipped; the previous view is kept")
+
+# Test 2: Store
+print("\n[TEST 2] Popular conditions and shared storage")
+print("-"*60)
+
+for condition, count in [('Multiple Myeloma', 3), ('multiple  myeloma', 1), ('Asthma', 2), ('Gout', 1)]:
+    for _ in range(count):
+        store.record_request(condition, served=False)
+if [view_key(c) for c in store.popular(2)] != ['multiple myeloma', 'asthma']:
+    print(f"❌ Popular: {store.popular(2)}")
+    exit(1)
+precomputer.popular = 2
+if [view_key(c) for c in precomputer.conditions()] != ['car-t cell therapy', 'multiple myeloma', 'asthma']:
+    print(f"❌ Conditions: {precomputer.conditions()}")
+    exit(1)
+precomputer.run_once()
+other_process = ViewStore(store.path)
+if sorted(view_key(c) for c in other_process.ages()) != ['asthma', 'car-t cell therapy', 'multiple myeloma']:
+    print(f"❌ Views not shared: {other_process.ages()}")
+    exit(1)
+if store.get('Asthma', max_age=0.0) is not None:
+    print("❌ View older than max_age served")
+    exit(1)
+print(f"✅ Most requested {store.popular(2)} kept fresh with the configured condition; views visible to other processes")
+
+# Test 3: API
+print("\n[TEST 3] Dashboard served from views, with freshness")
+print("-"*60)
+
+import app as app_module
+import src.utils.materialized_views as materialized_views
+materialized_views.view_store = store
+app_module.scraper = scraper
+app_module.analyzer = analyzer
+client = app_module.app.test_client()
+
+searches, analyzed, misses = scraper.searches, len(analyzer.analyzed), store.misses
+time.sleep(0.05)
+result = client.post('/api/search', json={'condition': 'CAR-T Cell Therapy', 'max_results': 10}).get_json()
+analysis = client.post('/api/analyze').get_json()
+if scraper.searches != searches or len(analyzer.analyzed) != analyzed:
+    print("❌ Dashboard request went to the scraper or model")
+    exit(1)
+if result['freshness']['source'] != 'materialized' or not result['freshness']['age_seconds'] >= 0.0 \
+        or analysis['freshness']['source'] != 'materialized':
+    print(f"❌ Freshness: {result['freshness']}, {analysis['freshness']}")
+    exit(1)
+view = store.get('CAR-T Cell Therapy')
+if [t['nct_id'] for t in result['trials']] != [t['nct_id'] for t in view.trials] or \
+        [t['analysis'] for t in analysis['analysis']['trials']] != [view.analyses[i] for i in view.compared] or \
+        analysis['analysis']['summary'] != view.summary:
+    print("❌ Served results differ from the view")
+    exit(1)
+if client.get('/api/trials?limit=3').get_json()['freshness']['source'] != 'materialized':
+    print("❌ Paged results do not report freshness")
+    exit(1)
+print(f"✅ Search and analysis answered from the view ({result['freshness']['age_seconds']}s old)")
+
+live = client.post('/api/search', json={'condition': 'CAR-T Cell Therapy', 'max_results': 50}).get_json()
+if live['freshness']['source'] != 'live' or scraper.searches != searches + 1:
+    print("❌ Search larger than the view not sent live")
+    exit(1)
+client.post('/api/search', json={'condition': 'Lupus', 'max_results': 10})
+if client.post('/api/analyze').get_json()['freshness']['source'] != 'live' or len(analyzer.analyzed) != analyzed + 5:
+    print("❌ Condition without a view not analyzed live")
+    exit(1)
+views = client.get('/api/status').get_json()['views']
+if views['hits'] != 1 or views['misses'] != misses + 2 or 'lupus' not in [view_key(c) for c in store.popular(10)]:
+    print(f"❌ Status: {views}")
+    exit(1)
+print("✅ Larger searches and unknown conditions go live and are counted towards popularity")
+
+print("\n✅ Materialized views ready")
\ No newline at end of file
@@ -0,0 +1,100 @@
+# test_pdf_pipeline.py
+"""Test the PDF page pipeline and full-document result extraction (mock model)"""
+
+import os
+import tempfile
+import time
+from benchmarks.synthetic import make_trial_pdf
+from src.utils.pdf_pipeline import PDF_AVAILABLE, iter_pages, iter_document_pages, page_count
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+
+print("="*60)
+print("PDF INGESTION PIPELINE")
+print("="*60)
+
+if not PDF_AVAILABLE:
+    print("❌ PyMuPDF not installed - pip install pymupdf")
+    exit(1)
+
+workdir = tempfile.mkdtemp()
+pdf_path = make_trial_pdf(os.path.join(workdir, "trial_results.pdf"), text_pages=6, scanned_pages=1)
+
+# Test 1: Page classification
+print("\n[TEST 1] Text layers and vision routing")
+print("-"*60)
+
+pages = sorted(iter_pages(pdf_path, workers=2), key=lambda p: p['page_number'])
+for page in pages:
+    print(f"   Page {page['page_number']}: {len(page['text']):5d} chars, "
+          f"vision={page['vision_reason'] or '-'}, image={len(page['image'] or b'')} bytes")
+    for region in page['regions']:
+        print(f"      {region['kind']} → {region['route']} ({region['caption'][:40]}), crop={len(region['image'] or b'')} bytes")
+
+vision_pages = [p['page_number'] for p in pages if p['needs_vision']]
+if vision_pages != [7, 9]:
+    print(f"❌ Expected the KM figure (7) and scan (9) to need vision, got {vision_pages}")
+    exit(1)
+if any(p['image'] or any(r['image'] for r in p['regions']) for p in pages if not p['needs_vision']):
+    print("❌ Text-only pages should not be rasterized")
+    exit(1)
+print("✅ Only figure and scanned pages rasterized (the AE table is read from the text layer)")
+
+# Test 1b: Layout routing
+print("\n[TEST 1b] Figure/table crops and routing")
+print("-"*60)
+
+routes = [(p['page_number'], r['kind'], r['route']) for p in pages for r in p['regions']]
+if routes != [(7, 'figure', 'survival_curve'), (8, 'table', 'adverse_events')]:
+    print(f"❌ Unexpected regions: {routes}")
+    exit(1)
+
+figure = pages[6]['regions'][0]
+x0, y0, x1, y1 = figure['bbox']
+if (x1 - x0) * (y1 - y0) > 0.5 * pages[6]['width'] * pages[6]['height']:
+    print("❌ Figure crop is not much smaller than the page")
+    exit(1)
+print(f"✅ KM plot cropped to {x1 - x0:.0f}x{y1 - y0:.0f}pt, AE table routed to the AE extractor")
+
+# Test 2: Many documents through one pool
+print("\n[TEST 2] Bulk throughput")
+print("-"*60)
+
+paths = [make_trial_pdf(os.path.join(workdir, f"doc_{i}.pdf"), seed=i) for i in range(8)]
+start = time.perf_counter()
+count = sum(1 for _ in iter_document_pages(paths, workers=os.cpu_count()))
+elapsed = time.perf_counter() - start
+print(f"✅ {count} pages in {elapsed:.2f}s ({count / elapsed:.0f} pages/s, {os.cpu_count()} workers)")
+
+# Test 3: Full extraction against the mock model
+print("\n[TEST 3] extract_trial_results on a real file")
+print("-"*60)
+
+analyzer = PDFAnalyzer(use_mock=True)
+results = analyzer.extract_trial_results(pdf_path)
+print(f"   Primary endpoint: {results.get('primary_endpoint')}")
+print(f"   Pages: {results.get('pages')}, figures analyzed: {results.get('figures_analyzed')}")
+
+if 'error' in results or results.get('pages') != 9 or results.get('figures_analyzed') != 3:
+    print(f"❌ Unexpected result: {results}")
+    exit(1)
+print("✅ Document processed end to end")
+
+# Test 4: One bad file in a bulk run
+print("\n[TEST 4] Unreadable documents do not stop the others")
+print("-"*60)
+
+broken = os.path.join(workdir, "broken.pdf")
+with open(broken, 'wb') as f:
+    f.write(b"%PDF-1.4 not really a PDF")
+errors = {}
+count = sum(1 for _ in iter_document_pages([paths[0], broken, paths[1]], workers=2, errors=errors))
+if count != page_count(paths[0]) + page_count(paths[1]) or list(errors) != [broken]:
+    print(f"❌ {count} pages, errors {errors}")
+    exit(1)
+results = analyzer.extract_results_bulk([paths[0], broken, paths[1]], workers=2)
+if 'error' not in results[broken] or any('error' in results[path] for path in paths[:2]):
+    print(f"❌ Bulk results: { {path: result.get('error') for path, result in results.items()} }")
+    exit(1)
+print(f"✅ {os.path.basename(broken)}: {results[broken]['error']}; the other documents extracted")
+
+print("\n✅ PDF pipeline ready")
\ No newline at end of file
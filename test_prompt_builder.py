@@ -0,0 +1,74 @@
+# test_prompt_builder.py
+"""Test token-budgeted prompts for classify_trial and compare_trials"""
+
+from benchmarks.synthetic import make_trial
+from src.utils.prompt_builder import PromptBuilder
+from src.utils.usage import usage_tracker, estimate_tokens
+from src.analyzers.trial_analyzer import TrialAnalyzer
+
+print("="*60)
+print("PROMPT BUDGETS")
+print("="*60)
+
+# Test 1: Builder
+print("\n[TEST 1] Item sections cut to the budget, by priority")
+print("-"*60)
+
+builder = (PromptBuilder(40)
+           .text("Header line")
+           .items('low', "Low: ", [f"low item {i}" for i in range(50)], priority=1)
+           .items('high', "High: ", [f"high item {i}" for i in range(5)], priority=2))
+prompt = builder.build()
+if estimate_tokens(prompt) > 40 or "high item 4" not in prompt or "low item 0" not in prompt:
+    print(f"❌ Unexpected prompt ({estimate_tokens(prompt)} tokens):\n{prompt}")
+    exit(1)
+if "more)" not in prompt.split('\n')[1] or builder.stats['dropped'].keys() != {'low'}:
+    print(f"❌ Cut not reported: {builder.stats}")
+    exit(1)
+print(f"✅ {builder.stats['untrimmed_tokens']} → {builder.stats['tokens']} tokens; high-priority section whole")
+
+untouched = PromptBuilder(1000).text("A").items('x', "X: ", ['1', '2']).build()
+if untouched != "A\nX: 1, 2":
+    print(f"❌ Prompt within budget changed: {untouched!r}")
+    exit(1)
+print("✅ Prompts within budget are left whole")
+
+# Test 2: classify_trial with a very long intervention list
+print("\n[TEST 2] classify_trial prompt stays within budget")
+print("-"*60)
+
+trial = make_trial(1, title='Basket study', conditions=['Rare Syndrome X'],
+                   interventions=[{'type': 'DRUG', 'name': f"Investigational compound {i}"} for i in range(300)])
+analyzer = TrialAnalyzer(use_mock=True, local_classifier=False)
+usage_tracker.reset()
+analysis = analyzer.classify_trial(trial)
+site = usage_tracker.report()['by_call_site']['classify_trial']
+stats = site['last_prompt']
+if stats['tokens'] > stats['budget'] or stats['dropped'].get('interventions', 0) == 0 or site['prompts_trimmed'] != 1:
+    print(f"❌ {stats}")
+    exit(1)
+if analysis['therapeutic_area'] == "Unknown":
+    print("❌ Classification failed")
+    exit(1)
+print(f"✅ {stats['untrimmed_tokens']} → {stats['tokens']} tokens, {stats['dropped']['interventions']} interventions left out")
+
+# Test 3: compare_trials with thousands of distinct insights
+print("\n[TEST 3] compare_trials prompt stays within budget")
+print("-"*60)
+
+trials = [make_trial(i, phase='PHASE3',
+                     analysis={'therapeutic_area': 'Oncology', 'innovation_level': 'Novel',
+                               'key_insights': [f"Insight {i % 2000} about the competitive position", "Shared insight"]})
+          for i in range(5000)]
+usage_tracker.reset()
+summary = analyzer.compare_trials(trials)
+stats = usage_tracker.report()['by_call_site']['compare_trials']['last_prompt']
+if stats['tokens'] > stats['budget'] or not stats['dropped'].get('top_insights'):
+    print(f"❌ {stats}")
+    exit(1)
+if len(summary['top_insights']) != 10000:
+    print("❌ The returned summary must keep every insight")
+    exit(1)
+print(f"✅ {stats['untrimmed_tokens']:,} → {stats['tokens']:,} tokens; summary itself unchanged")
+
+print("\n✅ Prompt budgets ready")
\ No newline at end of file
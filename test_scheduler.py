@@ -0,0 +1,102 @@
+# test_scheduler.py
+"""Test the priority scheduler in front of the model (caps, weighted fair queuing, wait stats)"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.scheduler import QuotaScheduler, scheduler
+from src.analyzers.trial_analyzer import TrialAnalyzer
+
+print("="*60)
+print("MODEL CALL SCHEDULER")
+print("="*60)
+
+def run(sched, priority, log, seconds=0.01, cost=1.0):
+    with sched.slot(priority, cost):
+        log.append(priority)
+        time.sleep(seconds)
+
+# Test 1: Caps
+print("\n[TEST 1] Total and per-class concurrency caps")
+print("-"*60)
+
+sched = QuotaScheduler(max_concurrency=4, classes={'interactive': {'weight': 8, 'max_concurrency': 4},
+                                                   'batch': {'weight': 1, 'max_concurrency': 3}})
+peak = {'batch': 0, 'all': 0}
+lock = threading.Lock()
+def observed(priority):
+    with sched.slot(priority):
+        with lock:
+            report = sched.report()
+            peak['batch'] = max(peak['batch'], report['classes']['batch']['running'])
+            peak['all'] = max(peak['all'], report['running'])
+        time.sleep(0.01)
+with ThreadPoolExecutor(max_workers=20) as executor:
+    list(executor.map(observed, ['batch'] * 30 + ['interactive'] * 10))
+if peak['batch'] > 3 or peak['all'] > 4:
+    print(f"❌ Caps exceeded: {peak}")
+    exit(1)
+print(f"✅ Peak {peak['all']} in flight, {peak['batch']} batch")
+
+# Test 2: Interactive calls jump the batch queue
+print("\n[TEST 2] Interactive calls go ahead of queued batch work")
+print("-"*60)
+
+sched = QuotaScheduler(max_concurrency=2, classes={'interactive': {'weight': 8, 'max_concurrency': 2},
+                                                   'batch': {'weight': 1, 'max_concurrency': 2}})
+log = []
+with ThreadPoolExecutor(max_workers=40) as executor:
+    batch = [executor.submit(run, sched, 'batch', log) for _ in range(30)]
+    time.sleep(0.03)  # Batch queue backed up
+    interactive = [executor.submit(run, sched, 'interactive', log) for _ in range(4)]
+    for future in batch + interactive:
+        future.result()
+last_interactive = max(i for i, priority in enumerate(log) if priority == 'interactive')
+report = sched.report()['classes']
+if last_interactive > 14 or report['interactive']['wait_p95_ms'] >= report['batch']['wait_p95_ms']:
+    print(f"❌ Interactive calls served at positions up to {last_interactive}: {report}")
+    exit(1)
+print(f"✅ All interactive calls served by position {last_interactive} of {len(log)}; "
+      f"p95 wait {report['interactive']['wait_p95_ms']:.0f} ms vs batch {report['batch']['wait_p95_ms']:.0f} ms")
+
+# Test 3: Weighted sharing when both classes are backlogged
+print("\n[TEST 3] Weighted fair share")
+print("-"*60)
+
+sched = QuotaScheduler(max_concurrency=1, classes={'a': {'weight': 3, 'max_concurrency': 1},
+                                                   'b': {'weight': 1, 'max_concurrency': 1}})
+log = []
+with ThreadPoolExecutor(max_workers=80) as executor:
+    with sched.slot('a'):  # Hold the only slot until both queues are full
+        futures = [executor.submit(run, sched, name, log, 0.001) for name in ['a', 'b'] * 40]
+        time.sleep(0.1)
+    for future in futures:
+        future.result()
+share = log[:40].count('a')
+if not 27 <= share <= 33:
+    print(f"❌ Class 'a' got {share} of the first 40 slots, expected ~30")
+    exit(1)
+print(f"✅ Weights 3:1 → {share}:{40 - share} of the first 40 slots")
+
+try:
+    with sched.slot('nightly'):
+        pass
+    print("❌ Unknown class accepted")
+    exit(1)
+except ValueError as e:
+    print(f"✅ Rejected: {e}")
+
+# Test 4: Analyzer calls go through the shared scheduler
+print("\n[TEST 4] TrialAnalyzer priority")
+print("-"*60)
+
+before = scheduler.report()['classes']['batch']['dispatched']
+analyzer = TrialAnalyzer(use_mock=True, local_classifier=False, priority='batch')
+analyzer.classify_trial({'nct_id': 'NCT60000001', 'title': 'Study', 'conditions': ['Asthma'], 'phase': 'PHASE2',
+                         'interventions': [{'type': 'DRUG', 'name': 'x'}]})
+if scheduler.report()['classes']['batch']['dispatched'] != before + 1:
+    print("❌ Batch analyzer call not scheduled as batch")
+    exit(1)
+print("✅ Call scheduled in the analyzer's class")
+
+print("\n✅ Scheduler ready")
\ No newline at end of file
@@ -0,0 +1,111 @@
+# test_single_flight.py
+"""Test coalescing of identical concurrent searches and analyses"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import app as app_module
+from benchmarks.synthetic import make_trial
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.utils.gemini_wrapper import get_gemini_model, MockSimulation
+from src.utils.single_flight import SingleFlight
+from src.utils.usage import usage_tracker
+
+print("="*60)
+print("REQUEST COALESCING")
+print("="*60)
+
+# Test 1: One execution per key in flight
+print("\n[TEST 1] Concurrent identical calls run once")
+print("-"*60)
+
+flights = SingleFlight('test')
+runs = {'a': 0, 'b': 0}
+lock = threading.Lock()
+
+def slow(key):
+    def run():
+        with lock:
+            runs[key] += 1
+        time.sleep(0.2)
+        return [key]
+    return run
+
+with ThreadPoolExecutor(max_workers=10) as executor:
+    futures = [executor.submit(flights.do, key, slow(key)) for key in 'aaaaabbbbb']
+    outcomes = [future.result() for future in futures]
+
+if runs != {'a': 1, 'b': 1}:
+    print(f"❌ Executions per key: {runs}")
+    exit(1)
+if len({id(result) for result, _ in outcomes}) != 2 or sum(shared for _, shared in outcomes) != 8:
+    print("❌ Callers did not share the leader's result")
+    exit(1)
+print(f"✅ 10 calls, 2 executions: {flights.report()}")
+
+# Sequential calls are not cached
+flights.do('a', slow('a'))
+if runs['a'] != 2:
+    print("❌ A finished call must not be reused")
+    exit(1)
+print("✅ Finished calls are forgotten")
+
+# Test 2: Errors reach every waiter
+print("\n[TEST 2] A failure is shared, not retried by each caller")
+print("-"*60)
+
+def failing():
+    time.sleep(0.1)
+    raise RuntimeError("upstream down")
+
+def attempt():
+    try:
+        flights.do('down', failing)
+    except RuntimeError as e:
+        return str(e)
+
+with ThreadPoolExecutor(max_workers=4) as executor:
+    errors = list(executor.map(lambda _: attempt(), range(4)))
+if errors != ["upstream down"] * 4:
+    print(f"❌ Errors: {errors}")
+    exit(1)
+print("✅ All 4 callers saw the one failure")
+
+# Test 3: Dashboard endpoints
+print("\n[TEST 3] Concurrent /api/search and /api/analyze")
+print("-"*60)
+
+class SlowScraper:
+    """Counts fetches; slow enough that concurrent requests overlap"""
+    calls = 0
+    def search_trials(self, condition, max_results=20):
+        SlowScraper.calls += 1
+        time.sleep(0.2)
+        return [make_trial(i) for i in range(max_results)]
+
+app_module.scraper = SlowScraper()
+analyzer = TrialAnalyzer(use_mock=True, local_classifier=False)  # One model call per classified trial
+analyzer.model = get_gemini_model(use_mock=True, simulation=MockSimulation(latency_ms=50))  # Analyses overlap
+app_module.analyzer = analyzer
+
+def post(path, json=None):
+    return app_module.app.test_client().post(path, json=json).get_json()
+
+with ThreadPoolExecutor(max_workers=6) as executor:
+    searches = list(executor.map(lambda _: post('/api/search', {'condition': 'Lymphoma', 'max_results': 8}),
+                                 range(6)))
+if SlowScraper.calls != 1 or any(s['count'] != 8 for s in searches):
+    print(f"❌ 6 identical searches made {SlowScraper.calls} fetches")
+    exit(1)
+print("✅ 6 identical searches, 1 ClinicalTrials.gov fetch")
+
+usage_tracker.reset()
+with ThreadPoolExecutor(max_workers=4) as executor:
+    analyses = list(executor.map(lambda _: post('/api/analyze'), range(4)))
+calls = usage_tracker.report()['totals']['calls']
+if calls != 6 or not all(a['success'] for a in analyses):
+    print(f"❌ 4 identical analyses made {calls} model calls (one analysis is 6)")
+    exit(1)
+print(f"✅ 4 identical analyses, {calls} model calls")
+
+print("\n✅ Request coalescing ready")
\ No newline at end of file
@@ -0,0 +1,80 @@
+# test_startup.py
+"""Test that importing the app is cheap and components are built on first use"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+print("="*60)
+print("COLD START")
+print("="*60)
+
+HEAVY_MODULES = ['pymupdf', 'numpy', 'PIL', 'tqdm', 'requests', 'google.generativeai']
+
+# Runs in a fresh interpreter from an empty directory - this process has already imported things
+PROBE = """
+import json, os, sys
+import app
+loaded = [name for name in %r if name in sys.modules]
+created = os.listdir('.')
+built_on_import = [name for name in ('scraper', 'analyzer', 'pdf_analyzer') if name in vars(app)]
+
+from src.analyzers.trial_analyzer import TrialAnalyzer
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+trial_analyzer, pdf_analyzer = TrialAnalyzer(use_mock=True), PDFAnalyzer(use_mock=True)
+shared = trial_analyzer.model is pdf_analyzer.model
+client_before_request = trial_analyzer.model._model is not None
+response = app.component('analyzer').model.generate_content('ping', call_site='startup_test')
+
+print(json.dumps({'loaded': loaded, 'created': created, 'built_on_import': built_on_import,
+                  'shared': shared, 'client_before_request': client_before_request,
+                  'same_component': app.analyzer is app.component('analyzer'),
+                  'responded': bool(response.text)}))
+""" % HEAVY_MODULES
+
+output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, cwd=tempfile.mkdtemp(),
+                        env={**os.environ, 'PYTHONPATH': os.getcwd(), 'USE_MOCK_GEMINI': 'true'})
+if output.returncode != 0:
+    print(f"❌ Probe failed:\n{output.stderr}")
+    exit(1)
+probe = json.loads(output.stdout.strip().splitlines()[-1])
+
+# Test 1: No heavy imports
+print("\n[TEST 1] `import app` skips the heavy libraries")
+print("-"*60)
+
+if probe['loaded']:
+    print(f"❌ Loaded on import: {', '.join(probe['loaded'])}")
+    exit(1)
+print(f"✅ None of {', '.join(HEAVY_MODULES)} loaded")
+
+# Test 2: No import side effects
+print("\n[TEST 2] No directories created, no components built")
+print("-"*60)
+
+if probe['created']:
+    print(f"❌ Import created {probe['created']}")
+    exit(1)
+if probe['built_on_import']:
+    print(f"❌ Built on import: {probe['built_on_import']}")
+    exit(1)
+print("✅ Working directory untouched, components deferred")
+
+# Test 3: Shared, lazy model
+print("\n[TEST 3] Analyzers share one lazily created model")
+print("-"*60)
+
+if not probe['shared']:
+    print("❌ TrialAnalyzer and PDFAnalyzer hold different model clients")
+    exit(1)
+if probe['client_before_request']:
+    print("❌ Model client created before the first request")
+    exit(1)
+if not (probe['same_component'] and probe['responded']):
+    print("❌ app.analyzer is not the component routes use, or the first request failed")
+    exit(1)
+print("✅ One client per model, created by the first request")
+
+print("\n✅ Startup is lazy")
\ No newline at end of file
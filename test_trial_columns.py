@@ -0,0 +1,116 @@
+# test_trial_columns.py
+"""Test typed trial fields and columnar filters/aggregations"""
+
+import random
+from datetime import date
+from benchmarks.synthetic import make_trial
+from src.utils.trial_columns import (TrialColumns, parse_date, normalize_trial, parse_filters, matches, summarize,
+                                     STATUSES)
+
+print("="*60)
+print("TYPED TRIAL COLUMNS")
+print("="*60)
+
+# Test 1: Normalizing one trial
+print("\n[TEST 1] Enrollment, partial dates, phases, status")
+print("-"*60)
+
+cases = [('2023-05-14', (date(2023, 5, 14), 'day')), ('2023-05', (date(2023, 5, 1), 'month')),
+         ('2023', (date(2023, 1, 1), 'year')), ('Unknown', (None, None)), ('2023-13', (None, None)), (None, (None, None))]
+for value, expected in cases:
+    if parse_date(value) != expected:
+        print(f"❌ parse_date({value!r}) = {parse_date(value)}, expected {expected}")
+        exit(1)
+
+typed = normalize_trial({'enrollment': 'Unknown', 'start_date': '2021-03', 'completion_date': 'Unknown',
+                         'phase': 'PHASE1', 'phases': ['PHASE1', 'PHASE2'], 'status': 'RECRUITING'})
+expected = {'enrollment': None, 'start_date': date(2021, 3, 1), 'start_date_precision': 'month',
+            'completion_date': None, 'completion_date_precision': None, 'phases': ['PHASE1', 'PHASE2'],
+            'status': 'RECRUITING'}
+if typed != expected:
+    print(f"❌ {typed}")
+    exit(1)
+if normalize_trial({'phase': 'PHASE3', 'enrollment': 40})['phases'] != ['PHASE3']:
+    print("❌ Trials without `phases` lose their phase")
+    exit(1)
+print("✅ 'Unknown' → None, partial dates keep their precision, every phase kept")
+
+# Test 2: Filters
+print("\n[TEST 2] Parsing filters")
+print("-"*60)
+
+filters = parse_filters({'min_enrollment': '100', 'start_from': '2020-06', 'phase': 'phase2,PHASE3', 'status': ''})
+if filters != {'enrollment': (100, None), 'start_date': (date(2020, 6, 1), None), 'phase': ['PHASE2', 'PHASE3']}:
+    print(f"❌ {filters}")
+    exit(1)
+for bad in [{'min_enrollment': 'many'}, {'start_to': 'soon'}, {'phase': 'PHASE5'}]:
+    try:
+        parse_filters(bad)
+        print(f"❌ Accepted {bad}")
+        exit(1)
+    except ValueError:
+        pass
+print("✅ Ranges, case-insensitive lists; invalid values rejected")
+
+# Test 3: Columns answer like the per-record path
+print("\n[TEST 3] TrialColumns vs one record at a time")
+print("-"*60)
+
+rng = random.Random(7)
+phase_sets = [[], ['PHASE1'], ['PHASE2'], ['PHASE1', 'PHASE2'], ['PHASE2', 'PHASE3'], ['PHASE3'], ['EARLY_PHASE1']]
+def random_trial(i):
+    year, month, day = rng.randint(2005, 2030), rng.randint(1, 12), rng.randint(1, 28)
+    start = rng.choice([f"{year}-{month:02d}-{day:02d}", f"{year}-{month:02d}", "Unknown"])
+    phases = rng.choice(phase_sets)
+    return make_trial(i, phase=phases[0] if phases else 'N/A', phases=phases,
+                      status=rng.choice(STATUSES[:5] + ['Unknown']),
+                      enrollment=rng.choice([rng.randint(0, 3000), 'Unknown']), start_date=start,
+                      completion_date=rng.choice([f"{year + 3}-{month:02d}", "Unknown"]))
+
+trials = [random_trial(i) for i in range(5000)]
+columns = TrialColumns(trials)
+queries = [{}, {'min_enrollment': '100', 'max_enrollment': '500'}, {'start_from': '2020', 'start_to': '2022-06'},
+           {'completion_to': '2025-12-31', 'phase': 'PHASE2'}, {'status': 'RECRUITING,COMPLETED', 'phase': 'EARLY_PHASE1'},
+           {'start_from': '2021-03-01', 'min_enrollment': '1000', 'phase': 'PHASE1,PHASE3', 'status': 'RECRUITING'}]
+for params in queries:
+    filters = parse_filters(params)
+    expected = [i for i, trial in enumerate(trials) if matches(trial, filters)]
+    found = list(columns.indexes(filters))
+    if found != expected:
+        print(f"❌ {params}: {len(found)} rows vs {len(expected)}")
+        exit(1)
+    if columns.summarize(columns.mask(filters)) != summarize([trials[i] for i in expected]):
+        print(f"❌ {params}: summaries differ\n{columns.summarize(columns.mask(filters))}\n"
+              f"{summarize([trials[i] for i in expected])}")
+        exit(1)
+print(f"✅ {len(queries)} queries agree on rows and summaries; {columns.nbytes / len(trials):.0f} bytes/trial")
+
+# Test 4: API filters
+print("\n[TEST 4] /api/trials filters and /api/trials/summary")
+print("-"*60)
+
+import app as app_module
+app_module.cached_trials = trials
+client = app_module.app.test_client()
+page = client.get('/api/trials?min_enrollment=1000&phase=PHASE3&limit=50&fields=nct_id').get_json()
+expected = [trials[i]['nct_id'] for i in columns.indexes(parse_filters({'min_enrollment': '1000', 'phase': 'PHASE3'}))]
+if page['count'] != len(expected) or [t['nct_id'] for t in page['trials']] != expected[:50]:
+    print(f"❌ Filtered page: {page['count']} trials, expected {len(expected)}")
+    exit(1)
+following = client.get(f"/api/trials?min_enrollment=1000&phase=PHASE3&limit=50&cursor={page['next_cursor']}").get_json()
+if [t['nct_id'] for t in following['trials']] != expected[50:100]:
+    print("❌ Cursor did not continue the filtered list")
+    exit(1)
+if client.get(f"/api/trials?phase=PHASE2&cursor={page['next_cursor']}").status_code != 400:
+    print("❌ Cursor accepted for different filters")
+    exit(1)
+if client.get('/api/trials?start_from=yesterday').status_code != 400:
+    print("❌ Invalid filter accepted")
+    exit(1)
+summary = client.get('/api/trials/summary?status=RECRUITING').get_json()['summary']
+if summary['count'] != sum(trial['status'] == 'RECRUITING' for trial in trials):
+    print(f"❌ Summary: {summary}")
+    exit(1)
+print(f"✅ {page['count']} matching trials paged with a filter-bound cursor; summary of {summary['count']} recruiting")
+
+print("\n✅ Typed trial columns ready")
\ No newline at end of file
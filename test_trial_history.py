@@ -0,0 +1,96 @@
+# test_trial_history.py
+"""Test the versioned trial history store (deltas, snapshots, point-in-time lookup)"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from benchmarks.synthetic import make_trial
+from src.utils.trial_history import TrialHistory
+
+print("="*60)
+print("TRIAL HISTORY")
+print("="*60)
+
+workdir = tempfile.mkdtemp()
+path = os.path.join(workdir, 'history.jsonl')
+history = TrialHistory(path, snapshot_interval=4)
+start = datetime(2026, 1, 1)
+day = lambda n: start + timedelta(days=n)
+
+# Test 1: Storage follows change, not runs
+print("\n[TEST 1] 60 daily runs of 100 trials, 1 trial changing every 3 days")
+print("-"*60)
+
+trials = [make_trial(i) for i in range(100)]
+expected = {}  # (nct_id, day) -> status as of that day
+for n in range(60):
+    if n and n % 3 == 0:
+        trial = trials[7]
+        trial['enrollment'] += 10
+        trial['interventions'].append({'type': 'DRUG', 'name': f"drug {n}"})
+    if n == 30:
+        trials[42]['status'] = 'COMPLETED'
+        del trials[42]['completion_date']
+    history.record(trials, when=day(n))
+    expected[n] = json.loads(json.dumps(trials[7]))
+
+full_copies = len(json.dumps(trials)) * 60
+size = os.path.getsize(path)
+if size > full_copies / 20:
+    print(f"❌ History is {size} bytes - {size / full_copies:.1%} of storing every run")
+    exit(1)
+versions = history.versions('NCT90000007')
+if len(versions) != 20 or len(history.versions('NCT90000001')) != 1:
+    print(f"❌ {len(versions)} versions of the changing trial, expected 20")
+    exit(1)
+print(f"✅ {size:,} bytes vs {full_copies:,} for 60 full copies; 20 versions of the changing trial")
+
+# Test 2: Time travel
+print("\n[TEST 2] as_of returns the trial as it was")
+print("-"*60)
+
+for n in (0, 2, 3, 29, 45, 59):
+    if history.as_of('NCT90000007', day(n) + timedelta(hours=12)) != expected[n]:
+        print(f"❌ NCT90000007 on day {n} does not match")
+        exit(1)
+if history.as_of('NCT90000007', day(-1)) is not None:
+    print("❌ A trial must not exist before its first version")
+    exit(1)
+before, after = history.as_of('NCT90000042', day(29)), history.as_of('NCT90000042', day(30))
+if before['status'] != 'RECRUITING' or after['status'] != 'COMPLETED' or 'completion_date' in after:
+    print(f"❌ Removed field or status change lost: {after}")
+    exit(1)
+if history.as_of('NCT90000007') != trials[7]:
+    print("❌ Latest version does not match")
+    exit(1)
+print("✅ Versions reconstructed on 6 dates, including a removed field")
+
+# Test 3: Reopen, torn write, ordering
+print("\n[TEST 3] Reopening and crash safety")
+print("-"*60)
+
+os.remove(f"{path}.idx")  # Index rebuilt from the log
+with open(path, 'ab') as f:
+    f.write(b'{"nct_id": "NCT9')  # Torn final write
+reopened = TrialHistory(path, snapshot_interval=4)
+if reopened.as_of('NCT90000007', day(45)) != expected[45] or len(reopened) != 100:
+    print("❌ Reopened history differs")
+    exit(1)
+trials[7]['status'] = 'SUSPENDED'
+if reopened.record(trials, when=day(60)) != 1 or reopened.as_of('NCT90000007')['status'] != 'SUSPENDED':
+    print("❌ Append after a torn write failed")
+    exit(1)
+if TrialHistory(path).as_of('NCT90000007', day(60))['status'] != 'SUSPENDED':
+    print("❌ Torn line was not replaced by the next append")
+    exit(1)
+print("✅ Index rebuilt from the log; torn final line dropped")
+
+try:
+    reopened.record(trials, when=day(10))
+    print("❌ Recording into the past must fail")
+    exit(1)
+except ValueError as e:
+    print(f"✅ Rejected: {e}")
+
+print("\n✅ Trial history ready")
\ No newline at end of file
@@ -0,0 +1,114 @@
+# test_vision_batch.py
+"""Test multi-figure batched vision requests (mock model)"""
+
+import json
+import os
+import tempfile
+from benchmarks.synthetic import make_trial_pdf
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.pdf_pipeline import PDF_AVAILABLE, iter_pages
+from src.utils.schemas import SURVIVAL_CURVE_SCHEMA, missing_fields
+from src.utils.usage import usage_tracker
+
+print("="*60)
+print("BATCHED VISION REQUESTS")
+print("="*60)
+
+if not PDF_AVAILABLE:
+    print("❌ PyMuPDF not installed - pip install pymupdf")
+    exit(1)
+
+workdir = tempfile.mkdtemp()
+pdf_path = make_trial_pdf(os.path.join(workdir, "trial.pdf"), text_pages=1, figure_pages=4)
+figures = [(page['page_number'], region) for page in sorted(iter_pages(pdf_path, workers=1), key=lambda p: p['page_number'])
+           for region in page['regions']]
+
+def vision_analyzer(batch_size):
+    """Real vision path against the mock model, curves always sent to the model"""
+    analyzer = PDFAnalyzer(use_mock=True, digitize_curves=False, batch_size=batch_size)
+    analyzer.use_mock = False
+    return analyzer
+
+def calls(call_site):
+    return usage_tracker.report()['by_call_site'].get(call_site, {}).get('calls', 0)
+
+# Test 1: One request for the document's figures
+print("\n[TEST 1] Four KM crops and an AE table")
+print("-"*60)
+
+usage_tracker.reset()
+records = vision_analyzer(4).analyze_figures_batch(figures)
+for record in records:
+    print(f"   {record['figure_id']}: {record['figure_type']} → {sorted(record['findings'])[:3]}...")
+
+curves = [r for r in records if r['figure_type'] == 'survival_curve']
+if [r['figure_id'] for r in records] != ['p2.1', 'p3.1', 'p4.1', 'p5.1', 'p6.1'] or \
+        any(missing_fields(r['findings'], SURVIVAL_CURVE_SCHEMA) for r in curves):
+    print("❌ Results not mapped back to their figures")
+    exit(1)
+if calls('analyze_figures_batch') != 1 or calls('analyze_survival_curve') != 0:
+    print(f"❌ Expected one batched request, got {usage_tracker.report()['by_call_site']}")
+    exit(1)
+print("✅ 4 curves in 1 request; the text-layer AE table needed none")
+
+# Test 2: Split and retry
+print("\n[TEST 2] Incomplete batch replies are split and retried")
+print("-"*60)
+
+class DroppingModel:
+    """Loses one figure from any batch reply covering more than two figures"""
+    def __init__(self, model):
+        self.model = model
+
+    def generate_content(self, prompt, call_site="unknown", **kwargs):
+        response = self.model.generate_content(prompt, call_site=call_site, **kwargs)
+        images = sum(1 for part in prompt if isinstance(part, dict))
+        if call_site == 'analyze_figures_batch' and images > 2:
+            reply = json.loads(response.text)
+            reply.pop(next(iter(reply)))
+            response.text = json.dumps(reply)
+        return response
+
+analyzer = vision_analyzer(4)
+analyzer.model = DroppingModel(analyzer.model)
+usage_tracker.reset()
+records = analyzer.analyze_figures_batch(figures)
+print(f"   Batch requests: {calls('analyze_figures_batch')}")
+if calls('analyze_figures_batch') != 3 or any('error' in r['findings'] for r in records):
+    print("❌ Expected 1 failed batch of 4, then 2 batches of 2")
+    exit(1)
+print("✅ Failed batch of 4 retried as 2 + 2, every figure answered")
+
+# The mock's free-form replies never cover a batch, so every figure ends up on its own
+analyzer.structured_output = False
+usage_tracker.reset()
+records = analyzer.analyze_figures_batch(figures, batch_size=2)
+print(f"   Free-form: {calls('analyze_figures_batch')} batch requests, {calls('analyze_survival_curve')} single")
+if calls('analyze_survival_curve') != 4 or any('error' in r['findings'] for r in records):
+    print("❌ Expected every figure to fall back to a single request")
+    exit(1)
+print("✅ Unusable batch replies fall back to single-figure requests")
+
+# Test 3: extract_results_bulk
+print("\n[TEST 3] extract_results_bulk with batching")
+print("-"*60)
+
+paths = [make_trial_pdf(os.path.join(workdir, f"doc_{i}.pdf"), text_pages=2, figure_pages=4, seed=i)
+         for i in range(4)]
+requests = {}
+for batch_size in (1, 4):
+    usage_tracker.reset()
+    results = vision_analyzer(batch_size).extract_results_bulk(paths, workers=2)
+    requests[batch_size] = calls('analyze_survival_curve') + calls('analyze_figures_batch')
+    figure_counts = {len(result['figures']) for result in results.values()}
+    print(f"   batch_size={batch_size}: {requests[batch_size]} vision requests, {figure_counts} figures per document")
+    if figure_counts != {5}:
+        print("❌ Figures lost")
+        exit(1)
+
+if requests[4] != len(paths) or requests[1] != 4 * len(paths):
+    print("❌ Expected one request per document when batching")
+    exit(1)
+print(f"✅ {requests[1]} → {requests[4]} requests")
+
+print("\n✅ Batched vision ready")
\ No newline at end of file
@@ -0,0 +1,100 @@
+# test_vision_cache.py
+"""Test the perceptual-hash cache for vision results (mock model)"""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from PIL import Image
+from benchmarks.synthetic import km_curve_image
+from src.analyzers.pdf_analyzer import PDFAnalyzer
+from src.utils.vision_cache import VisionCache, image_hash, hamming_distance
+from src.utils.usage import usage_tracker
+from config.settings import VISION_CACHE_MAX_DISTANCE
+
+print("="*60)
+print("VISION RESULT CACHE")
+print("="*60)
+
+def jpeg(img, size, quality):
+    buffer = io.BytesIO()
+    img.resize(size).convert('RGB').save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+article = km_curve_image(seed=0)
+poster = jpeg(article, (1200, 900), 70)
+press_release = jpeg(article, (800, 600), 50)
+padded = Image.new('RGB', (2800, 2200), 'white')
+padded.paste(article, (200, 200))
+
+# Test 1: Hash robustness
+print("\n[TEST 1] Same figure, different renderings")
+print("-"*60)
+
+reference = image_hash(article)
+copies = {'poster': poster, 'press release': press_release, 'padded': padded,
+          'grayscale': article.convert('L')}
+for name, image in copies.items():
+    distance = hamming_distance(reference, image_hash(image))
+    print(f"   {name:<14} {distance:3d} bits")
+    if distance > VISION_CACHE_MAX_DISTANCE:
+        print(f"❌ {name} copy is beyond the {VISION_CACHE_MAX_DISTANCE}-bit threshold")
+        exit(1)
+
+others = [hamming_distance(reference, image_hash(km_curve_image(seed=seed))) for seed in range(1, 6)]
+print(f"   other trials   {others} bits")
+if min(others) <= VISION_CACHE_MAX_DISTANCE:
+    print("❌ A different KM plot falls within the threshold")
+    exit(1)
+print("✅ Copies match, different plots don't")
+
+# Test 2: Repeat figures skip the model
+print("\n[TEST 2] analyze_survival_curve across three publications")
+print("-"*60)
+
+cache_path = os.path.join(tempfile.mkdtemp(), "vision_cache.sqlite")
+analyzer = PDFAnalyzer(use_mock=True, vision_cache=VisionCache(cache_path))
+analyzer.use_mock = False  # Real vision path, mock model underneath
+usage_tracker.reset()
+
+for image in [article, poster, press_release, km_curve_image(seed=3)]:
+    analyzer.analyze_survival_curve(image)
+
+site = usage_tracker.report()['by_call_site']['analyze_survival_curve']
+print(f"   Model calls: {site['calls']}, cache hits: {site['cache_hits']} ({site['cache_hit_rate']:.0%})")
+if site['calls'] != 2 or site['cache_hits'] != 2:
+    print("❌ Expected one call per distinct figure")
+    exit(1)
+print("✅ Near-identical figures served from cache")
+
+# Test 3: Persistence
+print("\n[TEST 3] Cache survives a restart")
+print("-"*60)
+
+reloaded = VisionCache(cache_path)
+if len(reloaded) != 2 or reloaded.get(image_hash(poster), 'survival_curve') is None:
+    print(f"❌ Reloaded cache has {len(reloaded)} entries")
+    exit(1)
+if reloaded.get(image_hash(poster), 'adverse_events') is not None:
+    print("❌ Results must not cross figure types")
+    exit(1)
+print(f"✅ {len(reloaded)} entries reloaded from {cache_path}")
+
+# Writers in other processes append to the same cache
+writer = ("import random, sys\n"
+          "from src.utils.vision_cache import VisionCache\n"
+          "cache = VisionCache(sys.argv[1])\n"
+          "for i in range(50):\n"
+          "    cache.put(f'{random.getrandbits(255):064x}', 'figure', {'writer': sys.argv[2], 'i': i})\n")
+writers = [subprocess.Popen([sys.executable, '-c', writer, cache_path, str(n)]) for n in range(4)]
+if any(process.wait() != 0 for process in writers):
+    print("❌ Concurrent writer failed")
+    exit(1)
+reloaded.get(image_hash(poster), 'figure')  # Lookups pick up rows added elsewhere
+if len(reloaded) != 202 or len(VisionCache(cache_path)) != 202:
+    print(f"❌ {len(reloaded)} entries after 4 processes wrote 200")
+    exit(1)
+print("✅ 200 entries from 4 concurrent processes, all visible to a running cache")
+
+print("\n✅ Vision cache ready")
\ No newline at end of file
@@ -0,0 +1,164 @@
+# test_work_queue.py
+"""Test the sharded work queue and TrialAnalyzer worker mode"""
+
+import os
+import tempfile
+import threading
+import time
+from benchmarks.synthetic import make_trial
+from src.utils.work_queue import WorkQueue, shard_of, worker_shards
+from src.utils.gemini_wrapper import get_gemini_model, MockSimulation
+from src.analyzers.trial_analyzer import TrialAnalyzer
+
+print("="*60)
+print("WORK QUEUE")
+print("="*60)
+
+def make_trials(count):
+    return [make_trial(i) for i in range(count)]
+
+def new_queue(**kwargs):
+    return WorkQueue(os.path.join(tempfile.mkdtemp(), 'queue.sqlite'), **kwargs)
+
+# Test 1: Enqueue and shards
+print("\n[TEST 1] Idempotent enqueue, stable shards")
+print("-"*60)
+
+queue = new_queue(shards=8)
+trials = make_trials(100)
+if queue.enqueue('run', trials) != 100 or queue.enqueue('run', trials[:10]) != 0:
+    print("❌ Enqueue is not idempotent")
+    exit(1)
+if shard_of('NCT90000001', 8) != shard_of('NCT90000001', 8) or not 0 <= shard_of('NCT90000001', 8) < 8:
+    print("❌ Shard not stable")
+    exit(1)
+owned = [worker_shards(index, 3, 8) for index in range(3)]
+if sorted(shard for shards in owned for shard in shards) != list(range(8)):
+    print(f"❌ Shards not partitioned: {owned}")
+    exit(1)
+if WorkQueue(queue.path, shards=16).shards != 8:
+    print("❌ Shard count of an existing queue changed")
+    exit(1)
+print(f"✅ 100 jobs in {len(queue.progress('run')['shards'])} shards; 3 workers own {[len(s) for s in owned]} shards")
+
+# Test 2: Leases
+print("\n[TEST 2] Leases, expiry and retries")
+print("-"*60)
+
+queue = new_queue(shards=4, lease_seconds=0.2, max_attempts=2)
+queue.enqueue('run', make_trials(10))
+first = queue.lease('run', 'a', limit=6)
+second = queue.lease('run', 'b', limit=6)
+if len(first) != 6 or len(second) != 4 or {t['nct_id'] for t in first} & {t['nct_id'] for t in second}:
+    print("❌ A job was leased twice")
+    exit(1)
+own = queue.lease('run', 'c', shards=[0], limit=10)
+if own:
+    print("❌ Leased jobs handed out again before their lease ran out")
+    exit(1)
+time.sleep(0.25)
+expired = queue.lease('run', 'c', limit=10)
+if len(expired) != 10:
+    print(f"❌ {len(expired)} of 10 expired leases handed out again")
+    exit(1)
+print("✅ Each job held by one worker; expired leases handed out again")
+
+# Completing twice keeps the first result
+if queue.complete('run', 'c', [(t['nct_id'], {'by': 'c'}) for t in expired[:5]]) != 5:
+    print("❌ Results not stored")
+    exit(1)
+if queue.complete('run', 'a', [(t['nct_id'], {'by': 'a'}) for t in expired[:5]]) != 0:
+    print("❌ Late result overwrote the first")
+    exit(1)
+if {result['by'] for result in queue.results('run').values()} != {'c'}:
+    print("❌ Results overwritten")
+    exit(1)
+
+# A result from a worker whose lease ran out
+stale = new_queue(lease_seconds=0.1, max_attempts=2)
+stale.enqueue('run', make_trials(3))
+late = stale.lease('run', 'a', limit=3)
+time.sleep(0.15)
+taken = stale.lease('run', 'b', limit=1)
+if stale.complete('run', 'a', [(t['nct_id'], {'by': 'a'}) for t in late]) != 2:
+    print("❌ Late result for a job nobody else holds not stored")
+    exit(1)
+if stale.complete('run', 'b', [(taken[0]['nct_id'], {'by': 'b'})]) != 1 or \
+        stale.results('run')[taken[0]['nct_id']]['by'] != 'b':
+    print("❌ Late result taken for a job leased to another worker")
+    exit(1)
+stale = new_queue(lease_seconds=0.1, max_attempts=1)
+stale.enqueue('run', make_trials(1))
+late = stale.lease('run', 'a')
+time.sleep(0.15)
+stale.lease('run', 'b')  # Marks the job failed - its only attempt ran out
+if stale.complete('run', 'a', [(late[0]['nct_id'], {'by': 'a'})]) != 0 or stale.progress('run')['failed'] != 1:
+    print("❌ Late result revived a failed job")
+    exit(1)
+print("✅ Late duplicate results ignored; after an expired lease only jobs nobody else holds take them")
+
+# The rest fail: back after the retry delay, failed for good on the last attempt
+queue.fail('run', 'c', [t['nct_id'] for t in expired[5:]], "Model analysis failed")
+progress = queue.progress('run')
+if (progress['done'], progress['failed'], progress['complete']) != (5, 5, True):
+    print(f"❌ Jobs on their last attempt not marked failed: {progress}")
+    exit(1)
+if set(queue.failures('run').values()) != {"Model analysis failed"}:
+    print("❌ Failure reason not kept")
+    exit(1)
+
+queue = new_queue(max_attempts=3)
+queue.enqueue('run', make_trials(3))
+leased = queue.lease('run', 'a', limit=3)
+queue.fail('run', 'a', [t['nct_id'] for t in leased], "Timeout")
+if queue.lease('run', 'a', limit=3) or queue.progress('run')['pending'] != 3:
+    print("❌ Failed jobs retried before their backoff")
+    exit(1)
+print("✅ Failed jobs wait for a retry, and fail for good after their last attempt")
+
+# Test 3: Workers
+print("\n[TEST 3] TrialAnalyzer workers share a run")
+print("-"*60)
+
+queue = new_queue(shards=8, lease_seconds=0.5)
+trials = make_trials(60)
+queue.enqueue('run', trials)
+queue.lease('run', 'crashed', shards=[0], limit=3)  # A worker that dies holding jobs
+
+def worker(index):
+    analyzer = TrialAnalyzer(use_mock=True)
+    analyzer.model = get_gemini_model(use_mock=True, simulation=MockSimulation(latency_ms=5, seed=index))
+    stored[index] = analyzer.work(queue, 'run', f"worker-{index}", worker_shards(index, 2, queue.shards),
+                                  batch_size=8, max_workers=2, poll_seconds=0.1)
+
+stored = {}
+threads = [threading.Thread(target=worker, args=(index,)) for index in range(2)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+progress = queue.progress('run')
+results = queue.results('run')
+if not progress['complete'] or len(results) != 60 or sum(stored.values()) != 60:
+    print(f"❌ Run not finished: {progress}, stored {stored}")
+    exit(1)
+if set(results) != {t['nct_id'] for t in trials} or not all(r['innovation_level'] for r in results.values()):
+    print("❌ Results missing")
+    exit(1)
+print(f"✅ 60 trials by 2 workers {stored}, including the crashed worker's jobs, "
+      f"{progress['per_second']} trials/s")
+
+# Test 4: Trials the model could not analyze are retried, not stored
+print("\n[TEST 4] Failed analyses handed back")
+print("-"*60)
+
+queue = new_queue(max_attempts=1)
+queue.enqueue('run', make_trials(4))
+analyzer = TrialAnalyzer(use_mock=True, local_classifier=False)
+analyzer.model = get_gemini_model(use_mock=True, simulation=MockSimulation(error_rate=1.0))
+if analyzer.work(queue, 'run', 'worker', poll_seconds=0.1) != 0 or len(queue.failures('run')) != 4:
+    print(f"❌ Default results stored: {queue.progress('run')}")
+    exit(1)
+print("✅ Default results never stored; jobs failed after their attempts")
+
+print("\n✅ Work queue ready")
\ No newline at end of file
@@ -0,0 +1,185 @@
+# src/utils/tracing.py
+"""
+Lightweight timing spans and optional profilers
+
+Spans are recorded only when TRACE_FILE is set and are written at exit in
+Chrome Trace Event format (open in chrome://tracing, Perfetto or speedscope).
+PROFILE_MODE=cprofile writes a pstats file; PROFILE_MODE=sample runs a
+stack sampler over all threads and writes collapsed stacks for flamegraph.pl
+or speedscope.
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config.settings import TRACE_FILE, PROFILE_MODE, PROFILE_OUTPUT, PROFILE_SAMPLE_INTERVAL_MS
+
+# Keep a runaway process from growing the trace without bound
+MAX_TRACE_EVENTS = 500_000
+
+class Tracer:
+    """Collects completed spans as Chrome trace 'X' (complete) events"""
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path
+        self.enabled = bool(output_path)
+        self._events = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="app", **attrs):
+        """
+        Time a block of code
+
+        Args:
+            name: Span name, e.g. 'ctgov.request'
+            category: Trace category used for filtering ('scraper', 'model', 'flask', ...)
+            **attrs: Extra values shown in the span's args
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            attrs['error'] = type(e).__name__
+            raise
+        finally:
+            end = time.perf_counter()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start - self._origin) * 1e6, 1),
+                'dur': round((end - start) * 1e6, 1),
+                'pid': self._pid,
+                'tid': threading.get_ident(),
+                'args': {key: str(value) for key, value in attrs.items()}
+            }
+            with self._lock:
+                if len(self._events) < MAX_TRACE_EVENTS:
+                    self._events.append(event)
+
+    def export(self, path=None):
+        """Write collected spans to `path` (defaults to TRACE_FILE)"""
+        path = path or self.output_path
+        if not path:
+            return None
+
+        with self._lock:
+            events = list(self._events)
+
+        # Thread name metadata so the viewer labels each row
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                     'args': {'name': names.get(tid, f"thread-{tid}")}}
+                    for tid in {event['tid'] for event in events}]
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+
+        print(f"🧭 Wrote {len(events)} spans to {path}")
+        return path
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self, path):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"🔥 Wrote {sum(self.samples.values())} stack samples to {path}")
+
+_profiler_started = False
+
+def start_profiler(mode=PROFILE_MODE, output=PROFILE_OUTPUT):
+    """
+    Start the profiler selected by PROFILE_MODE; results are written at exit
+
+    Args:
+        mode: 'cprofile' (calling thread, deterministic) or 'sample' (all threads)
+        output: Output path without extension
+    """
+    global _profiler_started
+    if not mode or _profiler_started:
+        return
+    _profiler_started = True
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    if mode == 'cprofile':
+        profile = cProfile.Profile()
+        profile.enable()
+
+        def finish():
+            profile.disable()
+            profile.dump_stats(f"{output}.prof")
+            print(f"🔥 Wrote cProfile stats to {output}.prof (view with snakeviz or pstats)")
+
+        atexit.register(finish)
+        print("🔥 cProfile enabled")
+    elif mode == 'sample':
+        sampler = SamplingProfiler()
+        sampler.start()
+        atexit.register(sampler.stop, f"{output}.folded")
+        print(f"🔥 Sampling profiler enabled ({PROFILE_SAMPLE_INTERVAL_MS}ms)")
+    else:
+        print(f"⚠️ Unknown PROFILE_MODE '{mode}' - expected 'cprofile' or 'sample'")
+
+# Shared tracer for the process
+tracer = Tracer(TRACE_FILE)
+span = tracer.span
+
+if tracer.enabled:
+    atexit.register(tracer.export)
+
+def traced(name=None, category="app"):
+    """Decorator form of span(); defaults to the function name"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, category=category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
\ No newline at end of file
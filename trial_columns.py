@@ -0,0 +1,291 @@
+# src/utils/trial_columns.py
+"""
+Typed, columnar view of a trial list for range filters and aggregations
+
+Parsed trials keep ClinicalTrials.gov's loose values: enrollment is an int
+or 'Unknown', dates are 'YYYY-MM-DD', 'YYYY-MM' or 'Unknown', status is a
+string. normalize_trial() turns one trial into typed values - enrollment
+int or None, dates as datetime.date plus how precise they were (partial
+dates count as the first day of their month or year), every phase, status
+checked against the registry's enum.
+
+TrialColumns holds those values for a whole list as numpy arrays (int32
+enrollment with a known-mask, datetime64[D] dates with precision codes, a
+phase bitmask, uint8 status codes), 25 bytes per trial. A filter is a
+handful of array comparisons and an aggregation a bincount, instead of type
+and string checks on every dict. Without numpy, matches() and summarize()
+answer the same queries one record at a time.
+
+Filters (all optional, combined with AND):
+    min_enrollment / max_enrollment   Inclusive; trials of unknown enrollment never match
+    start_from / start_to             Inclusive dates ('2023', '2023-05' or '2023-05-14'),
+    completion_from / completion_to   compared with each trial's (first-day) date
+    phase                             Trials in any of these phases, e.g. ['PHASE2', 'PHASE3']
+    status                            Any of these statuses
+"""
+
+import re
+from datetime import date
+
+try:
+    import numpy as np
+    COLUMNS_AVAILABLE = True
+except ImportError:
+    COLUMNS_AVAILABLE = False
+
+PHASES = ['EARLY_PHASE1', 'PHASE1', 'PHASE2', 'PHASE3', 'PHASE4', 'NA']  # Bit i of the phase mask
+STATUSES = ['RECRUITING', 'NOT_YET_RECRUITING', 'ACTIVE_NOT_RECRUITING', 'ENROLLING_BY_INVITATION',
+            'COMPLETED', 'SUSPENDED', 'TERMINATED', 'WITHDRAWN', 'UNKNOWN', 'AVAILABLE',
+            'NO_LONGER_AVAILABLE', 'TEMPORARILY_NOT_AVAILABLE', 'APPROVED_FOR_MARKETING', 'WITHHELD']
+PRECISIONS = [None, 'year', 'month', 'day']  # Index = precision code; 0 = no date
+EPOCH = date(1970, 1, 1)
+
+# Column -> (numpy dtype, array typecode of the same width); dates are days since EPOCH
+COLUMNS = {'enrollment_known': ('bool', 'B'), 'enrollment': ('i4', 'i'),
+           'start_date': ('M8[D]', 'q'), 'start_date_precision': ('u1', 'B'),
+           'completion_date': ('M8[D]', 'q'), 'completion_date_precision': ('u1', 'B'),
+           'phases': ('u1', 'B'), 'status': ('u1', 'B')}
+NAT = -2 ** 63  # numpy's NaT as an int64 day count
+
+DATE_PATTERN = re.compile(r'^(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?$')
+RANGE_FILTERS = {'enrollment': ('min_enrollment', 'max_enrollment'),
+                 'start_date': ('start_from', 'start_to'),
+                 'completion_date': ('completion_from', 'completion_to')}
+
+def parse_date(value):
+    """(datetime.date, precision) for 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD'; (None, None) for anything else"""
+    match = DATE_PATTERN.match(value.strip()) if isinstance(value, str) else None
+    if not match:
+        return None, None
+    year, month, day = match.groups()
+    try:
+        return date(int(year), int(month or 1), int(day or 1)), PRECISIONS[1 + (month is not None) + (day is not None)]
+    except ValueError:  # e.g. month 13
+        return None, None
+
+def _enrollment(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+def trial_phases(trial):
+    """Every phase of a trial, from `phases` (or just `phase` for trials parsed before it was kept)"""
+    phases = trial.get('phases')
+    if phases is None:
+        phases = [trial['phase']] if trial.get('phase') not in (None, 'N/A') else []
+    return [phase for phase in phases if phase in PHASES]
+
+def normalize_trial(trial):
+    """Typed values of one trial's enrollment, dates, phases and status"""
+    start, start_precision = parse_date(trial.get('start_date'))
+    completion, completion_precision = parse_date(trial.get('completion_date'))
+    return {
+        'enrollment': _enrollment(trial.get('enrollment')),
+        'start_date': start,
+        'start_date_precision': start_precision,
+        'completion_date': completion,
+        'completion_date_precision': completion_precision,
+        'phases': trial_phases(trial),
+        'status': trial.get('status') if trial.get('status') in STATUSES else None
+    }
+
+def parse_filters(params):
+    """
+    Filters from request parameters (strings or lists); raises ValueError for invalid ones
+
+    Returns:
+        {'enrollment'/'start_date'/'completion_date': (low, high), 'phase': [...], 'status': [...]}
+        with only the filters given
+    """
+    filters = {}
+    for column, names in RANGE_FILTERS.items():
+        bounds = []
+        for name in names:
+            value = params.get(name)
+            if value in (None, ''):
+                bounds.append(None)
+            elif column == 'enrollment':
+                try:
+                    bounds.append(int(value))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {name}: {value!r}")
+            else:
+                parsed, _ = parse_date(value)
+                if parsed is None:
+                    raise ValueError(f"Invalid {name}: {value!r} (expected YYYY, YYYY-MM or YYYY-MM-DD)")
+                bounds.append(parsed)
+        if bounds != [None, None]:
+            filters[column] = tuple(bounds)
+
+    for name, allowed in [('phase', PHASES), ('status', STATUSES)]:
+        values = params.get(name)
+        if not values:
+            continue
+        if isinstance(values, str):
+            values = values.split(',')
+        values = [value.strip().upper() for value in values if value.strip()]
+        unknown = [value for value in values if value not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown {name}: {', '.join(unknown)} (expected one of {', '.join(allowed)})")
+        filters[name] = values
+    return filters
+
+def matches(trial, filters):
+    """Whether one trial passes parsed `filters` - the per-record equivalent of TrialColumns.mask"""
+    typed = normalize_trial(trial)
+    for column in RANGE_FILTERS:
+        if column in filters:
+            low, high = filters[column]
+            value = typed[column]
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+    if 'phase' in filters and not set(typed['phases']) & set(filters['phase']):
+        return False
+    if 'status' in filters and typed['status'] not in filters['status']:
+        return False
+    return True
+
+def _median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    return float(values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2)
+
+def summarize(trials):
+    """Counts by status, phase and start year plus enrollment stats, one record at a time"""
+    typed = [normalize_trial(trial) for trial in trials]
+    enrollments = [t['enrollment'] for t in typed if t['enrollment'] is not None]
+    by_status, by_phase, by_year = {}, {}, {}
+    for t in typed:
+        status = t['status'] or 'Unknown'
+        by_status[status] = by_status.get(status, 0) + 1
+        for phase in set(t['phases']):
+            by_phase[phase] = by_phase.get(phase, 0) + 1
+        if t['start_date']:
+            by_year[t['start_date'].year] = by_year.get(t['start_date'].year, 0) + 1
+    return {
+        'count': len(typed),
+        'by_status': by_status,
+        'by_phase': {phase: by_phase[phase] for phase in PHASES if phase in by_phase},
+        'by_start_year': dict(sorted(by_year.items())),
+        'enrollment': {'known': len(enrollments), 'total': sum(enrollments),
+                       'mean': round(sum(enrollments) / len(enrollments), 2) if enrollments else None,
+                       'median': _median(enrollments)}
+    }
+
+def column_values(trials):
+    """
+    {column: [int]} for COLUMNS, row i being trials[i]
+
+    Dates are days since EPOCH (NAT if unknown) with precision codes (index in
+    PRECISIONS), phases a bitmask (bit i = PHASES[i]) and status a code (index
+    in STATUSES + 1; 0 = unknown).
+    """
+    phase_bits = {phase: 1 << bit for bit, phase in enumerate(PHASES)}
+    status_codes = {status: code + 1 for code, status in enumerate(STATUSES)}
+    dates, phase_masks = {}, {}  # Registry dates and phase lists repeat a lot - convert each once
+
+    def day(value):
+        if value not in dates:
+            parsed, precision = parse_date(value)
+            dates[value] = ((parsed - EPOCH).days, PRECISIONS.index(precision)) if parsed else (NAT, 0)
+        return dates[value]
+
+    def phase_mask(trial):
+        phases = tuple(trial_phases(trial))
+        if phases not in phase_masks:
+            phase_masks[phases] = sum(phase_bits[phase] for phase in set(phases))
+        return phase_masks[phases]
+
+    enrollment = [_enrollment(trial.get('enrollment')) for trial in trials]
+    values = {'enrollment_known': [value is not None for value in enrollment],
+              'enrollment': [value or 0 for value in enrollment]}
+    for column in ('start_date', 'completion_date'):
+        days = [day(trial.get(column)) for trial in trials]
+        values[column] = [d for d, _ in days]
+        values[f"{column}_precision"] = [p for _, p in days]
+    values['phases'] = [phase_mask(trial) for trial in trials]
+    values['status'] = [status_codes.get(trial.get('status'), 0) for trial in trials]
+    return values
+
+class TrialColumns:
+    """
+    Columns of a trial list, row i being trials[i] (requires numpy)
+
+    Args:
+        trials: Parsed trial dicts; only their typed fields are kept
+    """
+
+    def __init__(self, trials):
+        for column, values in column_values(trials).items():
+            dtype = COLUMNS[column][0]
+            array = np.array(values, np.int64 if dtype == 'M8[D]' else dtype)
+            setattr(self, column, array.view(dtype) if dtype == 'M8[D]' else array)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Columns over existing arrays {column: array} (e.g. views of a memory-mapped file), not copied"""
+        columns = cls.__new__(cls)
+        for column in COLUMNS:
+            setattr(columns, column, arrays[column])
+        return columns
+
+    def __len__(self):
+        return len(self.status)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, column).nbytes for column in COLUMNS)
+
+    def mask(self, filters):
+        """Boolean array of the rows passing parsed `filters` (see parse_filters)"""
+        keep = np.ones(len(self), bool)
+        for column in RANGE_FILTERS:
+            if column not in filters:
+                continue
+            low, high = filters[column]
+            values = getattr(self, column)
+            if column == 'enrollment':
+                keep &= self.enrollment_known
+            else:
+                keep &= ~np.isnat(values)
+                low, high = (np.datetime64(bound, 'D') if bound is not None else None for bound in (low, high))
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+        if 'phase' in filters:
+            keep &= (self.phases & sum(1 << PHASES.index(phase) for phase in set(filters['phase']))) != 0
+        if 'status' in filters:
+            keep &= np.isin(self.status, [STATUSES.index(status) + 1 for status in filters['status']])
+        return keep
+
+    def indexes(self, filters):
+        """Row numbers passing `filters`, in order"""
+        return np.flatnonzero(self.mask(filters))
+
+    def summarize(self, mask=None):
+        """Same result as summarize() on the (masked) trials"""
+        rows = slice(None) if mask is None else mask
+        status = np.bincount(self.status[rows], minlength=len(STATUSES) + 1)
+        phases = self.phases[rows]
+        started = self.start_date[rows]
+        years = started[~np.isnat(started)].astype('datetime64[Y]').astype(np.int64) + 1970
+        year_values, year_counts = np.unique(years, return_counts=True)
+        enrollment = self.enrollment[rows][self.enrollment_known[rows]].astype(np.int64)
+        by_status = {('Unknown' if code == 0 else STATUSES[code - 1]): int(n) for code, n in enumerate(status) if n}
+        by_phase = {phase: int(np.count_nonzero(phases & (1 << bit))) for bit, phase in enumerate(PHASES)}
+        return {
+            'count': int(status.sum()),
+            'by_status': by_status,
+            'by_phase': {phase: n for phase, n in by_phase.items() if n},
+            'by_start_year': {int(year): int(n) for year, n in zip(year_values, year_counts)},
+            'enrollment': {'known': int(len(enrollment)), 'total': int(enrollment.sum()),
+                           'mean': round(float(enrollment.mean()), 2) if len(enrollment) else None,
+                           'median': float(np.median(enrollment)) if len(enrollment) else None}
+        }
\ No newline at end of file
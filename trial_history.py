@@ -0,0 +1,200 @@
+# src/utils/trial_history.py
+"""
+Append-only version history of trials, for "what did it look like then" queries
+
+Every recorded version is one JSON line in the history log. A trial's first
+version, and every HISTORY_SNAPSHOT_INTERVAL-th after it, is stored in full;
+the versions in between are deltas against the previous version (fields set,
+fields removed). Recording a trial that has not changed writes nothing, so
+the log grows with the amount of change, not the number of runs.
+
+The index maps each nct_id to its versions' (timestamp, log offset, full?)
+in time order. A point-in-time lookup bisects that list, seeks back to the
+nearest full version and applies at most HISTORY_SNAPSHOT_INTERVAL - 1
+deltas. The index is saved next to the log and caught up from the log's tail
+on open, so a crash between the two loses nothing.
+"""
+
+import bisect
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from config.settings import TRIAL_HISTORY_PATH, HISTORY_SNAPSHOT_INTERVAL
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'  # Fixed width, so timestamps sort as strings
+
+def _timestamp(when):
+    """A datetime, ISO string or None (now) as a sortable timestamp string"""
+    if when is None:
+        when = datetime.now()
+    elif isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    return when.strftime(TIMESTAMP_FORMAT)
+
+def make_delta(old, new):
+    """{'set': {field: value}, 'unset': [field]} turning `old` into `new`, or None if equal"""
+    changed = {field: value for field, value in new.items() if field not in old or old[field] != value}
+    removed = [field for field in old if field not in new]
+    if not changed and not removed:
+        return None
+    return {'set': changed, 'unset': removed}
+
+def apply_delta(state, delta):
+    state = {**state, **delta['set']}
+    for field in delta['unset']:
+        state.pop(field, None)
+    return state
+
+class TrialHistory:
+    """
+    Versioned trial store
+
+    Args:
+        path: History log (JSONL); the index is kept at `path + '.idx'`
+        snapshot_interval: Every n-th version of a trial is stored in full
+    """
+
+    def __init__(self, path=TRIAL_HISTORY_PATH, snapshot_interval=HISTORY_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.snapshot_interval = max(1, snapshot_interval)
+        self._lock = threading.Lock()
+        self._index = {}  # nct_id -> [(timestamp, offset, is_full)] in time order
+        self._indexed_bytes = 0
+        self._latest = {}  # nct_id -> latest version, filled as trials are read or recorded
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                saved = json.load(f)
+            self._index = {nct_id: [tuple(entry) for entry in entries] for nct_id, entries in saved['trials'].items()}
+            self._indexed_bytes = saved['log_bytes']
+        self._catch_up()
+
+    def _catch_up(self):
+        """Index log lines written after the saved index (or all of them, without one)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._indexed_bytes)
+            offset = self._indexed_bytes
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn final write - ignored, and overwritten by the next append
+                record = json.loads(line)
+                self._index.setdefault(record['nct_id'], []).append((record['at'], offset, record['kind'] == 'full'))
+                offset += len(line)
+        self._indexed_bytes = offset
+
+    def __len__(self):
+        return len(self._index)
+
+    def _read(self, f, offset):
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def _state_at(self, f, entries, position):
+        """Trial as of entries[position]: nearest full version plus the deltas after it"""
+        start = position
+        while not entries[start][2]:
+            start -= 1
+        state = self._read(f, entries[start][1])['data']
+        for _, offset, _ in entries[start + 1:position + 1]:
+            state = apply_delta(state, self._read(f, offset)['data'])
+        return state
+
+    def _current(self, f, nct_id):
+        """Latest recorded version, or None (lock held)"""
+        entries = self._index.get(nct_id)
+        if not entries:
+            return None
+        if nct_id not in self._latest:
+            self._latest[nct_id] = self._state_at(f, entries, len(entries) - 1)
+        return self._latest[nct_id]
+
+    def as_of(self, nct_id, when=None):
+        """
+        The trial as it was recorded at `when` (datetime or ISO string; None = latest)
+
+        Returns None if the trial had not been recorded by then.
+        """
+        with self._lock:
+            entries = self._index.get(nct_id)
+            if not entries:
+                return None
+            with open(self.path, 'rb') as f:
+                if when is None:
+                    return copy.deepcopy(self._current(f, nct_id))
+                position = bisect.bisect_right(entries, (_timestamp(when), float('inf'), True)) - 1
+                if position < 0:
+                    return None
+                if position == len(entries) - 1:
+                    return copy.deepcopy(self._current(f, nct_id))
+                return self._state_at(f, entries, position)
+
+    def versions(self, nct_id):
+        """[(timestamp, trial)] for every recorded version, oldest first"""
+        with self._lock:
+            entries = self._index.get(nct_id, [])
+            out, state = [], None
+            with open(self.path, 'rb') as f:
+                for at, offset, _ in entries:
+                    record = self._read(f, offset)
+                    state = record['data'] if record['kind'] == 'full' else apply_delta(state, record['data'])
+                    out.append((at, copy.deepcopy(state)))
+            return out
+
+    def record(self, trials, when=None):
+        """
+        Append a version for each trial that differs from its latest recorded one
+
+        Args:
+            trials: Trial dicts (keyed by 'nct_id')
+            when: Version timestamp (default now); must not precede earlier versions
+
+        Returns:
+            Number of versions written
+        """
+        at = _timestamp(when)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'ab+') as f:
+                f.truncate(self._indexed_bytes)  # Drop a torn final line, if any
+                for trial in trials:
+                    entries = self._index.get(trial['nct_id'])
+                    if entries and at < entries[-1][0]:
+                        raise ValueError(f"{trial['nct_id']}: {at} is before the latest version ({entries[-1][0]})")
+
+                lines = []
+                for trial in trials:
+                    nct_id = trial['nct_id']
+                    entries = self._index.get(nct_id, [])
+                    previous = self._current(f, nct_id)
+                    since_full = next((i for i, entry in enumerate(reversed(entries)) if entry[2]), len(entries))
+                    if previous is None or since_full + 1 >= self.snapshot_interval:
+                        kind, data = 'full', None if previous == trial else trial
+                    else:
+                        kind, data = 'delta', make_delta(previous, trial)
+                    if data is None:
+                        continue  # Unchanged
+                    self._latest[nct_id] = copy.deepcopy(trial)  # Callers may keep editing their dicts
+                    lines.append((nct_id, kind, json.dumps({'nct_id': nct_id, 'at': at, 'kind': kind, 'data': data},
+                                                           separators=(',', ':')).encode('utf-8') + b'\n'))
+
+                offset = self._indexed_bytes
+                f.seek(offset)
+                for nct_id, kind, line in lines:
+                    f.write(line)
+                    self._index.setdefault(nct_id, []).append((at, offset, kind == 'full'))
+                    offset += len(line)
+            self._indexed_bytes = offset
+            self._save_index()
+        return len(lines)
+
+    def _save_index(self):
+        """Write atomically so a crash mid-write keeps the previous index (lock held)"""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'log_bytes': self._indexed_bytes, 'trials': self._index}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
\ No newline at end of file
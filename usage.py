@@ -0,0 +1,192 @@
+# src/utils/usage.py
+"""Token, latency and cost accounting for model calls"""
+
+import io
+import math
+import threading
+from datetime import datetime
+from config.settings import GEMINI_INPUT_PRICE_PER_1M, GEMINI_OUTPUT_PRICE_PER_1M, GEMINI_BUDGET_USD
+
+# Gemini bills an image within 384px as 258 tokens; larger ones per 768px tile at 258 each
+IMAGE_TOKENS = 258
+IMAGE_SMALL_EDGE = 384
+IMAGE_TILE_EDGE = 768
+
+def image_tokens(width, height):
+    """Billed tokens for an image of the given pixel size"""
+    if width <= IMAGE_SMALL_EDGE and height <= IMAGE_SMALL_EDGE:
+        return IMAGE_TOKENS
+    return IMAGE_TOKENS * math.ceil(width / IMAGE_TILE_EDGE) * math.ceil(height / IMAGE_TILE_EDGE)
+
+def _image_size(content):
+    """Pixel size of a PIL image or {'mime_type', 'data'} part, if it can be read"""
+    if hasattr(content, 'size') and not isinstance(content, dict):
+        return content.size
+    try:
+        from PIL import Image  # Only image parts get here, so text-only processes never load PIL
+        return Image.open(io.BytesIO(content['data'])).size  # Header only, no decode
+    except Exception:
+        return None
+
+def estimate_tokens(content):
+    """
+    Rough token estimate (~4 chars per token) for when the API reports none
+
+    Args:
+        content: Prompt string, or list of strings/images as sent to generate_content
+    """
+    if isinstance(content, (list, tuple)):
+        return sum(estimate_tokens(part) for part in content)
+    if isinstance(content, str):
+        return max(1, len(content) // 4) if content else 0
+    if (isinstance(content, dict) and 'data' in content) or hasattr(content, 'size'):  # Image part or PIL image
+        size = _image_size(content)
+        return image_tokens(*size) if size else IMAGE_TOKENS
+    return max(1, len(str(content)) // 4)
+
+def estimate_cost(prompt_tokens, response_tokens):
+    """Estimated USD cost for a token count"""
+    return (prompt_tokens * GEMINI_INPUT_PRICE_PER_1M +
+            response_tokens * GEMINI_OUTPUT_PRICE_PER_1M) / 1_000_000
+
+def _hit_rate(counts):
+    """Share of requests served from cache rather than by a model call"""
+    requests = counts['calls'] + counts['cache_hits']
+    return round(counts['cache_hits'] / requests, 4) if requests else 0.0
+
+class UsageTracker:
+    """Aggregates per-call-site model usage for the current run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now().isoformat()
+            self._sites = {}
+            self._budget_warned = False
+
+    def _site(self, call_site):
+        if call_site not in self._sites:
+            self._sites[call_site] = {
+                'calls': 0,
+                'errors': 0,
+                'retries': 0,
+                'cache_hits': 0,
+                'local_results': 0,
+                'hedges': 0,
+                'hedge_wins': 0,
+                'circuit_rejections': 0,
+                'prompt_tokens': 0,
+                'response_tokens': 0,
+                'latency_total': 0.0,
+                'latency_max': 0.0,
+                'prompts_built': 0,
+                'prompts_trimmed': 0,
+                'prompt_tokens_max': 0,
+                'last_prompt': None
+            }
+        return self._sites[call_site]
+
+    def record_call(self, call_site, prompt_tokens, response_tokens, latency, retries=0, error=False):
+        """
+        Record one model call (including its retries)
+
+        Args:
+            call_site: Name of the calling method, e.g. 'classify_trial'
+            prompt_tokens: Input tokens billed
+            response_tokens: Output tokens billed
+            latency: Wall time in seconds, retries included
+            retries: Number of retried attempts
+            error: True if the call ultimately failed
+        """
+        with self._lock:
+            site = self._site(call_site)
+            site['calls'] += 1
+            site['errors'] += 1 if error else 0
+            site['retries'] += retries
+            site['prompt_tokens'] += prompt_tokens
+            site['response_tokens'] += response_tokens
+            site['latency_total'] += latency
+            site['latency_max'] = max(site['latency_max'], latency)
+            over_budget = self._check_budget()
+
+        if over_budget:
+            print(f"⚠️ Estimated Gemini spend exceeded budget of ${GEMINI_BUDGET_USD:.2f}")
+
+    def record_cache_hit(self, call_site):
+        """Record a result served from cache instead of a model call"""
+        with self._lock:
+            self._site(call_site)['cache_hits'] += 1
+
+    def record_prompt(self, call_site, stats):
+        """Record the size of a prompt built to a token budget (see prompt_builder)"""
+        with self._lock:
+            site = self._site(call_site)
+            site['prompts_built'] += 1
+            site['prompts_trimmed'] += 1 if stats['dropped'] else 0
+            site['prompt_tokens_max'] = max(site['prompt_tokens_max'], stats['tokens'])
+            site['last_prompt'] = stats
+
+    def record_local_result(self, call_site):
+        """Record a result produced locally (no model call), e.g. by the KM digitizer"""
+        with self._lock:
+            self._site(call_site)['local_results'] += 1
+
+    def record_hedge(self, call_site, won=False):
+        """Record a duplicate request sent for a slow attempt, or (won=True) one that answered first"""
+        with self._lock:
+            self._site(call_site)['hedge_wins' if won else 'hedges'] += 1
+
+    def record_circuit_rejection(self, call_site):
+        """Record a call refused without sending because the model's circuit is open"""
+        with self._lock:
+            self._site(call_site)['circuit_rejections'] += 1
+
+    def _check_budget(self):
+        """True the first time the running cost passes GEMINI_BUDGET_USD (lock held)"""
+        if GEMINI_BUDGET_USD is None or self._budget_warned:
+            return False
+
+        cost = sum(estimate_cost(s['prompt_tokens'], s['response_tokens']) for s in self._sites.values())
+        if cost > GEMINI_BUDGET_USD:
+            self._budget_warned = True
+            return True
+        return False
+
+    def report(self):
+        """Run report: per-call-site and total usage with estimated cost"""
+        with self._lock:
+            sites = {name: dict(site) for name, site in self._sites.items()}
+            started_at = self.started_at
+
+        totals = {key: 0 for key in ['calls', 'errors', 'retries', 'cache_hits', 'local_results',
+                                     'hedges', 'circuit_rejections', 'prompt_tokens', 'response_tokens']}
+        totals['estimated_cost_usd'] = 0.0
+
+        for site in sites.values():
+            for key in totals:
+                if key != 'estimated_cost_usd':
+                    totals[key] += site[key]
+
+            site['estimated_cost_usd'] = round(estimate_cost(site['prompt_tokens'], site['response_tokens']), 6)
+            site['latency_avg'] = round(site['latency_total'] / site['calls'], 4) if site['calls'] else 0.0
+            site['latency_total'] = round(site['latency_total'], 4)
+            site['latency_max'] = round(site['latency_max'], 4)
+            site['cache_hit_rate'] = _hit_rate(site)
+            totals['estimated_cost_usd'] += site['estimated_cost_usd']
+
+        totals['estimated_cost_usd'] = round(totals['estimated_cost_usd'], 6)
+        totals['cache_hit_rate'] = _hit_rate(totals)
+
+        return {
+            'started_at': started_at,
+            'generated_at': datetime.now().isoformat(),
+            'budget_usd': GEMINI_BUDGET_USD,
+            'totals': totals,
+            'by_call_site': sites
+        }
+
+# Shared tracker for the process
+usage_tracker = UsageTracker()
\ No newline at end of file
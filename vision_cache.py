@@ -0,0 +1,172 @@
+# src/utils/vision_cache.py
+"""
+Reuse vision results for near-identical figures
+
+The same Kaplan-Meier plot turns up in the journal article, the conference
+poster and the press release, rendered at different sizes and compressions.
+Figures are keyed by a perceptual hash - the signs of a 16x16 DCT of the
+figure's trimmed grayscale thumbnail - so those copies land within a few bits
+of each other, while different plots differ in a quarter or more of them.
+
+Entries live in SQLite (VISION_CACHE_PATH, WAL mode), one row each, so a put
+is a single insert and every worker process sees the others' results. Each
+process keeps the hashes in memory for the nearest-neighbour scan and picks
+up rows added elsewhere before every lookup.
+"""
+
+import copy
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from config.settings import VISION_CACHE_PATH, VISION_CACHE_MAX_DISTANCE
+from src.utils.image_prep import load_image
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE - 1  # DC term dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, figure_type TEXT, hash TEXT, result TEXT, cached_at TEXT);
+"""
+
+# Anything darker than this is ink; the hash is taken over the inked bounding box
+INK_THRESHOLD = 230
+
+_DCT = [[math.cos(math.pi * (2 * i + 1) * k / (2 * HASH_SIZE)) for i in range(HASH_SIZE)]
+        for k in range(HASH_SIZE)]
+
+def _dct_2d(block):
+    """Separable 2-D DCT-II (unnormalized) of a square block"""
+    rows = [[sum(c * v for c, v in zip(basis, row)) for basis in _DCT] for row in block]
+    return [[sum(_DCT[k][i] * rows[i][j] for i in range(HASH_SIZE)) for j in range(HASH_SIZE)]
+            for k in range(HASH_SIZE)]
+
+def image_hash(image):
+    """
+    Perceptual hash of an image as a hex string
+
+    Robust to rescaling, recompression, colour-to-gray conversion and added
+    whitespace margins.
+
+    Args:
+        image: Path, encoded bytes or PIL image
+    """
+    img, _ = load_image(image)
+    gray = img.convert('L')
+    gray.thumbnail((512, 512), Image.Resampling.BOX)
+
+    # Exact crop to the ink, so differently padded copies line up
+    bbox = gray.point(lambda p: 255 if p < INK_THRESHOLD else 0).getbbox()
+    if bbox:
+        gray = gray.crop(bbox)
+
+    # Two box-filter stages average thin strokes into every cell at any source size
+    small = gray.resize((64, 64), Image.Resampling.BOX).resize((HASH_SIZE, HASH_SIZE), Image.Resampling.BOX)
+    pixels = list(small.tobytes())
+    block = [pixels[row * HASH_SIZE:(row + 1) * HASH_SIZE] for row in range(HASH_SIZE)]
+
+    coefficients = [value for row in _dct_2d(block) for value in row][1:]
+    median = sorted(coefficients)[len(coefficients) // 2]
+    bits = 0
+    for value in coefficients:
+        bits = (bits << 1) | (value > median)
+    return f"{bits:0{(HASH_BITS + 3) // 4}x}"
+
+def hamming_distance(a, b):
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+class VisionCache:
+    """
+    Vision results keyed by (figure type, perceptual hash), stored in SQLite
+
+    Args:
+        path: SQLite database shared by every process using the cache (None = memory only)
+        max_distance: Largest Hamming distance (of HASH_BITS bits) still counted as the same figure
+    """
+
+    def __init__(self, path=VISION_CACHE_PATH, max_distance=VISION_CACHE_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._local = threading.local()  # One connection per thread
+        self._lock = threading.Lock()
+        self._entries = {}  # figure_type -> [(int hash, entry)]
+        self._synced = 0  # Last row id indexed
+        self.stats = {'hits': 0, 'misses': 0}
+
+        if path:
+            with self._lock:
+                self._sync()
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._local.db = db
+        return db
+
+    def _sync(self):
+        """Index the rows added since the last sync, by this or any other process (lock held)"""
+        if not self.path:
+            return
+        for row_id, figure_type, image_hash, result, cached_at in self._db().execute(
+                "SELECT id, figure_type, hash, result, cached_at FROM entries WHERE id > ? ORDER BY id",
+                (self._synced,)):
+            self._index({'hash': image_hash, 'figure_type': figure_type, 'result': json.loads(result),
+                         'cached_at': cached_at})
+            self._synced = row_id
+
+    def _index(self, entry):
+        self._entries.setdefault(entry['figure_type'], []).append((int(entry['hash'], 16), entry))
+
+    def get(self, image_hash, figure_type):
+        """Stored result for the nearest figure within max_distance, or None"""
+        target = int(image_hash, 16)
+        with self._lock:
+            self._sync()
+            best, best_distance = None, self.max_distance + 1
+            for value, entry in self._entries.get(figure_type, []):
+                distance = (value ^ target).bit_count()
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+                    if distance == 0:
+                        break
+
+            self.stats['hits' if best else 'misses'] += 1
+            return copy.deepcopy(best['result']) if best else None
+
+    def put(self, image_hash, figure_type, result):
+        """Store a result - one row appended to the database"""
+        entry = {
+            'hash': image_hash,
+            'figure_type': figure_type,
+            'result': result,
+            'cached_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            if not self.path:
+                self._index(entry)
+                return
+            self._db().execute("INSERT INTO entries (figure_type, hash, result, cached_at) VALUES (?, ?, ?, ?)",
+                               (figure_type, image_hash, json.dumps(result), entry['cached_at']))
+            self._sync()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    @property
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
\ No newline at end of file
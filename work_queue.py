@@ -0,0 +1,218 @@
+# src/utils/work_queue.py
+"""
+Durable job queue shared by classification workers (processes or nodes)
+
+Jobs and results live in one SQLite database (WAL mode, so readers do not
+block the writer) that every worker opens. A run is a set of jobs keyed by
+(run, nct_id); enqueuing a trial twice is a no-op. Each job belongs to a
+shard, crc32(nct_id) % shards, and a worker leases jobs from its own shards
+first and from anyone's once those are empty, so a dead worker's shards are
+still finished.
+
+A lease lasts WORK_LEASE_SECONDS; a job whose lease runs out without a
+result is handed out again. A failed job is retried after an exponential
+backoff until it has been tried WORK_MAX_ATTEMPTS times. Results are written
+once per job, by the worker holding it - or by one whose lease expired, if
+nobody has taken the job over. Results for a job leased to another worker,
+failed for good, or already done are ignored, so every result is written
+exactly once however often a job runs.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from config.settings import (WORK_QUEUE_PATH, WORK_QUEUE_SHARDS, WORK_LEASE_SECONDS, WORK_MAX_ATTEMPTS,
+                             WORK_RETRY_DELAY)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS jobs (
+    run TEXT, nct_id TEXT, shard INTEGER, payload TEXT,
+    state TEXT DEFAULT 'pending',   -- pending / leased / done / failed
+    attempts INTEGER DEFAULT 0,
+    worker TEXT,
+    available_at REAL DEFAULT 0,    -- Lease expiry while leased, retry time while pending
+    started REAL, error TEXT,
+    PRIMARY KEY (run, nct_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_shard ON jobs (run, state, shard, available_at);
+CREATE TABLE IF NOT EXISTS results (
+    run TEXT, nct_id TEXT, result TEXT, worker TEXT, finished REAL,
+    PRIMARY KEY (run, nct_id)
+);
+"""
+
+def shard_of(nct_id, shards):
+    """Stable across processes and machines, unlike hash()"""
+    return zlib.crc32(nct_id.encode()) % shards
+
+def worker_shards(index, workers, shards=WORK_QUEUE_SHARDS):
+    """Shards owned by worker `index` of `workers`"""
+    return [shard for shard in range(shards) if shard % workers == index]
+
+class WorkQueue:
+    """
+    Args:
+        path: SQLite database shared by all workers
+        shards: Shard count; fixed when the database is created
+        lease_seconds: How long a worker may hold jobs before they are handed out again
+        max_attempts: Leases per job before it is marked failed
+    """
+
+    def __init__(self, path=WORK_QUEUE_PATH, shards=WORK_QUEUE_SHARDS, lease_seconds=WORK_LEASE_SECONDS,
+                 max_attempts=WORK_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._local = threading.local()  # One connection per thread
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = self._db()
+        db.executescript(SCHEMA)
+        with self._transaction() as db:
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('shards', ?)", (str(shards),))
+            self.shards = int(db.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()[0])
+        if self.shards != shards:
+            print(f"⚠️ {path} was created with {self.shards} shards - using those, not {shards}")
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Autocommit; writes take the lock up front with BEGIN IMMEDIATE
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, run, trials):
+        """Add a job per trial; returns how many were new"""
+        rows = [(run, trial['nct_id'], shard_of(trial['nct_id'], self.shards), json.dumps(trial))
+                for trial in trials]
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO jobs (run, nct_id, shard, payload) VALUES (?, ?, ?, ?)", rows)
+            return db.total_changes - before
+
+    def lease(self, run, worker, shards=None, limit=1):
+        """
+        Claim up to `limit` available jobs
+
+        Args:
+            shards: Shards to take jobs from (default any)
+
+        Returns:
+            The jobs' trials
+        """
+        now = time.time()
+        shard_filter = f"AND shard IN ({','.join('?' * len(shards))})" if shards is not None else ""
+        with self._transaction() as db:
+            # Leases that ran out on their last attempt
+            db.execute("UPDATE jobs SET state = 'failed', error = 'Lease expired', worker = NULL "
+                       "WHERE run = ? AND state = 'leased' AND available_at <= ? AND attempts >= ?",
+                       (run, now, self.max_attempts))
+            rows = db.execute(f"SELECT nct_id, payload FROM jobs WHERE run = ? AND state IN ('pending', 'leased') "
+                              f"AND available_at <= ? {shard_filter} LIMIT ?",
+                              (run, now, *(shards or []), limit)).fetchall()
+            db.executemany("UPDATE jobs SET state = 'leased', worker = ?, available_at = ?, attempts = attempts + 1, "
+                           "started = COALESCE(started, ?) WHERE run = ? AND nct_id = ?",
+                           [(worker, now + self.lease_seconds, now, run, nct_id) for nct_id, _ in rows])
+        return [json.loads(payload) for _, payload in rows]
+
+    def complete(self, run, worker, results):
+        """
+        Store results and mark their jobs done
+
+        A result counts only for a job this worker still holds, or one nobody
+        holds now (pending, or its lease ran out and was not handed out again).
+        A result arriving after the job was leased to another worker, failed
+        for good, or done is dropped - a job that already has a result keeps it.
+
+        Args:
+            results: [(nct_id, result)]
+
+        Returns:
+            How many results were stored
+        """
+        now = time.time()
+        with self._transaction() as db:
+            accepted = [(nct_id, result) for nct_id, result in results if db.execute(
+                "SELECT 1 FROM jobs WHERE run = ? AND nct_id = ? AND (state = 'pending' OR (state = 'leased' "
+                "AND (worker = ? OR available_at <= ?)))", (run, nct_id, worker, now)).fetchone()]
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)",
+                           [(run, nct_id, json.dumps(result), worker, now) for nct_id, result in accepted])
+            written = db.total_changes - before
+            db.executemany("UPDATE jobs SET state = 'done', error = NULL WHERE run = ? AND nct_id = ?",
+                           [(run, nct_id) for nct_id, _ in accepted])
+        return written
+
+    def fail(self, run, worker, nct_ids, error):
+        """Return jobs this worker holds for a later retry, or mark them failed on their last attempt"""
+        now = time.time()
+        with self._transaction() as db:
+            for nct_id in nct_ids:
+                row = db.execute("SELECT attempts FROM jobs WHERE run = ? AND nct_id = ? AND state = 'leased' "
+                                 "AND worker = ?", (run, nct_id, worker)).fetchone()
+                if row is None:
+                    continue  # Lease lost to another worker
+                state = 'failed' if row[0] >= self.max_attempts else 'pending'
+                db.execute("UPDATE jobs SET state = ?, worker = NULL, available_at = ?, error = ? "
+                           "WHERE run = ? AND nct_id = ?",
+                           (state, now + WORK_RETRY_DELAY * 2 ** (row[0] - 1), str(error), run, nct_id))
+
+    def progress(self, run):
+        """Job counts by state and shard, results per worker, and throughput since the first lease"""
+        db = self._db()
+        states = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        shards = {}
+        for shard, state, count in db.execute("SELECT shard, state, COUNT(*) FROM jobs WHERE run = ? "
+                                              "GROUP BY shard, state", (run,)):
+            states[state] += count
+            totals = shards.setdefault(shard, {'total': 0, 'done': 0})
+            totals['total'] += count
+            totals['done'] += count if state == 'done' else 0
+        workers = dict(db.execute("SELECT worker, COUNT(*) FROM results WHERE run = ? GROUP BY worker", (run,)))
+        started = db.execute("SELECT MIN(started) FROM jobs WHERE run = ?", (run,)).fetchone()[0]
+        finished = db.execute("SELECT MAX(finished) FROM results WHERE run = ?", (run,)).fetchone()[0]
+        elapsed = finished - started if started and finished else 0.0
+        return {
+            'run': run,
+            'total': sum(states.values()),
+            **states,
+            'complete': states['pending'] + states['leased'] == 0,
+            'elapsed_seconds': round(elapsed, 3),
+            'per_second': round(states['done'] / elapsed, 2) if elapsed else 0.0,
+            'workers': workers,
+            'shards': {shard: shards[shard] for shard in sorted(shards)}
+        }
+
+    def failures(self, run):
+        """{nct_id: last error} of jobs that used up their attempts"""
+        return dict(self._db().execute("SELECT nct_id, error FROM jobs WHERE run = ? AND state = 'failed'", (run,)))
+
+    def trials(self, run):
+        """The run's trials, as enqueued"""
+        return [json.loads(payload) for (payload,) in
+                self._db().execute("SELECT payload FROM jobs WHERE run = ? ORDER BY nct_id", (run,))]
+
+    def results(self, run):
+        """{nct_id: result} of the run's finished jobs"""
+        return {nct_id: json.loads(result) for nct_id, result in
+                self._db().execute("SELECT nct_id, result FROM results WHERE run = ?", (run,))}
\ No newline at end of file